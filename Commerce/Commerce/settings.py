@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +47,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'auctions.replicas.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -73,12 +75,123 @@ WSGI_APPLICATION = 'Commerce.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# Profiles Selected With The COMMERCE_DB_PROFILE Environment Variable, "sqlite" By
+# Default; The load_test Command Compares Their Bids And Listing Requests Per Second
+DATABASE_PROFILES = {
+    'sqlite': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        # Persistent Connections, Checked Before They're Reused
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Writers Take The Lock When Their Transaction Begins, So They Queue For It
+            # (Up To timeout Seconds) Instead Of Failing With "database is locked" When
+            # A Read Transaction Upgrades To A Write
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+            # Applied On Connect: Readers Don't Block The Writer (WAL), Commits Sync The
+            # Log Only At Checkpoints (Safe In WAL, A Power Loss May Drop The Last
+            # Commits), 256 MiB Memory-Mapped Reads, 64 MiB Page Cache
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA mmap_size=268435456;'
+                'PRAGMA cache_size=-65536;'
+                'PRAGMA temp_store=MEMORY'
+            ),
+        },
+        # File based test database, so concurrency tests can share it between threads
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    },
+    # Django's SQLite Defaults, The Baseline Of Load Tests
+    'sqlite-default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    },
+    # Needs psycopg[pool]; Pooled Connections Replace CONN_MAX_AGE
+    'postgres': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('COMMERCE_DB_NAME', 'commerce'),
+        'USER': os.environ.get('COMMERCE_DB_USER', 'commerce'),
+        'PASSWORD': os.environ.get('COMMERCE_DB_PASSWORD', ''),
+        'HOST': os.environ.get('COMMERCE_DB_HOST', 'localhost'),
+        'PORT': os.environ.get('COMMERCE_DB_PORT', '5432'),
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {
+            'pool': {
+                'min_size': 2,
+                'max_size': int(os.environ.get('COMMERCE_DB_POOL_SIZE', 20)),
+                'timeout': 10,
+            },
+        },
+    },
 }
+DATABASE_PROFILE = os.environ.get('COMMERCE_DB_PROFILE', 'sqlite')
+
+DATABASES = {
+    'default': DATABASE_PROFILES[DATABASE_PROFILE],
+}
+
+# Read Replicas (auctions.replicas): Comma Separated SQLite Files Or PostgreSQL
+# host:port, Each Configured Like The Primary. SQLite Replicas Are Opened Read-Only
+# And Kept In Sync By manage.py replicate_sqlite
+DATABASE_REPLICAS = []
+for number, replica in enumerate(filter(None, os.environ.get('COMMERCE_DB_REPLICAS', '').split(',')), 1):
+    alias = f'replica{number}'
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+        DATABASES[alias] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            # A Missing File Fails The Connection Instead Of Creating An Empty Database
+            'NAME': f'file:{replica.strip()}?mode=ro',
+            'OPTIONS': {
+                'timeout': 20,
+                'init_command': 'PRAGMA query_only=ON;PRAGMA mmap_size=268435456;PRAGMA cache_size=-65536',
+            },
+        }
+    else:
+        host, _, port = replica.strip().partition(':')
+        DATABASES[alias] = {**DATABASES['default'], 'HOST': host, 'PORT': port or '5432'}
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['auctions.replicas.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Profiles Selected With The COMMERCE_CACHE_PROFILE Environment Variable, "local" By
+# Default. "local" Keeps A Cache In Each Process, So Page Cache Versions, Sessions,
+# Statistics And Unread Counts Are Only Right With A Single Worker Process; Several
+# Workers Need "redis" (pip install redis) Or "memcached" (pip install pymemcache)
+CACHE_PROFILES = {
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('COMMERCE_CACHE_LOCATION', 'redis://localhost:6379/1'),
+    },
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': os.environ.get('COMMERCE_CACHE_LOCATION', '127.0.0.1:11211'),
+    },
+}
+CACHE_PROFILE = os.environ.get('COMMERCE_CACHE_PROFILE', 'local')
+
+CACHES = {
+    'default': CACHE_PROFILES[CACHE_PROFILE],
+}
+
+# Worker Processes Serving The Site; With More Than One, A Process-Local Cache Turns
+# Off Page Caching And Cached Sessions (auctions.checks Refuses Them)
+WORKER_PROCESSES = int(os.environ.get('COMMERCE_WORKER_PROCESSES', 1))
+CACHE_SHARED = CACHE_PROFILE != 'local' or WORKER_PROCESSES == 1
 
 
 # Password validation
@@ -129,5 +242,76 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_ROOT = BASE_DIR.parent / "media/commerce/uploads"
 MEDIA_URL = '/media/'
 
+# Storages, Auction Pictures And Avatars Are Stored By Content (auctions.storage)
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    "blobs": {"BACKEND": "auctions.storage.ContentAddressedStorage"},
+}
+
+# Image Variants (auctions.images) Background Worker Threads
+IMAGE_WORKERS = 2
+
 # LogIn Redirect
-LOGIN_REDIRECT_URL = 'index'
\ No newline at end of file
+LOGIN_REDIRECT_URL = 'index'
+
+# Users Are Loaded With Their Profile, In One Query (auctions.backends); ModelBackend
+# Stays Listed So Sessions Logged In Through It Aren't Logged Out
+AUTHENTICATION_BACKENDS = [
+    'auctions.backends.ProfileBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Sessions Are Read From The Cache And Written Through To The Database; Unchanged
+# Sessions Aren't Saved. Without A Cache Shared By Every Worker Process A Logout Would
+# Leave The Session Cached In The Others, So They're Only Read From The Database
+SESSION_ENGINE = (
+    'django.contrib.sessions.backends.cached_db' if CACHE_SHARED else 'django.contrib.sessions.backends.db'
+)
+SESSION_SAVE_EVERY_REQUEST = False
+
+# Hot Auctions Bid Book (auctions.bidbook)
+# Hot auctions must be served by a single worker process when enabled
+BID_BOOK_ENABLED = False
+BID_BOOK_LOG = BASE_DIR / "bidbook.log"
+BID_BOOK_FLUSH_INTERVAL = 0.5  # seconds
+BID_BOOK_BATCH_SIZE = 1000
+BID_BOOK_FSYNC = True
+
+# Soft Close (auctions.bidding): A Bid In The Last SOFT_CLOSE_WINDOW Seconds Of An
+# Auction Pushes Its End Time To SOFT_CLOSE_EXTENSION Seconds After The Bid, 0 Disables
+SOFT_CLOSE_WINDOW = 60
+SOFT_CLOSE_EXTENSION = 60
+
+# Bulk Auction Imports (auctions.bulk): Auctions Inserted Per Statement
+IMPORT_BATCH_SIZE = 500
+
+# Watch List Notifications (auctions.notifications): Background Worker Threads, Seconds
+# Bid Fan-Outs Wait (Coalescing Bursts), Watchers Notified Per Statement And Unread
+# Counts Cache Lifetime In Seconds
+NOTIFICATION_WORKERS = 2
+NOTIFICATION_DELAY = 1.0
+NOTIFICATION_BATCH_SIZE = 1000
+NOTIFICATION_COUNT_TTL = 300
+
+# Closed Auctions Archive (auctions.archive): Days After Their End Before Closed
+# Auctions Are Archived, Auctions Moved Per Transaction
+ARCHIVE_AFTER_DAYS = 30
+ARCHIVE_BATCH_SIZE = 500
+
+# Auction Statistics (auctions.stats) Cache Lifetime In Seconds
+STATISTICS_CACHE_TTL = 60
+
+# Read Replicas: Seconds A User's Reads Stay On The Primary After A Write (Must Exceed
+# The Replication Lag), Seconds Before An Unavailable Replica Is Tried Again
+REPLICA_STICKY_SECONDS = 10
+REPLICA_RETRY_SECONDS = 30
+
+# Anonymous Page And Fragment Caching (auctions.caching) Lifetimes In Seconds; Off
+# Without A Cache Shared By Every Worker Process, Whose Version Bumps Others Wouldn't See
+PAGE_CACHE_ENABLED = CACHE_SHARED
+PAGE_CACHE_TIMEOUT = 300
+FRAGMENT_CACHE_TIMEOUT = 3600
+
+# View Query Budgets (auctions.querybudget), Raising When Exceeded
+QUERY_BUDGET_ENABLED = DEBUG
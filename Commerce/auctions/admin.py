@@ -1,16 +1,99 @@
 from django.contrib import admin
 
-from auctions.models import UserProfile, Auction, Bid, Comment
+from auctions import closing
+from auctions.models import ArchivedAuction, AuctionStatus, UserProfile, Auction, Bid, Comment
+from auctions.pagination import CappedPaginator
+from auctions.querybudget import query_budget
+
+
+class QueryBudgetAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin whose list and change pages run under query budgets (auctions.querybudget).
+
+    Changelists count up to a cap (CappedPaginator) and skip the unfiltered
+    total, so their cost doesn't grow with the table.
+    """
+
+    paginator = CappedPaginator
+    show_full_result_count = False
+    changelist_query_budget = None
+    change_query_budget = None
+
+    def changelist_view(self, request, extra_context=None):
+        view = super().changelist_view
+        if self.changelist_query_budget is not None:
+            view = query_budget(self.changelist_query_budget)(view)
+        return view(request, extra_context)
+
+    # Budgets the page, saves also run the model's signals and admin log
+    def change_view(self, request, object_id, form_url="", extra_context=None):
+        view = super().change_view
+        if self.change_query_budget is not None and request.method == "GET":
+            view = query_budget(self.change_query_budget)(view)
+        return view(request, object_id, form_url, extra_context)
+
 
 @admin.register(Auction)
-class AuctionAdmin(admin.ModelAdmin):
-    list_display = ("date", "name", "price", "status", "category")
+class AuctionAdmin(QueryBudgetAdmin):
+    list_display = ("date", "name", "price", "status", "category", "hot")
+    # Owners, top bids and winners are too many for select boxes; top bids are
+    # set by bidding and winners by closing (auctions.closing)
+    raw_id_fields = ("owner",)
+    readonly_fields = ("top_bid", "winner")
+    # Newest first down the (date, id) index
+    ordering = ("-date", "-id")
+    changelist_query_budget = 5
+    change_query_budget = 5
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("owner", "top_bid__auction", "winner")
+
+    # Closing Finalizes The Winner And End Time Like The Owner's Close (auctions.closing)
+    def save_model(self, request, obj, form, change):
+        closing_by_hand = change and "status" in form.changed_data and obj.status == AuctionStatus.CLOSED
+        if closing_by_hand:
+            obj.status = form.initial["status"]
+        super().save_model(request, obj, form, change)
+        if closing_by_hand:
+            closing.close(obj.pk)
 
 @admin.register(Bid)    
-class BidAdmin(admin.ModelAdmin):
+class BidAdmin(QueryBudgetAdmin):
     list_display = ("date", "bidder", "auction")
+    raw_id_fields = ("bidder", "auction")
+    # Newest first down the primary key, a date index would slow every bid
+    ordering = ("-id",)
+    changelist_query_budget = 5
+    change_query_budget = 5
+
+    # Joins the list columns and the change page's title (Bid.__str__); a
+    # select_related here replaces list_select_related
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("bidder", "auction")
     
 @admin.register(Comment)    
-class Comment(admin.ModelAdmin):
+class Comment(QueryBudgetAdmin):
     list_display = ("date", "commenter", "auction")
-    
\ No newline at end of file
+    list_select_related = ("commenter", "auction")
+    raw_id_fields = ("commenter", "auction")
+    # Newest first down the (date, id) index
+    ordering = ("-date", "-id")
+    changelist_query_budget = 5
+    change_query_budget = 5
+
+
+# Archived Auctions (auctions.archive) Are Read Only
+@admin.register(ArchivedAuction)
+class ArchivedAuctionAdmin(QueryBudgetAdmin):
+    list_display = ("date", "name", "price", "category", "period")
+    changelist_query_budget = 5
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    # Deletes Would Skip Releasing Pictures, archive.purge() Does
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,197 @@
+"""
+Read-only JSON API for the listing, auction details, bids and comments.
+
+Responses carry ETags built from the page cache versions (auctions.caching),
+"listings" and the listed auctions' scopes for the listing and "auction:<id>"
+for an auction's details, bids and comments. A poll sending its last ETag back in If-None-Match is answered
+with 304 Not Modified from the cache alone, without a database query, until
+a write bumps the version. Anonymous responses are also cached like pages.
+
+Every query fetches only the fields it returns, and lists are paginated with
+cursors (auctions.pagination) rather than counted; bids and comments come in
+chronological order, so a poll continues from its last next cursor. Bid
+rollups (auctions.ledger) serve charts of bids per minute and the price curve.
+"""
+
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition, require_GET
+
+# Caching
+from auctions.caching import cache_anonymous_page, etag, shows
+
+# Query Budgets
+from auctions.querybudget import query_budget
+
+# Pagination
+from auctions.pagination import KeysetPaginator
+
+# Image Variants
+from auctions import images
+
+# Models
+from auctions.models import Auction, Bid, BidRollup, Comment
+
+# Forms
+from auctions.forms import AuctionsListingFiltersForm
+
+# Listing Filters And Their Cache Scopes
+from auctions.views import filter_auctions, listing_scopes
+
+# Prices As JSON Numbers
+from auctions.money import MoneyJSONEncoder
+
+# Items per page by default, and at most
+PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+# Fields of an auction in the listing
+LISTING_FIELDS = ("id", "name", "price", "category", "status", "date", "ends_at", "picture")
+
+
+def auction_scopes(request, auction_id):
+    return (f"auction:{auction_id}",)
+
+
+def per_page(request):
+    """Items per page asked for, within 1 and MAX_PER_PAGE."""
+    try:
+        return min(max(int(request.GET.get("per_page", PER_PAGE)), 1), MAX_PER_PAGE)
+    except ValueError:
+        return PER_PAGE
+
+
+def paginated(page, serialize):
+    """A keyset page as JSON: its results and the cursors around it."""
+    return JsonResponse(
+        {
+            "results": [serialize(obj) for obj in page],
+            "next": page.next_cursor,
+            "previous": page.previous_cursor,
+        },
+        encoder=MoneyJSONEncoder,
+    )
+
+
+def auction_summary(auction):
+    return {
+        "id": auction.id,
+        "name": auction.name,
+        "price": auction.price,
+        "category": auction.category,
+        "status": auction.status,
+        "date": auction.date,
+        "ends_at": auction.ends_at,
+        "picture": images.variant_url(auction.picture, "card"),
+    }
+
+
+# Listing
+@require_GET
+@condition(etag_func=etag(listing_scopes, per_auction=True))
+@cache_anonymous_page(listing_scopes, per_auction=True)
+@query_budget(4)
+def listing(request):
+    """_summary_
+    Lists auctions as JSON, filtered like the listing page.
+
+    Takes the filters of AuctionsListingFiltersForm (category, status,
+    start_price, end_price), order (date or price), per_page and the cursor
+    of a previous response's next or previous.
+    """
+    filter_form = AuctionsListingFiltersForm(request.GET)
+    if not filter_form.is_valid():
+        return JsonResponse({"errors": filter_form.errors}, status=400)
+    auctions, counted_filters = filter_auctions(filter_form, Auction.objects.only(*LISTING_FIELDS))
+
+    order = request.GET.get("order", "date")
+    if order not in KeysetPaginator.KEYS:
+        order = "date"
+    page = KeysetPaginator(auctions, per_page(request), key=order).get_page(request.GET.get("cursor"))
+    for auction in page:
+        shows(request, auction)
+    return paginated(page, auction_summary)
+
+
+# Auction Details
+@require_GET
+@condition(etag_func=etag(auction_scopes))
+@cache_anonymous_page(auction_scopes)
+@query_budget(3)
+def auction(request, auction_id):
+    """_summary_
+    An auction's details as JSON, with its owner and winner usernames.
+    """
+    auction_obj = get_object_or_404(
+        Auction.objects.select_related("owner", "winner").only(
+            *LISTING_FIELDS, "description", "owner__username", "winner__username"
+        ),
+        id=auction_id,
+    )
+    return JsonResponse(
+        {
+            **auction_summary(auction_obj),
+            "description": auction_obj.description,
+            "owner": auction_obj.owner.username,
+            "winner": auction_obj.winner.username if auction_obj.winner else None,
+            "picture": images.variant_url(auction_obj.picture, "full"),
+        },
+        encoder=MoneyJSONEncoder,
+    )
+
+
+# Bid History
+@require_GET
+@condition(etag_func=etag(auction_scopes))
+@cache_anonymous_page(auction_scopes)
+@query_budget(3)
+def bids(request, auction_id):
+    """_summary_
+    An auction's bids as JSON, lowest first.
+
+    A bid has to top the auction's price, so price order is also the order
+    the bids were placed in; each bidder's latest bid is kept.
+    """
+    bids = Bid.objects.filter(auction_id=auction_id).select_related("bidder").only(
+        "id", "price", "date", "bidder__username"
+    )
+    page = KeysetPaginator(bids, per_page(request), key="price").get_page(request.GET.get("cursor"))
+    return paginated(page, lambda bid: {"id": bid.id, "bidder": bid.bidder.username, "price": bid.price, "date": bid.date})
+
+
+# Comments
+@require_GET
+@condition(etag_func=etag(auction_scopes))
+@cache_anonymous_page(auction_scopes)
+@query_budget(3)
+def comments(request, auction_id):
+    """_summary_
+    An auction's comments as JSON, oldest first.
+    """
+    comments = Comment.objects.filter(auction_id=auction_id).select_related("commenter").only(
+        "id", "text", "date", "commenter__username"
+    )
+    page = KeysetPaginator(comments, per_page(request), key="date").get_page(request.GET.get("cursor"))
+    return paginated(
+        page, lambda comment: {"id": comment.id, "commenter": comment.commenter.username, "text": comment.text, "date": comment.date}
+    )
+
+
+# Bid Rollups
+@require_GET
+@condition(etag_func=etag(auction_scopes))
+@cache_anonymous_page(auction_scopes)
+@query_budget(3)
+def rollups(request, auction_id):
+    """_summary_
+    An auction's bid rollups as JSON, one per minute with bids, oldest first.
+
+    Each has the bid attempts, the accepted ones and the lowest and highest
+    accepted price of the minute, for bids per minute and price curve charts.
+    """
+    rows = (
+        BidRollup.objects.filter(auction_id=auction_id)
+        .order_by("minute")
+        .values("minute", "attempts", "accepted", "low", "high")
+    )
+    return JsonResponse({"results": list(rows)}, encoder=MoneyJSONEncoder)
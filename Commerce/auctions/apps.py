@@ -6,4 +6,5 @@ class AuctionsConfig(AppConfig):
     name = 'auctions'
 
     def ready(self):
-        import auctions.signals
\ No newline at end of file
+        import auctions.signals
+        import auctions.checks
\ No newline at end of file
@@ -0,0 +1,163 @@
+"""
+Archive of closed auctions.
+
+Closed auctions stay in the Auction, Bid and Comment tables forever unless
+they're moved out, and every listing, filter index and statistics seek pays
+for them. The archive_auctions command moves auctions closed for more than
+ARCHIVE_AFTER_DAYS (by end time, which closing by hand sets to the moment it
+closes, see Auction.end_if_closed) into ArchivedAuction, ArchivedBid and
+ArchivedComment, ARCHIVE_BATCH_SIZE auctions per transaction, so the hot
+tables and their indexes only grow with the active and recently closed
+auctions.
+
+A batch copies the rows with bulk inserts and deletes them with one
+statement per table, without the delete collector loading and signalling
+every row; it updates the statistics, search index, page cache and unread
+counts itself. Bid attempts, bid rollups, watch list entries and
+notifications of archived auctions are deleted, the archive keeps what the
+auction page shows. Archived pictures keep their media references.
+
+Archived rows are partitioned by period, the month the auction ended, and
+purge() drops whole periods.
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+# Models
+from auctions.models import (
+    ArchivedAuction,
+    ArchivedBid,
+    ArchivedComment,
+    Auction,
+    AuctionStatus,
+    Bid,
+    BidAttempt,
+    BidRollup,
+    Comment,
+    Notification,
+    WatchListEntry,
+)
+
+# Statistics, Caching, Search, Notifications And Media References
+from auctions import blobs, caching, notifications, search, stats
+
+AUCTION_FIELDS = (
+    "id", "date", "name", "description", "picture", "price", "category", "status", "ends_at", "owner_id", "winner_id",
+)
+BID_FIELDS = ("id", "date", "price", "bidder_id", "auction_id")
+COMMENT_FIELDS = ("id", "date", "text", "commenter_id", "auction_id")
+# Rows of an auction deleted with it, besides its bids and comments
+DEPENDENTS = (BidAttempt, BidRollup, WatchListEntry, Notification)
+
+
+def period(moment):
+    """The partition of an auction ended at moment: the first day of its month."""
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+def cutoff(now=None):
+    """Auctions that ended before it are archived."""
+    return (now or timezone.now()) - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+
+
+def archivable(before):
+    """Closed auctions that ended before a moment."""
+    return Auction.objects.filter(status=AuctionStatus.CLOSED, ends_at__lt=before)
+
+
+def _delete(model, column, ids):
+    """
+    Deletes a model's rows whose column is one of ids, with one DELETE.
+
+    Unlike QuerySet.delete(), the collector doesn't fetch, cascade or signal
+    every row: archive_batch() deletes the dependents itself and does what the
+    Auction signals would.
+
+    Returns:
+        int: Number of rows deleted.
+    """
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {model._meta.db_table} WHERE {column} IN ({placeholders})", ids)
+        return cursor.rowcount
+
+
+def archive_batch(before=None, batch_size=None):
+    """
+    Moves a batch of archivable auctions, their bids and comments to the archive.
+
+    Args:
+        before (datetime): Archives auctions ended before it, cutoff() by default.
+        batch_size (int): Auctions moved at most, ARCHIVE_BATCH_SIZE by default.
+
+    Returns:
+        int: Number of auctions archived, below batch_size once none is left.
+    """
+    before = before or cutoff()
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    with transaction.atomic():
+        rows = list(archivable(before).order_by().values(*AUCTION_FIELDS)[:batch_size])
+        if not rows:
+            return 0
+        auction_ids = [row["id"] for row in rows]
+
+        ArchivedAuction.objects.bulk_create(
+            ArchivedAuction(period=period(row["ends_at"]), **row) for row in rows
+        )
+        ArchivedBid.objects.bulk_create(
+            ArchivedBid(**row) for row in Bid.objects.filter(auction_id__in=auction_ids).order_by().values(*BID_FIELDS)
+        )
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(**row)
+            for row in Comment.objects.filter(auction_id__in=auction_ids).order_by().values(*COMMENT_FIELDS)
+        )
+
+        # Unread counts of the notifications deleted below
+        readers = set(
+            Notification.objects.filter(auction_id__in=auction_ids, read=False).values_list("user_id", flat=True)
+        )
+        for model in DEPENDENTS + (Bid, Comment):
+            _delete(model, "auction_id", auction_ids)
+        _delete(Auction, "id", auction_ids)
+
+        for category, count in Counter(row["category"] for row in rows).items():
+            stats.adjust(category, AuctionStatus.CLOSED, -count)
+        search.unindex_auctions(auction_ids)
+
+    cache.delete_many([notifications.unread_key(user_id) for user_id in readers])
+    caching.bump("listings", *(f"auction:{auction_id}" for auction_id in auction_ids))
+    return len(rows)
+
+
+def archive(before=None, batch_size=None):
+    """Archives every archivable auction, a batch per transaction; returns how many."""
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    total = 0
+    while True:
+        archived = archive_batch(before, batch_size)
+        total += archived
+        if archived < batch_size:
+            return total
+
+
+def purge(before):
+    """
+    Deletes the archived auctions of the periods before a date, with their bids and comments.
+
+    Args:
+        before (date): First period kept.
+
+    Returns:
+        int: Number of archived auctions deleted.
+    """
+    expired = ArchivedAuction.objects.filter(period__lt=before)
+    with transaction.atomic():
+        for name, count in Counter(expired.order_by().values_list("picture", flat=True)).items():
+            blobs.release(name, count)
+        return expired.delete()[1].get(ArchivedAuction._meta.label, 0)
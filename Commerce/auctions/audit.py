@@ -0,0 +1,245 @@
+"""
+Query-shape audit.
+
+Replays a workload of requests against the views, captures every query they
+issue and runs EXPLAIN QUERY PLAN on each distinct query shape, flagging:
+    - "scan": a full table scan (SCAN <table> without an index).
+    - "sort": a temp B-tree built for ORDER BY, GROUP BY or DISTINCT.
+
+Findings that are inherent to a query are listed in ACCEPTED with the reason
+and reported as accepted instead. Plans are SQLite's; other databases are not audited. Used by the
+audit_queries command and by the tests, which require a clean report.
+"""
+
+import re
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+# Models
+from auctions.models import (
+    ArchivedAuction,
+    Auction,
+    AuctionCategories,
+    AuctionStatus,
+    Bid,
+    Comment,
+    NotificationKind,
+    User,
+    UserProfile,
+    WatchListEntry,
+)
+
+# Watch List Notifications
+from auctions import archive, notifications
+
+# Literals are replaced to group queries by shape
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+SCAN_RE = re.compile(r"^SCAN (\w+)$")
+SORT_RE = re.compile(r"USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT)")
+
+# Tables that are always read whole, e.g. the statistics buckets
+SMALL_TABLES = {"auctions_auctionstatistics", "django_content_type", "django_site"}
+
+# (finding kind, SQL pattern, reason) of findings no index can remove
+ACCEPTED = [
+    ("sort", re.compile(r"auctions_auction_fts"), "BM25 ranks are computed per match"),
+    (
+        "sort",
+        re.compile(r'"price_cents" >= .* ORDER BY "auctions_auction"."date"'),
+        "a price range can't also be walked in date order",
+    ),
+    (
+        "sort",
+        re.compile(r'"auctions_userprofile_watch_list"."userprofile_id" = '),
+        "a single user's watch list, sorted in memory",
+    ),
+    (
+        "scan",
+        re.compile(r"^SELECT COUNT\(\*\) FROM \(.* LIMIT \d+\) subquery$"),
+        "a capped count reads its LIMIT rows at most",
+    ),
+    (
+        "scan",
+        re.compile(r'ORDER BY "\w+"."id" DESC LIMIT \d+(?: OFFSET \d+)?$'),
+        "walks the rowid newest first, up to its LIMIT",
+    ),
+]
+
+Finding = namedtuple("Finding", "kind detail accepted")
+QueryReport = namedtuple("QueryReport", "request sql plan findings")
+
+
+def shape(sql):
+    return LITERAL_RE.sub("?", sql)
+
+
+def explain(sql):
+    """Returns the EXPLAIN QUERY PLAN lines of an executed query."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def inspect(sql, plan):
+    """Returns the findings of a query plan, with the reason if accepted."""
+    findings = []
+    for line in plan:
+        kind = None
+        scan = SCAN_RE.match(line)
+        if scan and scan.group(1) not in SMALL_TABLES:
+            kind = "scan"
+        elif SORT_RE.search(line):
+            kind = "sort"
+        if kind:
+            reason = next(
+                (reason for accepted, pattern, reason in ACCEPTED if accepted == kind and pattern.search(sql)),
+                None,
+            )
+            findings.append(Finding(kind, line, reason))
+    return findings
+
+
+def flagged(reports):
+    """Returns the reports with findings that aren't accepted."""
+    return [report for report in reports if any(not finding.accepted for finding in report.findings)]
+
+
+# Workload
+def seed(auctions=200, users=20):
+    """Creates auctions spread over every category and status, with bids, comments and watchers."""
+    # Created one by one, so they get their profiles
+    owners = [User.objects.create(username=f"audit{i}", first_name=f"audit{i}") for i in range(users)]
+    categories, statuses = AuctionCategories.values, AuctionStatus.values
+    created = []
+    for i in range(auctions):
+        created.append(
+            Auction.objects.create(
+                name=f"audit item {i}",
+                description=f"lot number {i}",
+                price=float(i % 97 + 1),
+                category=categories[i % len(categories)],
+                status=statuses[i % len(statuses)],
+                owner=owners[i % users],
+            )
+        )
+    Bid.objects.bulk_create(
+        Bid(auction=auction, bidder=owners[j], price=auction.price + j)
+        for auction in created[:50]
+        for j in range(5)
+    )
+    Comment.objects.bulk_create(
+        Comment(auction=auction, commenter=owners[j], text=f"comment {j}")
+        for auction in created[:50]
+        for j in range(5)
+    )
+    WatchListEntry.objects.bulk_create(
+        WatchListEntry(auction=auction, userprofile=profile)
+        for auction in created[:50]
+        for profile in UserProfile.objects.filter(user__in=owners[:10])
+    )
+    return created
+
+
+def workload(client, auction, user):
+    """
+    Yields (label, callable) for every view request of the workload.
+
+    Reads run anonymous and logged in; writes run logged in as user, the admin
+    pages as a superuser.
+    """
+    listing = reverse("listing")
+    page = reverse("auction", args=[auction.id])
+    reads = [
+        ("index", reverse("index"), {}),
+        ("categories", reverse("categories"), {}),
+        ("listing", listing, {}),
+        ("listing page 3", listing, {"page": 3}),
+        ("listing filtered", listing, {"category": AuctionCategories.OTHER, "status": AuctionStatus.ACTIVE}),
+        ("listing by status", listing, {"status": AuctionStatus.ACTIVE}),
+        ("listing by category", listing, {"category": AuctionCategories.BOOKS_AND_MEDIA}),
+        ("listing price range", listing, {"start_price": 10, "end_price": 50}),
+        ("listing cursor date", listing, {"mode": "cursor"}),
+        ("listing cursor price", listing, {"mode": "cursor", "order": "price", "count": 1}),
+        ("search", reverse("search"), {"q": "audit item"}),
+        ("auction", page, {}),
+        ("api listing", reverse("api_listing"), {}),
+        ("api listing filtered", reverse("api_listing"), {"category": AuctionCategories.OTHER}),
+        ("api auction", reverse("api_auction", args=[auction.id]), {}),
+        ("api bids", reverse("api_bids", args=[auction.id]), {}),
+        ("api comments", reverse("api_comments", args=[auction.id]), {}),
+        ("api rollups", reverse("api_rollups", args=[auction.id]), {}),
+    ]
+    for label, url, params in reads:
+        yield label, lambda url=url, params=params: client.get(url, params)
+
+    yield "login", lambda: client.force_login(user)
+    for label, url, params in reads:
+        yield f"{label} (logged in)", lambda url=url, params=params: client.get(url, params)
+    yield "userprofile", lambda: client.get(reverse("userprofile"))
+    yield "edit auction", lambda: client.get(reverse("edit_auction", args=[auction.id]))
+    yield "bid", lambda: client.post(reverse("bid", args=[auction.id]), {"price": auction.price + 1000})
+    yield "comment", lambda: client.post(reverse("comment", args=[auction.id]), {"comment": "audit"})
+    yield "watch list", lambda: client.post(reverse("watch_list", args=[auction.id, "add"]))
+    yield "bid history", lambda: client.get(reverse("bid_history", args=[auction.id]))
+    yield "my bids", lambda: client.get(reverse("my_bids"))
+    # Fan-outs run in the background, here in line so their queries are seen
+    yield "notify watchers", lambda: notifications.fan_out(auction.id, NotificationKind.BID, auction.price, batch_size=5)
+    yield "notify closed", lambda: notifications.fan_out_closed([auction.id])
+    yield "inbox", lambda: client.get(reverse("inbox"))
+    yield "inbox unread", lambda: client.get(reverse("unread_notifications"))
+    for kind in ("auctions", "bids", "comments"):
+        # Exports stream, their queries run as they're read
+        yield f"export {kind}", lambda kind=kind: b"".join(
+            client.get(reverse("export", args=[kind])).streaming_content
+        )
+    # Last, it takes the closed auctions out of the tables above
+    yield "archive", lambda: archive.archive_batch(timezone.now() + timedelta(days=1), batch_size=10)
+    yield "archived auction", lambda: client.get(
+        reverse("auction", args=[ArchivedAuction.objects.values_list("id", flat=True).first()])
+    )
+    yield "purge archive", lambda: archive.purge(timezone.now().date() + timedelta(days=32))
+
+    yield "admin login", lambda: client.force_login(
+        User.objects.create_superuser(username="audit-admin", password="audit-admin")
+    )
+    bid_id = Bid.objects.values_list("id", flat=True).first()
+    admin_pages = [
+        ("admin auctions", reverse("admin:auctions_auction_changelist"), {}),
+        ("admin auctions page 2", reverse("admin:auctions_auction_changelist"), {"p": 2}),
+        ("admin auction", reverse("admin:auctions_auction_change", args=[auction.id]), {}),
+        ("admin bids", reverse("admin:auctions_bid_changelist"), {}),
+        ("admin comments", reverse("admin:auctions_comment_changelist"), {}),
+        ("admin archived auctions", reverse("admin:auctions_archivedauction_changelist"), {}),
+    ]
+    if bid_id is not None:
+        admin_pages.append(("admin bid", reverse("admin:auctions_bid_change", args=[bid_id]), {}))
+    for label, url, params in admin_pages:
+        yield label, lambda url=url, params=params: client.get(url, params)
+
+
+def audit(steps):
+    """
+    Runs the workload steps and explains every distinct query shape.
+
+    Returns:
+        list: A QueryReport for each distinct query shape, in first-seen order.
+    """
+    reports = {}
+    for label, step in steps:
+        # A full query log (DEBUG) would hide the step's queries
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            step()
+        for query in queries.captured_queries:
+            sql = query["sql"]
+            key = shape(sql)
+            if key in reports or not sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "INSERT")):
+                continue
+            plan = explain(sql)
+            reports[key] = QueryReport(label, sql, plan, inspect(sql, plan))
+    return list(reports.values())
@@ -0,0 +1,24 @@
+"""
+Authentication backend loading the user with their profile.
+
+AuthenticationMiddleware loads request.user lazily, once per request, through
+the backend's get_user(); this one joins the UserProfile into that query, so
+views reading request.user.userprofile (the profile page, the watch list)
+don't fetch it again. Sessions are cached (SESSION_ENGINE), so an
+authenticated request usually costs this single query.
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+class ProfileBackend(ModelBackend):
+    """ModelBackend whose users come with their profile."""
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related("userprofile").get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,414 @@
+"""
+View benchmark suite.
+
+Seeds a synthetic dataset of a given scale (auctions, and as many bids and
+comments), then drives every URL through the test client and records, per
+case:
+    - "queries": queries issued by one request.
+    - "p50_ms", "p99_ms": latency over repeated requests.
+    - "peak_kib": peak memory allocated by one request (tracemalloc).
+
+Results are compared with a stored baseline (BASELINE_PATH, keyed by scale)
+so the benchmark_views command fails on regressions, e.g. N+1 queries. Only
+queries, p50 and peak memory are gated: the p99 of a few dozen timed requests
+is their slowest one, reported but too noisy to fail on.
+
+Pages meant to cost the same at any scale (FLAT_CASES) are also gated across
+scales: their p50 at 10^6 auctions may be at most FLAT_RATIO times their p50
+at 10^3, so a page that slowly degrades with the data fails even when each
+scale stays within its own baseline.
+"""
+
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, reset_queries
+from django.db.models import OuterRef, Subquery
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+# Models
+from auctions import archive, ledger, notifications, search, stats
+from auctions.models import (
+    ArchivedAuction,
+    Auction,
+    AuctionCategories,
+    AuctionStatus,
+    Bid,
+    BidAttempt,
+    BidOutcome,
+    Comment,
+    NotificationKind,
+    User,
+    UserProfile,
+    WatchListEntry,
+)
+
+BASELINE_PATH = Path(__file__).resolve().parent / "benchmark_baseline.json"
+
+# Gated latency and memory may grow by this fraction, plus an absolute slack
+# for noise on small figures. Query counts may never grow.
+TOLERANCE = 0.5
+SLACKS = {"p50_ms": 1.0, "peak_kib": 16.0}
+# Scales of the stored baseline, 10^3 to 10^6 auctions
+SCALES = (1_000, 10_000, 100_000, 1_000_000)
+
+# Cases whose p50 may grow at most this many times from the smallest to the
+# largest scale, plus the p50 slack; exports stream every row and aren't flat
+FLAT_RATIO = 3.0
+FLAT_CASES = (
+    "index",
+    "categories",
+    "listing",
+    "listing filtered",
+    "listing cursor",
+    "search",
+    "auction",
+    "auction (user)",
+    "auction (archived)",
+    "index (user)",
+    "userprofile",
+    "bid history",
+    "my bids",
+    "inbox",
+    "inbox unread",
+    "api listing",
+    "api listing (user)",
+    "api auction",
+    "api bids",
+    "api comments",
+    "api rollups",
+    "admin index",
+    "admin auctions",
+    "admin bids",
+    "admin comments",
+    "admin auction",
+)
+
+# Comments and bids on the benchmarked auction, above the page's 10 comments
+PAGE_COMMENTS = 12
+PAGE_BIDS = 12
+# Notifications of every user, above the inbox's 20 per page
+PAGE_NOTIFICATIONS = 25
+# Rows of the benchmarked import
+IMPORT_ROWS = 20
+
+# URL names the suite doesn't request, with the reason
+EXCLUDED = {
+    "live": "endless event stream, measured by the bench_live command",
+}
+
+# method, url name, url args ("auction" is the benchmarked auction, "archived" an
+# archived one), request
+# data (called with the repetition number), client ("anonymous", "user",
+# "owner" or "admin") and the expected status code
+Case = namedtuple("Case", "name method url args data client status")
+
+
+def cases():
+    """Returns the benchmark cases, reads first."""
+    auction = ("auction",)
+    return [
+        # Pages
+        Case("index", "get", "index", (), None, "anonymous", 200),
+        Case("categories", "get", "categories", (), None, "anonymous", 200),
+        Case("listing", "get", "listing", (), None, "anonymous", 200),
+        Case(
+            "listing filtered", "get", "listing", (),
+            lambda i: {"status": "A", "category": "11", "page": 2}, "anonymous", 200,
+        ),
+        Case("listing cursor", "get", "listing", (), lambda i: {"mode": "cursor", "order": "price"}, "anonymous", 200),
+        Case("search", "get", "search", (), lambda i: {"q": "lot"}, "anonymous", 200),
+        Case("auction", "get", "auction", auction, None, "anonymous", 200),
+        Case("auction (user)", "get", "auction", auction, None, "user", 200),
+        Case("auction (archived)", "get", "auction", ("archived",), None, "anonymous", 200),
+        Case("index (user)", "get", "index", (), None, "user", 200),
+        Case("userprofile", "get", "userprofile", (), None, "user", 200),
+        Case("add auction", "get", "add_auction", (), None, "user", 200),
+        Case("edit auction", "get", "edit_auction", auction, None, "owner", 200),
+        Case("bid history", "get", "bid_history", auction, None, "user", 200),
+        Case("my bids", "get", "my_bids", (), None, "user", 200),
+        Case("inbox", "get", "inbox", (), None, "user", 200),
+        Case("inbox unread", "get", "unread_notifications", (), None, "user", 200),
+        # Accounts
+        Case("login", "get", "login", (), None, "anonymous", 200),
+        Case("register", "get", "register", (), None, "anonymous", 200),
+        Case("password change", "get", "password_change", (), None, "user", 200),
+        # JSON API
+        Case("api listing", "get", "api_listing", (), None, "anonymous", 200),
+        Case("api listing (user)", "get", "api_listing", (), lambda i: {"order": "price"}, "user", 200),
+        Case("api auction", "get", "api_auction", auction, None, "anonymous", 200),
+        Case("api bids", "get", "api_bids", auction, None, "user", 200),
+        Case("api comments", "get", "api_comments", auction, None, "user", 200),
+        Case("api rollups", "get", "api_rollups", auction, None, "anonymous", 200),
+        # Admin
+        Case("admin index", "get", "admin:index", (), None, "admin", 200),
+        Case("admin auctions", "get", "admin:auctions_auction_changelist", (), None, "admin", 200),
+        Case("admin bids", "get", "admin:auctions_bid_changelist", (), None, "admin", 200),
+        Case("admin comments", "get", "admin:auctions_comment_changelist", (), None, "admin", 200),
+        Case("admin auction", "get", "admin:auctions_auction_change", auction, None, "admin", 200),
+        # Writes
+        Case("bid", "post", "bid", auction, lambda i: {"price": 1_000_000 + i}, "user", 302),
+        Case("comment", "post", "comment", auction, lambda i: {"comment": f"benchmark {i}"}, "user", 302),
+        Case("watch list add", "post", "watch_list", auction + ("add",), None, "user", 302),
+        Case("watch list delete", "post", "watch_list", auction + ("delete",), None, "user", 302),
+        Case("import", "post", "import_auctions", (), lambda i: {"file": import_file(i)}, "user", 200),
+        Case("export auctions", "get", "export", ("auctions",), None, "owner", 200),
+        Case("export bids (admin)", "get", "export", ("bids",), lambda i: {"format": "jsonl"}, "admin", 200),
+        Case("logout", "post", "logout", (), None, "anonymous", 200),
+    ]
+
+
+# Dataset
+def import_file(i, rows=IMPORT_ROWS):
+    """A CSV upload of new auctions."""
+    lines = ["name,description,price,category,status"]
+    lines += [f"import {i}.{row},imported lot,{row + 1},{AuctionCategories.OTHER},A" for row in range(rows)]
+    return SimpleUploadedFile(f"import{i}.csv", "\n".join(lines).encode(), content_type="text/csv")
+
+
+def seed(scale, batch_size=10_000):
+    """
+    Creates scale auctions, bids and comments with bulk inserts, then the
+    counters and search index those bypass.
+
+    Returns:
+        dict: The benchmarked auction and its owner, an archived auction, a bidder and an admin.
+    """
+    users = max(10, scale // 100)
+    User.objects.bulk_create(User(username=f"bench{i}", first_name=f"bench{i}") for i in range(users))
+    user_ids = list(User.objects.filter(username__startswith="bench").values_list("id", flat=True))
+    UserProfile.objects.bulk_create(UserProfile(user_id=user_id) for user_id in user_ids)
+
+    categories, statuses = AuctionCategories.values, AuctionStatus.values
+    # Closed auctions ended (Auction.end_if_closed), which bulk_create doesn't do
+    ended = timezone.now() - timedelta(days=1)
+    for start in range(0, scale, batch_size):
+        Auction.objects.bulk_create(
+            Auction(
+                name=f"bench lot {i}",
+                description=f"synthetic lot {i} for benchmarks",
+                price=float(i % 997 + 1),
+                category=categories[i % len(categories)],
+                status=statuses[i % len(statuses)],
+                ends_at=ended if statuses[i % len(statuses)] == AuctionStatus.CLOSED else None,
+                owner_id=user_ids[i % users],
+            )
+            for i in range(start, min(scale, start + batch_size))
+        )
+    auction_ids = list(Auction.objects.order_by("id").values_list("id", flat=True))
+
+    # One bid and one comment per auction on average, from different users
+    for start in range(0, scale, batch_size):
+        chunk = auction_ids[start : start + batch_size]
+        Bid.objects.bulk_create(
+            Bid(auction_id=auction_id, bidder_id=user_ids[(n + 1) % users], price=float(n % 997 + 2))
+            for n, auction_id in enumerate(chunk, start)
+        )
+        Comment.objects.bulk_create(
+            Comment(auction_id=auction_id, commenter_id=user_ids[(n + 2) % users], text=f"comment {n}")
+            for n, auction_id in enumerate(chunk, start)
+        )
+
+    # The benchmarked auction is active and busy
+    auction = Auction.objects.filter(status=AuctionStatus.ACTIVE).order_by("id").first()
+    Bid.objects.bulk_create(
+        Bid(auction=auction, bidder_id=user_id, price=auction.price + n)
+        for n, user_id in enumerate(user_ids[3 : 3 + PAGE_BIDS])
+    )
+    Comment.objects.bulk_create(
+        Comment(auction=auction, commenter_id=user_id, text=f"busy {n}")
+        for n, user_id in enumerate(user_ids[:PAGE_COMMENTS])
+    )
+    top_bids = Bid.objects.filter(auction=OuterRef("pk")).order_by("-price").values("pk")[:1]
+    Auction.objects.update(top_bid=Subquery(top_bids))
+    auction.refresh_from_db()
+
+    # The bid ledger: every bid was accepted after a rejected lower attempt
+    bids = Bid.objects.order_by("id").values_list("auction_id", "bidder_id", "price").iterator(chunk_size=batch_size)
+    attempts = []
+    for auction_id, bidder_id, price in bids:
+        attempts.append(BidAttempt(auction_id=auction_id, bidder_id=bidder_id, price=price - 1, outcome=BidOutcome.REJECTED))
+        attempts.append(BidAttempt(auction_id=auction_id, bidder_id=bidder_id, price=price, outcome=BidOutcome.ACCEPTED))
+        if len(attempts) >= batch_size:
+            BidAttempt.objects.bulk_create(attempts)
+            attempts = []
+    BidAttempt.objects.bulk_create(attempts)
+    ledger.roll_up(settle=timedelta(0))
+
+    # Everyone watches the benchmarked auction, and was notified of its bids
+    WatchListEntry.objects.bulk_create(
+        WatchListEntry(userprofile_id=profile_id, auction=auction)
+        for profile_id in UserProfile.objects.values_list("id", flat=True)
+    )
+    for n in range(PAGE_NOTIFICATIONS):
+        notifications.fan_out(auction.pk, NotificationKind.BID, auction.price + n)
+
+    # One closed auction is moved to the archive
+    archive.archive_batch(timezone.now() + timedelta(days=1), batch_size=1)
+
+    stats.rebuild()
+    search.rebuild_index()
+    return {
+        "auction": auction,
+        "archived": ArchivedAuction.objects.get(),
+        "owner": auction.owner,
+        "user": User.objects.exclude(pk=auction.owner_id).get(username="bench1"),
+        "admin": User.objects.create_superuser("bench-admin", password="NotSafe1234"),
+    }
+
+
+# Measuring
+def clients(fixtures):
+    """Returns a client per Case.client role."""
+    roles = {"anonymous": Client()}
+    for role in ("user", "owner", "admin"):
+        roles[role] = Client()
+        roles[role].force_login(fixtures[role])
+    return roles
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def measure(case, client, fixtures, repeat):
+    """
+    Requests a case repeat times, after a warm-up request.
+
+    Returns:
+        dict: "status", "queries", "p50_ms", "p99_ms" and "peak_kib".
+    """
+    args = [fixtures[arg].pk if arg in ("auction", "archived") else arg for arg in case.args]
+    url = reverse(case.url, args=args)
+    request = getattr(client, case.method)
+    calls = iter(range(repeat + 3))
+
+    def call():
+        i = next(calls)
+        response = request(url, case.data(i) if case.data else None)
+        # Streamed responses do their work while they're read
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return response
+
+    # Logging out logs the client out, so it runs on a fresh login every time
+    def prepare():
+        if case.name == "logout":
+            client.force_login(fixtures["user"])
+
+    prepare()
+    call()
+
+    prepare()
+    # A full query log (DEBUG) would hide the request's queries
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        response = call()
+    # Read now, later requests reset the connection's query log
+    query_count = len(queries.captured_queries)
+
+    prepare()
+    tracemalloc.start()
+    call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # Like timeit, collection pauses are kept out of the timings
+    timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            prepare()
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        gc.enable()
+
+    return {
+        "status": response.status_code,
+        "queries": query_count,
+        "p50_ms": round(statistics.median(timings), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run(fixtures, repeat=20, selected=None):
+    """Measures every case (or the selected names); returns {name: figures}."""
+    roles = clients(fixtures)
+    results = {}
+    for case in cases():
+        if selected and case.name not in selected:
+            continue
+        results[case.name] = measure(case, roles[case.client], fixtures, repeat)
+    return results
+
+
+# Baseline
+def load_baseline(path=BASELINE_PATH):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(baseline, path=BASELINE_PATH):
+    with open(path, "w") as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    Returns the regressions of results against a scale's baseline, as messages.
+
+    Query counts regress on any increase; p50 latency and memory when they
+    exceed the baseline by more than tolerance (a fraction) and the metric's
+    slack. p99 isn't compared.
+    """
+    regressions = []
+    for name, figures in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if figures["queries"] > base["queries"]:
+            regressions.append(f"{name}: {figures['queries']} queries, baseline {base['queries']}")
+        for metric, slack in SLACKS.items():
+            if figures[metric] > base[metric] * (1 + tolerance) + slack:
+                regressions.append(f"{name}: {metric} {figures[metric]}, baseline {base[metric]}")
+    return regressions
+
+
+def compare_scales(baseline, ratio=FLAT_RATIO):
+    """
+    Returns the flat cases whose p50 at the largest scale exceeds ratio times
+    their p50 at the smallest one, plus the p50 slack, as messages.
+
+    Args:
+        baseline (dict): Figures by scale, then case, e.g. a stored baseline.
+    """
+    small, large = baseline.get(str(SCALES[0]), {}), baseline.get(str(SCALES[-1]), {})
+    regressions = []
+    for name in FLAT_CASES:
+        if name not in small or name not in large:
+            continue
+        if large[name]["p50_ms"] > small[name]["p50_ms"] * ratio + SLACKS["p50_ms"]:
+            regressions.append(
+                f"{name}: p50_ms {large[name]['p50_ms']} at scale {SCALES[-1]}, "
+                f"{small[name]['p50_ms']} at scale {SCALES[0]}"
+            )
+    return regressions
@@ -0,0 +1,341 @@
+"""
+In-process bid book for hot auctions.
+
+Auctions marked ``hot`` keep their current top price and every bidder's latest
+bid in memory, so a bid is validated without touching the database. Accepted
+bids are appended to a durable log before they are acknowledged, and a
+background thread flushes them to the Bid and Auction tables in batches.
+
+The book lives inside one process: hot auctions must be served by a single
+worker process, otherwise two books could accept conflicting bids.
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+# Models
+from auctions.models import Auction, AuctionStatus, Bid, NotificationKind
+
+# Statistics
+from auctions import stats
+
+# Caching
+from auctions import caching
+
+# Soft Close, From A Module That Imports This One
+from auctions import closing
+
+# Bid Ledger
+from auctions import ledger
+
+# Watch List Notifications
+from auctions import notifications
+
+# Prices In Integer Cents
+from auctions.money import amount
+
+logger = logging.getLogger(__name__)
+
+
+class AuctionBook:
+    """Top price and per-bidder latest bid of a single hot auction."""
+
+    __slots__ = ("auction_id", "price", "top_bidder_id", "ends_at", "bids", "lock")
+
+    def __init__(self, auction_id, price, top_bidder_id=None, ends_at=None):
+        self.auction_id = auction_id
+        self.price = price
+        self.top_bidder_id = top_bidder_id
+        self.ends_at = ends_at
+        # bidder_id -> latest price
+        self.bids = {}
+        self.lock = threading.Lock()
+
+
+class BidBook:
+    """
+    Validates bids of hot auctions in memory with write-behind persistence.
+
+    Every accepted bid gets a sequence number and is written to the log as
+    ``<seq> <auction_id> <bidder_id> <price>``. After a batch reaches the
+    database, ``<seq>`` is stored in the checkpoint file; on start up the log
+    entries after the checkpoint are replayed, so a crash loses no accepted bid.
+    """
+
+    def __init__(self, log_path, flush_interval=0.5, batch_size=1000, fsync=True):
+        self.log_path = Path(log_path)
+        self.checkpoint_path = self.log_path.with_name(self.log_path.name + ".checkpoint")
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.fsync = fsync
+
+        self.books = None
+        self.books_lock = threading.Lock()
+        self.log_lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.pending = []
+        # Rejected (auction_id, bidder_id, price) attempts for the ledger, not logged
+        self.rejected = []
+        self.seq = 0
+        self.log = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    # Start Up
+    def load(self):
+        """Loads books for active hot auctions and replays the unflushed log."""
+        with self.books_lock:
+            if self.books is not None:
+                return
+            books = {}
+            hot_auctions = Auction.objects.filter(
+                hot=True, status=AuctionStatus.ACTIVE
+            ).values_list("id", "price", "top_bid__bidder_id", "ends_at")
+            for auction_id, price, top_bidder_id, ends_at in hot_auctions:
+                books[auction_id] = AuctionBook(auction_id, price, top_bidder_id, ends_at)
+            bids = Bid.objects.filter(auction_id__in=books).values_list(
+                "auction_id", "bidder_id", "price"
+            )
+            for auction_id, bidder_id, price in bids:
+                books[auction_id].bids[bidder_id] = price
+            self.books = books
+            self._replay()
+
+    def _replay(self):
+        """Re-queues logged bids that did not reach the database."""
+        checkpoint = 0
+        if self.checkpoint_path.exists():
+            checkpoint = int(self.checkpoint_path.read_text() or 0)
+        self.seq = checkpoint
+
+        if self.log_path.exists():
+            with open(self.log_path) as log:
+                for line in log:
+                    try:
+                        seq, auction_id, bidder_id, price = line.split()
+                        seq, auction_id, bidder_id, price = (
+                            int(seq), int(auction_id), int(bidder_id), amount(price)
+                        )
+                    except ValueError:
+                        # A torn last line was never acknowledged
+                        logger.warning(f"Skipped broken bid book log line: {line!r}")
+                        continue
+                    self.seq = max(self.seq, seq)
+                    if seq <= checkpoint:
+                        continue
+                    book = self.books.get(auction_id)
+                    if book is not None:
+                        book.bids[bidder_id] = price
+                        if price > book.price:
+                            book.price = price
+                            book.top_bidder_id = bidder_id
+                    self.pending.append((seq, auction_id, bidder_id, price))
+
+        self.log = open(self.log_path, "a")
+
+    def start(self):
+        """Loads the books and starts the background flusher."""
+        self.load()
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="bidbook-flusher", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stops the flusher after a final flush."""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.flush()
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+    def _run(self):
+        while not self.stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                # Pending bids stay queued and are retried on the next round
+                logger.exception("Bid book flush failed")
+
+    # Hot Path
+    def book(self, auction_id):
+        """Returns the book of a hot auction or None."""
+        if self.books is None:
+            self.load()
+        return self.books.get(auction_id)
+
+    def place(self, book, bidder_id, price):
+        """
+        Validates a bid against the book and logs it if accepted.
+
+        Returns:
+            bool: True if the bid was accepted, False otherwise.
+        """
+        with book.lock:
+            # Ended auctions keep their top bid for auctions.closing
+            now = timezone.now()
+            if price <= book.price or (book.ends_at is not None and now >= book.ends_at):
+                with self.log_lock:
+                    self.rejected.append((book.auction_id, bidder_id, price))
+                return False
+
+            with self.log_lock:
+                self.seq += 1
+                entry = (self.seq, book.auction_id, bidder_id, price)
+                self.log.write(f"{entry[0]} {entry[1]} {entry[2]} {entry[3]}\n")
+                self.log.flush()
+                if self.fsync:
+                    os.fsync(self.log.fileno())
+                self.pending.append(entry)
+
+            book.price = price
+            book.top_bidder_id = bidder_id
+            book.bids[bidder_id] = price
+            book.ends_at = closing.soft_close(now, book.ends_at)
+        return True
+
+    def add(self, auction):
+        """Starts serving an auction from the book."""
+        if self.books is None:
+            self.load()
+        with self.books_lock:
+            if auction.id in self.books:
+                # The owner may have moved the end time
+                self.books[auction.id].ends_at = auction.ends_at
+            else:
+                book = AuctionBook(auction.id, auction.price, ends_at=auction.ends_at)
+                bids = Bid.objects.filter(auction=auction).values_list("bidder_id", "price")
+                for bidder_id, price in bids:
+                    book.bids[bidder_id] = price
+                    if price >= book.price:
+                        book.top_bidder_id = bidder_id
+                self.books[auction.id] = book
+
+    def discard(self, auction_id):
+        """Stops serving an auction from the book after flushing its bids."""
+        if self.books is None or auction_id not in self.books:
+            return
+        self.flush()
+        with self.books_lock:
+            self.books.pop(auction_id, None)
+
+    # Write Behind
+    def flush(self):
+        """
+        Writes queued bids to the database in batches.
+
+        Only the latest bid of each bidder is written, with one bulk upsert
+        for Bid rows and one bulk update for the affected auctions per batch;
+        the ledger gets every bid of the batch with one bulk insert. Watchers
+        are notified of each auction's top bid of the batch.
+        """
+        with self.flush_lock:
+            with self.log_lock:
+                entries, self.pending = self.pending, []
+                rejected, self.rejected = self.rejected, []
+            if rejected:
+                try:
+                    ledger.record_many(rejected, accepted=False)
+                except Exception:
+                    # Rejected attempts change nothing, they aren't retried
+                    logger.exception("Bid book couldn't record %d rejected bids", len(rejected))
+            if not entries:
+                return 0
+
+            try:
+                for start in range(0, len(entries), self.batch_size):
+                    self._write(entries[start:start + self.batch_size])
+            except Exception:
+                with self.log_lock:
+                    self.pending = entries + self.pending
+                raise
+
+            self._checkpoint(entries[-1][0])
+            return len(entries)
+
+    def _write(self, entries):
+        latest_bids = {}
+        top_bids = {}
+        for seq, auction_id, bidder_id, price in entries:
+            latest_bids[auction_id, bidder_id] = price
+            # Accepted bids only ever raise the price, so the last one is the top
+            top_bids[auction_id] = (bidder_id, price)
+
+        with transaction.atomic():
+            bids = Bid.objects.bulk_create(
+                [
+                    Bid(auction_id=auction_id, bidder_id=bidder_id, price=price)
+                    for (auction_id, bidder_id), price in latest_bids.items()
+                ],
+                update_conflicts=True,
+                unique_fields=("auction", "bidder"),
+                update_fields=("price",),
+            )
+            bid_ids = {(bid.auction_id, bid.bidder_id): bid.pk for bid in bids}
+
+            auctions = [
+                Auction(id=auction_id, price=price, top_bid_id=bid_ids[auction_id, bidder_id])
+                for auction_id, (bidder_id, price) in top_bids.items()
+            ]
+            Auction.objects.bulk_update(auctions, ("price", "top_bid"))
+
+            # End times the soft close moved (auctions.closing.soft_close)
+            books = self.books or {}
+            ends = [
+                Auction(id=auction_id, ends_at=books[auction_id].ends_at)
+                for auction_id in top_bids
+                if auction_id in books and books[auction_id].ends_at is not None
+            ]
+            if ends:
+                Auction.objects.bulk_update(ends, ("ends_at",))
+
+            # Every accepted bid, not only the latest of each bidder
+            ledger.record_many(
+                ((auction_id, bidder_id, price) for seq, auction_id, bidder_id, price in entries), accepted=True
+            )
+
+        for auction_id, (bidder_id, price) in top_bids.items():
+            stats.refresh_prices(auction_id)
+            caching.bump_bid(auction_id)
+            notifications.schedule(auction_id, NotificationKind.BID, price, exclude=bidder_id)
+
+    def _checkpoint(self, seq):
+        """Stores the last flushed sequence and truncates a fully flushed log."""
+        temp_path = self.checkpoint_path.with_name(self.checkpoint_path.name + ".tmp")
+        temp_path.write_text(str(seq))
+        os.replace(temp_path, self.checkpoint_path)
+
+        with self.log_lock:
+            if not self.pending and self.log is not None and self.seq == seq:
+                self.log.truncate(0)
+
+
+# Process Wide Bid Book
+_bid_book = None
+_bid_book_lock = threading.Lock()
+
+
+def get_bid_book():
+    """Returns the process wide bid book, or None if it is disabled."""
+    global _bid_book
+    if not getattr(settings, "BID_BOOK_ENABLED", False):
+        return None
+    if _bid_book is None:
+        with _bid_book_lock:
+            if _bid_book is None:
+                _bid_book = BidBook(
+                    settings.BID_BOOK_LOG,
+                    flush_interval=settings.BID_BOOK_FLUSH_INTERVAL,
+                    batch_size=settings.BID_BOOK_BATCH_SIZE,
+                    fsync=settings.BID_BOOK_FSYNC,
+                )
+                _bid_book.start()
+    return _bid_book
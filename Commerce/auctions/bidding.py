@@ -0,0 +1,115 @@
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+
+# Models
+from auctions.models import Auction, AuctionStatus, Bid, NotificationKind
+
+# Hot Auctions
+from auctions.bidbook import get_bid_book
+
+# Live Updates
+from auctions.live import hub
+
+# Statistics
+from auctions import stats
+
+# Caching
+from auctions import caching
+
+# Soft Close
+from auctions.closing import soft_close
+
+# Bid Ledger
+from auctions import ledger
+
+# Watch List Notifications
+from auctions import notifications
+
+# Prices In Integer Cents
+from auctions.money import amount
+
+
+# Atomic Bid Engine
+def place_bid(auction_id, bidder, price):
+    """
+    Accepts or rejects a bid on an auction atomically.
+
+    An accepted bid costs four statements, the first three inside one
+    transaction:
+        1. An upsert of the bidder's Bid row (one row per auction and bidder).
+        2. A conditional UPDATE of the auction that only matches while the
+           auction is active, hasn't ended (ends_at) and its price is lower
+           than the new price. The same UPDATE applies the soft close rule
+           (see auctions.closing.soft_close), so last second bids cost no extra round trip.
+        3. The attempt's INSERT into the append-only ledger (auctions.ledger).
+        4. After the commit, an UPDATE of the price bounds of the auction's
+           statistics bucket (auctions.stats.refresh_prices).
+    A rejected bid costs three: the upsert and the UPDATE, rolled back, then
+    the ledger INSERT. The auction's watchers are notified of accepted bids
+    in the background (auctions.notifications).
+
+    The database decides the winner of concurrent bids through the UPDATE's
+    WHERE clause, so a lower bid can never overwrite a higher one. If the
+    UPDATE matches no row the transaction is rolled back and the bidder's
+    previous Bid is kept untouched. Prices are integer cents in the database
+    (auctions.money), so the comparison is exact: a bid a fraction of a cent
+    above the price is rounded to the cent before it's compared, never
+    accepted as a tie.
+
+    Bids on hot auctions are validated by the in-process bid book instead and
+    written to the database in batches (see auctions.bidbook).
+
+    Args:
+        auction_id (int): ID of the auction to bid on.
+        bidder (User): The user placing the bid.
+        price (Decimal, str or float): The offered price, rounded to the cent.
+
+    Returns:
+        bool: True if the bid was accepted, False otherwise.
+    """
+    price = amount(price)
+
+    # Hot Auctions Are Served From Memory
+    bid_book = get_bid_book()
+    if bid_book is not None:
+        book = bid_book.book(auction_id)
+        if book is not None:
+            accepted = bid_book.place(book, bidder.pk, price)
+            if accepted:
+                hub.publish(auction_id, "price", {"price": price})
+            return accepted
+
+    with transaction.atomic():
+        # 1. Upsert Bidder's Bid
+        Bid.objects.bulk_create(
+            [Bid(auction_id=auction_id, bidder=bidder, price=price)],
+            update_conflicts=True,
+            unique_fields=("auction", "bidder"),
+            update_fields=("price",),
+        )
+
+        # 2. Raises Price and Top Bid Only If The Bid Is Higher
+        bidder_bid = Bid.objects.filter(
+            auction=OuterRef("pk"), bidder=bidder
+        ).values("pk")[:1]
+        now = timezone.now()
+        accepted = Auction.objects.filter(
+            Q(ends_at__isnull=True) | Q(ends_at__gt=now),
+            pk=auction_id, status=AuctionStatus.ACTIVE, price__lt=price,
+        ).update(price=price, top_bid=Subquery(bidder_bid), ends_at=soft_close(now))
+
+        # Records The Accepted Bid With It, Or Discards The Upsert
+        if accepted:
+            ledger.record(auction_id, bidder.pk, price, accepted=True)
+        else:
+            transaction.set_rollback(True)
+
+    if not accepted:
+        ledger.record(auction_id, bidder.pk, price, accepted=False)
+    else:
+        stats.refresh_prices(auction_id)
+        caching.bump_bid(auction_id)
+        hub.publish(auction_id, "price", {"price": price})
+        notifications.schedule(auction_id, NotificationKind.BID, price, exclude=bidder.pk)
+    return bool(accepted)
@@ -0,0 +1,90 @@
+"""
+Reference counts of stored auction pictures and avatars.
+
+Every stored name (auctions.storage) has a MediaBlob row counting the
+auction pictures and avatars referring to it. Signals retain a name when a
+picture or avatar is set and release the previous one, in the same
+transaction; the default images aren't counted.
+
+A name released to zero references is an orphan. collect() deletes orphans
+and their variants through a partial index of them, so its cost is the
+number of images that changed since the last run, not the size of the media
+directories. Orphans are kept for a grace period first, which an upload of
+the same content renews before reusing the file (auctions.storage). Each
+orphan's row and files are deleted in one transaction, so such an upload
+either renews the grace period first or finds the file gone and writes it
+again.
+
+Writes through QuerySet.update() or bulk_create() bypass the counts; call
+retain() and release() for them.
+"""
+
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Now
+from django.utils import timezone
+
+from auctions import images
+from auctions.storage import blob_storage
+
+# Models
+from auctions.models import Auction, MediaBlob, UserProfile
+
+COLLECT_GRACE = timedelta(hours=1)
+
+
+def counted(name):
+    """Whether a stored name is reference counted (set, and not a default image)."""
+    return bool(name) and name not in (Auction.picture.field.default, UserProfile.avatar.field.default)
+
+
+def retain(name, count=1):
+    """Adds count references to a stored name."""
+    if not counted(name):
+        return
+    blob = MediaBlob.objects.filter(name=name)
+    if not blob.update(references=F("references") + count):
+        # First reference of the name
+        MediaBlob.objects.bulk_create([MediaBlob(name=name)], ignore_conflicts=True)
+        blob.update(references=F("references") + count)
+
+
+def release(name, count=1):
+    """Removes count references from a stored name, orphaning it at zero."""
+    if counted(name):
+        MediaBlob.objects.filter(name=name).update(
+            references=Greatest(F("references") - count, 0), released=Now()
+        )
+
+
+def orphans(grace=COLLECT_GRACE):
+    """Names without references for longer than grace."""
+    return MediaBlob.objects.filter(references=0, released__lt=timezone.now() - grace)
+
+
+def collect(grace=COLLECT_GRACE, dry_run=False):
+    """
+    Deletes the files and variants of orphans older than grace.
+
+    Returns:
+        list: Names of the collected files.
+    """
+    collected = []
+    cutoff = timezone.now() - grace
+    for pk, name in orphans(grace).values_list("pk", "name"):
+        if dry_run:
+            collected.append(name)
+            continue
+        with transaction.atomic():
+            # Conditional delete, a name referenced or reused meanwhile is kept
+            if not MediaBlob.objects.filter(pk=pk, references=0, released__lt=cutoff).delete()[0]:
+                continue
+            blob_storage().delete(name)
+            for variant in images.VARIANTS:
+                default_storage.delete(images.variant_name(name, variant))
+        images.forget(name)
+        collected.append(name)
+    return collected
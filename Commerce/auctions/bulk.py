@@ -0,0 +1,250 @@
+"""
+Bulk auction import and streaming export.
+
+Imports read CSV (with a header row) or JSON Lines one row at a time,
+validate every row with AuctionImportForm (AuctionForm's rules) and insert
+the valid ones with bulk_create, IMPORT_BATCH_SIZE at a time. An invalid row
+is reported by line number and skipped, the rest of its batch is imported.
+bulk_create skips signals, so each batch updates the statistics, the search
+index and the page caches itself.
+
+Exports stream auctions, bids or comments as CSV or JSON Lines from a
+chunked iterator, at constant memory whatever the number of rows; exported
+auctions can be imported again.
+"""
+
+import csv
+import io
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+# Models
+from auctions.models import Auction, AuctionCategories, AuctionStatus, Bid, Comment
+
+# Forms
+from auctions.forms import AuctionImportForm
+
+# Statistics, Search And Caching
+from auctions import caching, search, stats
+
+# Prices As JSON Numbers
+from auctions.money import MoneyJSONEncoder
+
+FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+# Columns an import takes, and their values when missing
+IMPORT_FIELDS = AuctionImportForm._meta.fields
+IMPORT_DEFAULTS = {"category": AuctionCategories.OTHER, "status": AuctionStatus.ACTIVE}
+
+
+def owned_auctions(owner):
+    """Filters bids or comments on the owner's auctions."""
+    # A subquery rather than a join, so the rows come in index order, unsorted
+    return {"auction_id__in": Auction.objects.filter(owner=owner).values("id")}
+
+
+# Export columns (header, lookup), the filter of a user's export (called with
+# the owner), and the ordering, which follows the index the export walks
+EXPORTS = {
+    "auctions": (
+        Auction,
+        (
+            ("id", "id"), ("date", "date"), ("owner", "owner__username"), ("name", "name"),
+            ("description", "description"), ("price", "price"), ("category", "category"),
+            ("status", "status"), ("ends_at", "ends_at"),
+        ),
+        lambda owner: {"owner": owner},
+        ("id",),
+    ),
+    "bids": (
+        Bid,
+        (("id", "id"), ("date", "date"), ("auction", "auction_id"), ("bidder", "bidder__username"), ("price", "price")),
+        owned_auctions,
+        ("auction_id", "id"),
+    ),
+    "comments": (
+        Comment,
+        (("id", "id"), ("date", "date"), ("auction", "auction_id"), ("commenter", "commenter__username"), ("text", "text")),
+        owned_auctions,
+        ("auction_id", "id"),
+    ),
+}
+# Rows fetched per round trip, and written per streamed chunk
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_ROWS_PER_WRITE = 500
+
+
+def format_of(name, content_type=""):
+    """Import format of a file, from its extension or content type; CSV by default."""
+    if name.lower().endswith((".jsonl", ".ndjson")) or "ndjson" in content_type or "jsonl" in content_type:
+        return "jsonl"
+    return "csv"
+
+
+# Import
+class BinaryStream(io.RawIOBase):
+    """Raw file over anything with read(size), e.g. an HttpRequest body."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.stream.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def text_lines(stream):
+    """Decodes a binary stream (UTF-8, with or without a BOM) as it's read."""
+    return io.TextIOWrapper(io.BufferedReader(BinaryStream(stream)), encoding="utf-8-sig", newline="")
+
+
+def read_rows(lines, format):
+    """
+    Parses CSV or JSON Lines one row at a time.
+
+    Args:
+        lines (iterable): Text lines, e.g. a file opened with newline="".
+        format (str): "csv" or "jsonl".
+
+    Yields:
+        tuple: (line number, row dict or None, parse error or None).
+    """
+    if format == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield line_number, None, f"Invalid JSON: {error}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "A JSON object is expected"
+            continue
+        yield line_number, row, None
+
+
+class ImportReport:
+    """Auctions created by an import, and the rejected rows with their errors."""
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def reject(self, line, errors):
+        self.errors.append({"line": line, "errors": errors})
+
+    def as_dict(self):
+        return {"created": self.created, "rejected": len(self.errors), "errors": self.errors}
+
+
+def import_auctions(rows, owner, batch_size=None, dry_run=False):
+    """
+    Validates and inserts parsed rows (see read_rows) as the owner's auctions.
+
+    Args:
+        rows (iterable): (line number, row, parse error) tuples.
+        owner (User): Owner of the imported auctions.
+        batch_size (int): Auctions per bulk_create, IMPORT_BATCH_SIZE by default.
+        dry_run (bool): Validates without inserting.
+
+    Returns:
+        ImportReport: Created auctions count and per-row errors.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    report = ImportReport()
+    batch = []
+    for line, row, error in rows:
+        if error:
+            report.reject(line, {"__all__": [error]})
+            continue
+
+        data = {field: row.get(field) for field in IMPORT_FIELDS if row.get(field) not in (None, "")}
+        form = AuctionImportForm({**IMPORT_DEFAULTS, **data})
+        if not form.is_valid():
+            report.reject(line, {field: list(messages) for field, messages in form.errors.items()})
+            continue
+
+        auction = form.save(commit=False)
+        auction.owner = owner
+        # bulk_create skips Auction.save()
+        auction.end_if_closed()
+        batch.append(auction)
+        if len(batch) >= batch_size:
+            report.created += len(batch) if dry_run else insert_batch(batch)
+            batch = []
+
+    if batch:
+        report.created += len(batch) if dry_run else insert_batch(batch)
+    return report
+
+
+def insert_batch(auctions):
+    """Inserts auctions with one bulk_create and does what their signals would."""
+    with transaction.atomic():
+        created = Auction.objects.bulk_create(auctions)
+        for (category, status), count in Counter((a.category, a.status) for a in created).items():
+            stats.adjust(category, status, count)
+        search.index_auctions(created)
+    caching.bump("listings")
+    return len(created)
+
+
+# Export
+class Echo:
+    """File-like object handing back what's written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(kind, format, owner=None):
+    """
+    Streams auctions, bids or comments as CSV or JSON Lines.
+
+    Args:
+        kind (str): A key of EXPORTS.
+        format (str): "csv" or "jsonl".
+        owner (User): Limits the export to the owner's auctions, and the bids
+            and comments on them; None exports everything.
+
+    Yields:
+        str: Chunks of EXPORT_ROWS_PER_WRITE rows.
+    """
+    model, columns, owner_lookup, ordering = EXPORTS[kind]
+    headers = [header for header, lookup in columns]
+    queryset = model.objects.order_by(*ordering)
+    if owner is not None:
+        queryset = queryset.filter(**owner_lookup(owner))
+    rows = queryset.values_list(*(lookup for header, lookup in columns)).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    if format == "csv":
+        writer = csv.writer(Echo())
+        encode = writer.writerow
+        yield encode(headers)
+    else:
+        encoder = MoneyJSONEncoder()
+
+        def encode(row):
+            return encoder.encode(dict(zip(headers, row))) + "\n"
+
+    chunk = []
+    for row in rows:
+        chunk.append(encode(row))
+        if len(chunk) >= EXPORT_ROWS_PER_WRITE:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
@@ -0,0 +1,297 @@
+"""
+Page and fragment caching for anonymous traffic.
+
+Pages are cached under keys built from version counters of the data they
+show, so a write only bumps a counter instead of hunting down cache keys:
+    - "listings": every auction list and count (index, categories, listing),
+      bumped when auctions are created, changed, closed or archived.
+    - "prices": lists filtered or ordered by price, bumped by every bid.
+    - "auction:<id>": an auction page (the auction, its bids and comments) and
+      every list showing the auction.
+
+A bid only bumps "prices" and its auction's scope. Lists record the auctions
+they show (shows), are stored with the versions of those auctions' scopes and
+are only served while these are unchanged, so a bid re-renders the lists
+showing its auction rather than every list.
+
+Auction cards are cached as fragments keyed by the fields they render,
+including the price, so listing pages are assembled from cached cards.
+
+The same versions make ETags (etag), so conditional requests for unchanged
+data are answered with 304 from the cache alone.
+
+Every lookup sends the cache_lookup signal; CacheStatistics collects hit-rate
+and the render time saved by hits from it.
+"""
+
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import Signal
+from django.http import HttpResponse
+from django.utils.http import quote_etag
+
+from auctions import replicas
+from auctions.models import Auction
+
+# Instrumentation Hook: sent with layer ("page" or "fragment"), key, hit and
+# seconds (render time of the entry, saved on hits and spent on misses)
+cache_lookup = Signal()
+
+VERSION_KEY = "auctions:version:{}"
+PAGE_KEY = "auctions:page:{}:{}:{}"
+SHOWN_KEY = "auctions:shown:{}"
+FRAGMENT_KEY = "auctions:fragment:{}:{}"
+
+
+# Version Counters
+def versions(*scopes):
+    """Returns the current version of each scope."""
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Time based start, so an evicted counter never repeats an old version
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump(*scopes):
+    """Invalidates every page built from the given scopes."""
+    for scope in scopes:
+        key = VERSION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def bump_auction(auction_id):
+    """Invalidates an auction's page and every listing, e.g. after it's created or closed."""
+    bump("listings", f"auction:{auction_id}")
+
+
+def bump_bid(auction_id):
+    """Invalidates an auction's page and the lists showing it or depending on prices, after a bid."""
+    bump("prices", f"auction:{auction_id}")
+
+
+# Auctions Shown By Lists
+def shows(request, auction):
+    """Records that the response to request shows an auction, at its current price."""
+    shown = getattr(request, "shown_auctions", None)
+    if shown is not None:
+        shown[auction.id] = auction.price
+
+
+def _record_shown(request):
+    """Reads the versions of the shown auctions' scopes, once the view rendered."""
+    scopes = [f"auction:{auction_id}" for auction_id in sorted(request.shown_auctions)]
+    request.shown_versions = dict(zip(scopes, versions(*scopes)))
+    # For the ETags of the next responses (etag)
+    cache.set(SHOWN_KEY.format(_request_key(request)), scopes, settings.PAGE_CACHE_TIMEOUT)
+
+
+def _unchanged(request):
+    """
+    Whether the shown auctions still have the prices they were rendered at.
+
+    Checked after their versions were read: a bid placed in between changes
+    the price, so a response is never tied to versions newer than its content.
+    """
+    if not hasattr(request, "shown_unchanged"):
+        shown = request.shown_auctions
+        request.shown_unchanged = not shown or shown == dict(
+            Auction.objects.filter(pk__in=shown).order_by().values_list("pk", "price")
+        )
+    return request.shown_unchanged
+
+
+# Page Cache
+def _request_key(request):
+    """Path with a normalized query string, so parameter order doesn't matter."""
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    return hashlib.md5(f"{request.path}?{query}".encode()).hexdigest()
+
+
+def _etag(request, scope_versions, shown_versions=None):
+    tag = ".".join(map(str, scope_versions))
+    if shown_versions is not None:
+        tag += "." + hashlib.md5(".".join(map(str, shown_versions)).encode()).hexdigest()
+    return f"{tag}-{_request_key(request)}"
+
+
+def etag(scopes, per_auction=False):
+    """
+    Returns an etag_func for django.views.decorators.http.condition.
+
+    The ETag changes with the versions of the scopes and the request's path
+    and query, and is computed without a database query.
+
+    Args:
+        scopes (callable): Called with the view's arguments, returns the
+            version scopes the response depends on.
+        per_auction (bool): Also covers the auctions the last response to the
+            same request showed, the view being decorated with
+            cache_anonymous_page(per_auction=True), which replaces the ETag
+            of a response showing other auctions.
+    """
+
+    def etag_func(request, *args, **kwargs):
+        response_versions = versions(*scopes(request, *args, **kwargs))
+        if not per_auction:
+            return _etag(request, response_versions)
+        request.etag_versions = response_versions
+        request.etag_shown = cache.get(SHOWN_KEY.format(_request_key(request)), [])
+        return _etag(request, response_versions, versions(*request.etag_shown))
+
+    return etag_func
+
+
+def cache_anonymous_page(scopes, per_auction=False):
+    """
+    Caches a view's response for anonymous GET requests.
+
+    Args:
+        scopes (callable): Called with the view's arguments, returns the
+            version scopes the page depends on.
+        per_auction (bool): The page also depends on the "auction:<id>"
+            scopes of the auctions the view shows (shows), and is only
+            served while they're unchanged.
+    """
+
+    def decorator(view):
+        def render(request, *args, **kwargs):
+            if not per_auction:
+                return view(request, *args, **kwargs)
+            request.shown_auctions = {}
+            response = view(request, *args, **kwargs)
+            _record_shown(request)
+            # The ETag computed before the view (etag) covers other auctions
+            etag_shown = getattr(request, "etag_shown", None)
+            if etag_shown is not None and etag_shown != list(request.shown_versions) and _unchanged(request):
+                response["ETag"] = quote_etag(
+                    _etag(request, request.etag_versions, request.shown_versions.values())
+                )
+            return response
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                not settings.PAGE_CACHE_ENABLED
+                or request.method != "GET"
+                or request.user.is_authenticated
+                # Pending flash messages belong to a single visitor
+                or "messages" in request.COOKIES
+            ):
+                return render(request, *args, **kwargs)
+
+            page_versions = versions(*scopes(request, *args, **kwargs))
+            key = PAGE_KEY.format(
+                view.__name__, ".".join(map(str, page_versions)), _request_key(request)
+            )
+            entry = cache.get(key)
+            if entry is not None:
+                content, content_type, seconds, shown = entry
+                if not shown or versions(*shown) == list(shown.values()):
+                    cache_lookup.send(sender=cache_anonymous_page, layer="page", key=key, hit=True, seconds=seconds)
+                    return HttpResponse(content, content_type=content_type)
+
+            started = time.perf_counter()
+            response = render(request, *args, **kwargs)
+            seconds = time.perf_counter() - started
+            cache_lookup.send(sender=cache_anonymous_page, layer="page", key=key, hit=False, seconds=seconds)
+
+            # Only plain, visitor independent responses are shared
+            if (
+                response.status_code == 200
+                and not response.streaming
+                and not response.cookies
+                and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+                and (not per_auction or _unchanged(request))
+            ):
+                # A replica may be behind the versions, so its pages expire with the lag window
+                timeout = settings.PAGE_CACHE_TIMEOUT
+                if replicas.served():
+                    timeout = min(timeout, settings.REPLICA_STICKY_SECONDS)
+                shown = request.shown_versions if per_auction else {}
+                cache.set(key, (response.content, response["Content-Type"], seconds, shown), timeout)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+# Fragment Cache
+def cached_fragment(name, parts, render):
+    """
+    Returns a rendered fragment, cached under its name and parts.
+
+    Args:
+        name (str): Fragment name.
+        parts (iterable): Every value the fragment renders, they version the key.
+        render (callable): Renders the fragment on a miss.
+    """
+    digest = hashlib.md5(":".join(map(str, parts)).encode()).hexdigest()
+    key = FRAGMENT_KEY.format(name, digest)
+    entry = cache.get(key)
+    if entry is not None:
+        content, seconds = entry
+        cache_lookup.send(sender=cached_fragment, layer="fragment", key=key, hit=True, seconds=seconds)
+        return content
+
+    started = time.perf_counter()
+    content = render()
+    seconds = time.perf_counter() - started
+    cache_lookup.send(sender=cached_fragment, layer="fragment", key=key, hit=False, seconds=seconds)
+    cache.set(key, (content, seconds), settings.FRAGMENT_CACHE_TIMEOUT)
+    return content
+
+
+# Instrumentation
+class CacheStatistics:
+    """Collects hits, misses and saved render time per layer from cache_lookup."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.hits = defaultdict(int)
+            self.misses = defaultdict(int)
+            self.saved = defaultdict(float)
+
+    def __call__(self, sender, layer, key, hit, seconds, **kwargs):
+        with self.lock:
+            if hit:
+                self.hits[layer] += 1
+                self.saved[layer] += seconds
+            else:
+                self.misses[layer] += 1
+
+    def report(self):
+        """Returns {layer: {"hits", "misses", "hit_rate", "saved_seconds"}}."""
+        with self.lock:
+            layers = set(self.hits) | set(self.misses)
+            return {
+                layer: {
+                    "hits": self.hits[layer],
+                    "misses": self.misses[layer],
+                    "hit_rate": self.hits[layer] / (self.hits[layer] + self.misses[layer]),
+                    "saved_seconds": self.saved[layer],
+                }
+                for layer in layers
+            }
+
+
+statistics = CacheStatistics()
+cache_lookup.connect(statistics, dispatch_uid="auctions.caching.statistics")
@@ -0,0 +1,55 @@
+"""
+System checks of the cache configuration.
+
+Page cache versions (auctions.caching), cached sessions, statistics and
+unread counts only stay right when every worker process shares the cache: a
+version bump, logout or counter update in one process is invisible to the
+others with a process-local backend, which keep serving stale pages (and
+answering 304 to stale ETags) or a flushed session. With several
+WORKER_PROCESSES, such a backend is refused for page caching and cached
+sessions, and warned about for the rest.
+"""
+
+from django.conf import settings
+from django.core import checks
+
+# Backends keeping a separate cache in each process
+PROCESS_LOCAL_BACKENDS = {"django.core.cache.backends.locmem.LocMemCache"}
+CACHED_SESSION_ENGINES = {"django.contrib.sessions.backends.cache", "django.contrib.sessions.backends.cached_db"}
+
+
+def process_local():
+    """Whether the default cache is kept in each process."""
+    return settings.CACHES["default"]["BACKEND"] in PROCESS_LOCAL_BACKENDS
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if settings.WORKER_PROCESSES <= 1 or not process_local():
+        return []
+    hint = "Select a shared cache with COMMERCE_CACHE_PROFILE=redis or memcached."
+    errors = []
+    if settings.PAGE_CACHE_ENABLED:
+        errors.append(
+            checks.Error(
+                "PAGE_CACHE_ENABLED needs a cache shared by the worker processes.",
+                hint=hint,
+                id="auctions.E001",
+            )
+        )
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES:
+        errors.append(
+            checks.Error(
+                f"{settings.SESSION_ENGINE} sessions need a cache shared by the worker processes.",
+                hint=hint,
+                id="auctions.E002",
+            )
+        )
+    errors.append(
+        checks.Warning(
+            "Auction statistics and unread counts are cached in each worker process.",
+            hint=hint,
+            id="auctions.W001",
+        )
+    )
+    return errors
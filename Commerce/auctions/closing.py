@@ -0,0 +1,185 @@
+"""
+Scheduled auction closing.
+
+Auctions with an end time (Auction.ends_at) refuse bids once it has passed
+(auctions.bidding, auctions.bidbook), so their top bid is final from then on.
+The close_auctions command then closes them: it polls the partial index of
+active auctions by end time and closes due auctions in batches, earliest end
+first. A batch is read in the transaction closing it, with an index seek,
+and costs a conditional UPDATE per category setting the status and the
+winner (the bidder of top_bid), plus the statistics of its categories, so
+thousands of auctions ending in the same second are closed by a few
+statements. An UPDATE only matches auctions still active, ended and in its
+category, so one edited or closed by its owner meanwhile is left alone, and
+the statistics follow what each UPDATE moved. Watchers of the closed
+auctions are notified in the background (auctions.notifications).
+
+Bids in the last seconds of an auction extend it (soft_close), inside the
+statement accepting them, so snipers can't win by bidding at the last moment.
+
+Hot auctions write their last bids behind (auctions.bidbook), so they're
+closed HOT_SETTLE after their end time, once those bids reached the database.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, OuterRef, Q, Subquery, Value, When
+from django.utils import timezone
+
+# Models
+from auctions.models import Auction, AuctionStatus, Bid
+
+# Statistics
+from auctions import stats
+
+# Caching
+from auctions import caching
+
+# Watch List Notifications
+from auctions import notifications
+
+# Hot Auctions Bid Book, Which Imports This Module
+from auctions import bidbook
+
+BATCH_SIZE = 2000
+# Several bid book flushes (BID_BOOK_FLUSH_INTERVAL)
+HOT_SETTLE = timedelta(seconds=5)
+
+
+# Scheduled Closing
+def due(now=None):
+    """Active auctions whose end time has passed."""
+    return Auction.objects.filter(status=AuctionStatus.ACTIVE, ends_at__lte=now or timezone.now())
+
+
+def next_end():
+    """The earliest end time of the active auctions, or None."""
+    return (
+        Auction.objects.filter(status=AuctionStatus.ACTIVE, ends_at__isnull=False)
+        .order_by("ends_at", "id")
+        .values_list("ends_at", flat=True)
+        .first()
+    )
+
+
+def close_due(now=None, batch_size=BATCH_SIZE):
+    """
+    Closes a batch of due auctions, earliest end first.
+
+    Args:
+        now (datetime): Closes auctions ended by then, defaults to now.
+        batch_size (int): Auctions closed at most.
+
+    Returns:
+        int: Number of auctions closed, below batch_size once none is left.
+    """
+    now = now or timezone.now()
+    columns = ("ends_at", "id", "category")
+    closing_fields = _closing_fields()
+    with transaction.atomic():
+        batch = list(due(now).filter(hot=False).order_by("ends_at", "id").values_list(*columns)[:batch_size])
+        batch += due(now - HOT_SETTLE).filter(hot=True).order_by("ends_at", "id").values_list(*columns)[:batch_size]
+        batch = sorted(batch)[:batch_size]
+        if not batch:
+            return 0
+
+        # An UPDATE per category only matches the auctions still in it, so
+        # one moved by its owner meanwhile stays active for the next batch
+        # instead of being counted in the wrong bucket
+        categories = defaultdict(list)
+        for ends_at, auction_id, category in batch:
+            categories[category].append(auction_id)
+        moved = {
+            category: due(now).filter(id__in=ids, category=category).update(**closing_fields)
+            for category, ids in categories.items()
+        }
+
+        for category, count in moved.items():
+            if count:
+                stats.adjust(category, AuctionStatus.ACTIVE, -count)
+                stats.adjust(category, AuctionStatus.CLOSED, count)
+
+    auction_ids = [auction_id for ends_at, auction_id, category in batch]
+    caching.bump("listings", *(f"auction:{auction_id}" for auction_id in auction_ids))
+    notifications.schedule_closed(auction_ids)
+    return sum(moved.values())
+
+
+def _closing_fields():
+    # The winner is read from top_bid by the UPDATE itself, so a bid accepted meanwhile counts
+    return {
+        "status": AuctionStatus.CLOSED,
+        "winner": Subquery(Bid.objects.filter(pk=OuterRef("top_bid")).order_by().values("bidder")[:1]),
+    }
+
+
+def _ended(now):
+    """The end time of an auction closed at now: its own if it already ended (see Auction.end_if_closed)."""
+    return Case(When(ends_at__lte=now, then=F("ends_at")), default=Value(now))
+
+
+# Closing By Hand
+def close(auction_id):
+    """
+    Closes an auction for its owner, like the scheduler: one conditional UPDATE
+    setting the status and the winner from the current top bid, which a bid
+    accepted since the auction was read can't be lost to, and ending it now
+    unless it already ended, so it's archived ARCHIVE_AFTER_DAYS from now.
+
+    A hot auction's book is flushed and released first, so its last bids are
+    in the database and later ones are refused by the bid engine.
+
+    Returns:
+        bool: Whether the auction was closed, False if it already was.
+    """
+    bid_book = bidbook.get_bid_book()
+    if bid_book is not None:
+        bid_book.discard(auction_id)
+
+    with transaction.atomic():
+        bucket = Auction.objects.filter(pk=auction_id).values_list("category", "status").first()
+        if bucket is None or bucket[1] == AuctionStatus.CLOSED:
+            return False
+        category, status = bucket
+        closed = Auction.objects.filter(pk=auction_id, category=category, status=status).update(
+            ends_at=_ended(timezone.now()), **_closing_fields()
+        )
+        if closed:
+            stats.adjust(category, status, -1)
+            stats.adjust(category, AuctionStatus.CLOSED, 1)
+
+    caching.bump_auction(auction_id)
+    if closed:
+        notifications.schedule_closed([auction_id])
+    return bool(closed)
+
+
+# Soft Close
+def soft_close(now, ends_at=F("ends_at")):
+    """
+    End time of an auction after a bid placed at now.
+
+    A bid within the last SOFT_CLOSE_WINDOW seconds pushes the end time to
+    SOFT_CLOSE_EXTENSION seconds after it, never earlier than it was.
+
+    Args:
+        now (datetime): When the bid is placed.
+        ends_at (datetime or F): The current end time, the column by default
+            to get an UPDATE expression.
+
+    Returns:
+        The new end time, or an expression of it.
+    """
+    window = timedelta(seconds=settings.SOFT_CLOSE_WINDOW)
+    extended = now + timedelta(seconds=settings.SOFT_CLOSE_EXTENSION)
+    if not isinstance(ends_at, F):
+        if ends_at is not None and ends_at < now + window and ends_at < extended:
+            return extended
+        return ends_at
+    return Case(
+        When(Q(ends_at__lt=now + window) & Q(ends_at__lt=extended), then=Value(extended)),
+        default=ends_at,
+    )
@@ -1,6 +1,6 @@
 # Form Model Requirements
 from django import forms
-from django.db.models import Max, Min
+from django.utils import timezone
 
 # Custom UserCreationForm Requirements
 from django.contrib.auth.forms import UserCreationForm
@@ -9,6 +9,12 @@ from django.contrib.auth.models import User
 # Models
 from auctions.models import UserProfile, Auction, AuctionCategories, AuctionStatus
 
+# Statistics
+from auctions.stats import price_bounds
+
+# Prices In Integer Cents
+from auctions.money import MAX_PRICE
+
 
 # User Registeration Form
 class UserRegisterForm(UserCreationForm):
@@ -52,7 +58,13 @@ UserProfileForm = forms.modelform_factory(
 class AuctionForm(forms.ModelForm):
     class Meta:
         model = Auction
-        fields = ("name", "description", "picture", "price", "category", "status")
+        fields = ("name", "description", "picture", "price", "category", "status", "ends_at")
+        widgets = {
+            "ends_at": forms.widgets.DateTimeInput(attrs={"type": "datetime-local"}, format="%Y-%m-%dT%H:%M"),
+        }
+        help_texts = {
+            "ends_at": "Bids Are Refused After The End Time, Then The Auction Closes. Empty To Close It Yourself.",
+        }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -64,6 +76,19 @@ class AuctionForm(forms.ModelForm):
             price.disabled = True
             price.help_text = "Editing Price Is Not Possible!"
 
+    def clean_ends_at(self):
+        ends_at = self.cleaned_data.get("ends_at")
+        # End Time Validation, Only When Set Or Moved
+        if ends_at and "ends_at" in self.changed_data and ends_at <= timezone.now():
+            raise forms.ValidationError("End Time Must Be In The Future!")
+        return ends_at
+
+
+# Auction Import Form (auctions.bulk), Imported Auctions Keep The Default Picture
+class AuctionImportForm(AuctionForm):
+    class Meta(AuctionForm.Meta):
+        fields = ("name", "description", "price", "category", "status", "ends_at")
+
 
 # For All Choices
 def add_empty_choice(choice_model):
@@ -91,18 +116,29 @@ class AuctionsListingFiltersForm(forms.Form):
         choices=add_empty_choice(AuctionStatus),
         widget=forms.RadioSelect(attrs={"onchange": "this.form.submit()"}),
     )
-    start_price = forms.FloatField(
+    start_price = forms.DecimalField(
         required=False,
+        decimal_places=2,
+        max_value=MAX_PRICE,
+        min_value=-MAX_PRICE,
     )
-    end_price = forms.FloatField(
+    end_price = forms.DecimalField(
         required=False,
+        decimal_places=2,
+        max_value=MAX_PRICE,
+        min_value=-MAX_PRICE,
     )
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # retrives highest and lowest of auctions prices
-        max_price = Auction.objects.aggregate(Max("price")).get("price__max", 0)
-        min_price = Auction.objects.aggregate(Min("price")).get("price__min", 0)
+        # retrives highest and lowest of auctions prices from the cached statistics,
+        # narrowed to the selected category and status
+        category = self.data.get("category") if self.is_bound else None
+        status = self.data.get("status") if self.is_bound else None
+        min_price, max_price = price_bounds(
+            category=category if category in AuctionCategories.values else None,
+            status=status if status in AuctionStatus.values else None,
+        )
         # start price initial attributes assingment
         self.fields["start_price"].initial = min_price
         self.fields["start_price"].min_value = min_price
@@ -0,0 +1,158 @@
+"""
+Image variants of auction pictures and avatars.
+
+Every uploaded image gets resized WebP variants (VARIANTS, bounding boxes in
+pixels, never upscaled), stored next to it as
+``<upload dir>/variants/<file name>.<variant>.webp``. They are built by a
+background worker pool once the upload's transaction commits, so requests
+never wait for Pillow; until a variant exists, variant_url() falls back to
+the original.
+
+Whether a variant exists is kept in the cache, set by build_variants(), so
+rendering a card or an API row doesn't stat the storage; a missing variant is
+only looked for again after MISSING_VARIANT_TIMEOUT.
+"""
+
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = {
+    "thumb": (160, 160),
+    "card": (480, 480),
+    "full": (1600, 1600),
+}
+VARIANT_FORMAT = "WEBP"
+VARIANT_QUALITY = 80
+
+VARIANT_KEY = "auctions:variant:{}"
+# Seconds a missing variant is remembered, unless build_variants() builds it
+MISSING_VARIANT_TIMEOUT = 60
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+
+
+def variant_name(name, variant):
+    """Storage name of an image's variant."""
+    path = PurePosixPath(name)
+    return str(path.parent / "variants" / f"{path.name}.{variant}.webp")
+
+
+def _variant_key(name):
+    return VARIANT_KEY.format(hashlib.md5(name.encode()).hexdigest())
+
+
+def variant_url(field_file, variant):
+    """URL of an image's variant, or of the original while it isn't built."""
+    name = variant_name(field_file.name, variant)
+    key = _variant_key(name)
+    built = cache.get(key)
+    if built is None:
+        built = default_storage.exists(name)
+        cache.set(key, built, None if built else MISSING_VARIANT_TIMEOUT)
+    return default_storage.url(name) if built else field_file.url
+
+
+def forget(name):
+    """Forgets that an image's variants were built, once they're deleted."""
+    cache.delete_many([_variant_key(variant_name(name, variant)) for variant in VARIANTS])
+
+
+# Building
+def _encodable(image):
+    # WebP takes RGB or RGBA; the first frame stands for animations
+    if image.mode in ("RGBA", "LA", "P", "PA"):
+        return image.convert("RGBA")
+    return image.convert("RGB")
+
+
+def _remember(name):
+    cache.set_many({_variant_key(variant_name(name, variant)): True for variant in VARIANTS}, None)
+
+
+def build_variants(name, force=False):
+    """
+    Builds the missing variants of a stored image (all of them with force).
+
+    Returns:
+        list: Names of the variants built.
+    """
+    missing = [
+        variant for variant in VARIANTS if force or not default_storage.exists(variant_name(name, variant))
+    ]
+    if not missing:
+        _remember(name)
+        return []
+
+    try:
+        with default_storage.open(name) as file, Image.open(file) as original:
+            source = _encodable(ImageOps.exif_transpose(original))
+    except (FileNotFoundError, UnidentifiedImageError, OSError) as error:
+        logger.warning("Can't build variants of %s: %s", name, error)
+        return []
+
+    built = []
+    for variant in missing:
+        image = source.copy()
+        image.thumbnail(VARIANTS[variant], Image.Resampling.LANCZOS)
+        buffer = BytesIO()
+        image.save(buffer, VARIANT_FORMAT, quality=VARIANT_QUALITY, method=4)
+        target = variant_name(name, variant)
+        default_storage.delete(target)
+        built.append(default_storage.save(target, ContentFile(buffer.getvalue())))
+    _remember(name)
+    return built
+
+
+# Background Workers
+def executor():
+    """The process wide worker pool (IMAGE_WORKERS threads, Pillow releases the GIL)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS, thread_name_prefix="image-variants"
+            )
+        return _executor
+
+
+def _submit(name):
+    future = executor().submit(build_variants, name)
+    with _executor_lock:
+        _pending.add(future)
+    future.add_done_callback(_done)
+
+
+def _done(future):
+    with _executor_lock:
+        _pending.discard(future)
+    if future.exception():
+        logger.error("Building image variants failed", exc_info=future.exception())
+
+
+def schedule(name):
+    """Builds an image's variants in the background after the current transaction commits."""
+    if name:
+        transaction.on_commit(lambda: _submit(name))
+
+
+def wait(timeout=None):
+    """Waits for the scheduled variants, e.g. in tests and commands."""
+    with _executor_lock:
+        pending = list(_pending)
+    for future in pending:
+        future.result(timeout)
@@ -0,0 +1,143 @@
+"""
+Append-only ledger of bid attempts, and its per-minute rollups.
+
+Bid keeps each bidder's latest bid on an auction and is overwritten by every
+re-bid. BidAttempt keeps every attempt with its outcome and is only ever
+inserted into: auctions.bidding records an accepted bid in the transaction
+accepting it and a rejected one after rolling back, the bid book records
+accepted bids with the batch writing them and rejected ones along with it.
+
+roll_up() folds the attempts made since its last run into BidRollup, one
+row per auction and minute (attempts, accepted bids and the price curve), so
+charts read a row per minute instead of every attempt. Attempts are rolled
+up ROLLUP_SETTLE after they're made, once the transactions that inserted
+lower ids have committed; runs must not overlap (the rollup_bids command).
+"""
+
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Q
+from django.db.models.functions import TruncMinute
+from django.utils import timezone
+
+# Models
+from auctions.models import Auction, BidAttempt, BidOutcome, BidRollup
+
+# Caching
+from auctions import caching
+
+# Prices In Integer Cents
+from auctions.money import to_cents
+
+ROLLUP_SETTLE = timedelta(seconds=5)
+# Buckets folded per query
+ROLLUP_BATCH_SIZE = 1000
+# The raw INSERT writes integer cents (auctions.money) to the price's own column
+PRICE_COLUMN = BidAttempt._meta.get_field("price").column
+
+
+# Recording
+def record(auction_id, bidder_id, price, accepted):
+    """
+    Appends a bid attempt to the ledger, with one INSERT.
+
+    Attempts on auctions that don't exist aren't recorded.
+
+    Returns:
+        bool: Whether the attempt was recorded.
+    """
+    outcome = BidOutcome.ACCEPTED if accepted else BidOutcome.REJECTED
+    date = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {BidAttempt._meta.db_table} (date, {PRICE_COLUMN}, outcome, auction_id, bidder_id) "
+            f"SELECT %s, %s, %s, %s, %s WHERE EXISTS (SELECT 1 FROM {Auction._meta.db_table} WHERE id = %s)",
+            [date, to_cents(price), outcome, auction_id, bidder_id, auction_id],
+        )
+        return cursor.rowcount == 1
+
+
+def record_many(attempts, accepted):
+    """Appends (auction_id, bidder_id, price) attempts with the same outcome."""
+    outcome = BidOutcome.ACCEPTED if accepted else BidOutcome.REJECTED
+    BidAttempt.objects.bulk_create(
+        BidAttempt(auction_id=auction_id, bidder_id=bidder_id, price=price, outcome=outcome)
+        for auction_id, bidder_id, price in attempts
+    )
+
+
+# Rollups
+def roll_up(now=None, settle=ROLLUP_SETTLE):
+    """
+    Folds the attempts after the highest BidRollup.last_attempt into their buckets.
+
+    Args:
+        now (datetime): Rolls up attempts made settle before it, defaults to now.
+        settle (timedelta): Age of the newest attempts rolled up.
+
+    Returns:
+        int: Number of attempts rolled up.
+    """
+    now = now or timezone.now()
+    watermark = BidRollup.objects.aggregate(last=Max("last_attempt"))["last"] or 0
+    accepted = Q(outcome=BidOutcome.ACCEPTED)
+    buckets = list(
+        BidAttempt.objects.filter(id__gt=watermark, date__lt=now - settle)
+        .order_by()
+        .values("auction_id", minute=TruncMinute("date"))
+        .annotate(
+            attempts=Count("id"),
+            accepted=Count("id", filter=accepted),
+            low=Min("price", filter=accepted),
+            high=Max("price", filter=accepted),
+            last_attempt=Max("id"),
+        )
+    )
+    if not buckets:
+        return 0
+
+    with transaction.atomic():
+        # Bounded batches, the lookup of existing rollups binds a parameter per auction
+        for start in range(0, len(buckets), ROLLUP_BATCH_SIZE):
+            _add_buckets(buckets[start : start + ROLLUP_BATCH_SIZE])
+
+    auction_ids = {bucket["auction_id"] for bucket in buckets}
+    caching.bump(*(f"auction:{auction_id}" for auction_id in auction_ids))
+    return sum(bucket["attempts"] for bucket in buckets)
+
+
+def _add_buckets(buckets):
+    """Adds the buckets to the BidRollup rows of their auction and minute, creating those missing."""
+    # Buckets of minutes rolled up before are added to
+    existing = {
+        (rollup.auction_id, rollup.minute): rollup
+        for rollup in BidRollup.objects.filter(
+            auction_id__in={bucket["auction_id"] for bucket in buckets},
+            minute__in={bucket["minute"] for bucket in buckets},
+        )
+    }
+    rollups = []
+    for bucket in buckets:
+        rollup = existing.get((bucket["auction_id"], bucket["minute"])) or BidRollup(
+            auction_id=bucket["auction_id"], minute=bucket["minute"], last_attempt=0
+        )
+        rollup.attempts += bucket["attempts"]
+        rollup.accepted += bucket["accepted"]
+        rollup.low = _fold(min, rollup.low, bucket["low"])
+        rollup.high = _fold(max, rollup.high, bucket["high"])
+        rollup.last_attempt = max(rollup.last_attempt, bucket["last_attempt"])
+        rollups.append(rollup)
+
+    BidRollup.objects.bulk_create(
+        rollups,
+        update_conflicts=True,
+        unique_fields=("auction", "minute"),
+        update_fields=("attempts", "accepted", "low", "high", "last_attempt"),
+    )
+
+
+def _fold(function, *prices):
+    """min or max of the prices that are set, None if none is."""
+    prices = [price for price in prices if price is not None]
+    return function(prices) if prices else None
@@ -0,0 +1,118 @@
+"""
+Live auction updates fan-out hub.
+
+The bid and comment write paths publish events to the hub, and every open
+Server-Sent Events stream (see views.live) holds a lightweight subscription
+for a single auction. Each subscription keeps at most ``MAX_PENDING`` events,
+older ones are dropped, so memory per connection stays bounded however slow a
+client reads.
+
+The hub lives inside one process; subscribers only see events published by the
+same worker process.
+"""
+
+import asyncio
+import json
+import threading
+from collections import defaultdict, deque
+
+# Prices As JSON Numbers
+from auctions.money import MoneyJSONEncoder
+
+# Events kept per subscriber before the oldest ones are dropped
+MAX_PENDING = 8
+
+
+class Subscription:
+    """Pending events of a single stream, owned by its event loop."""
+
+    __slots__ = ("loop", "events", "waiter")
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.events = deque(maxlen=MAX_PENDING)
+        self.waiter = None
+
+    def push(self, event):
+        """Queues an event; must run on the subscription's loop."""
+        self.events.append(event)
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+
+    async def get(self, timeout):
+        """Returns the next event, or None if nothing arrived within timeout."""
+        if not self.events:
+            self.waiter = self.loop.create_future()
+            try:
+                async with asyncio.timeout(timeout):
+                    await self.waiter
+            except TimeoutError:
+                return None
+            finally:
+                self.waiter = None
+        return self.events.popleft()
+
+
+def _deliver(subscriptions, event):
+    for subscription in subscriptions:
+        subscription.push(event)
+
+
+class LiveHub:
+    """Routes published auction events to their subscribers."""
+
+    def __init__(self):
+        self.subscriptions = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def subscribe(self, auction_id):
+        """Subscribes the running event loop to an auction's events."""
+        subscription = Subscription(asyncio.get_running_loop())
+        with self.lock:
+            self.subscriptions[auction_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, auction_id, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(auction_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[auction_id]
+
+    def subscribers_count(self, auction_id=None):
+        with self.lock:
+            if auction_id is not None:
+                return len(self.subscriptions.get(auction_id, ()))
+            return sum(len(subscriptions) for subscriptions in self.subscriptions.values())
+
+    def publish(self, auction_id, kind, data):
+        """
+        Sends an event to every subscriber of an auction.
+
+        Safe to call from any thread. The event is encoded once and handed to
+        each subscriber's event loop in a single callback per loop.
+
+        Returns:
+            int: Number of subscribers the event was sent to.
+        """
+        with self.lock:
+            subscriptions = tuple(self.subscriptions.get(auction_id, ()))
+        if not subscriptions:
+            return 0
+
+        event = f"event: {kind}\ndata: {json.dumps(data, cls=MoneyJSONEncoder)}\n\n".encode()
+        by_loop = defaultdict(list)
+        for subscription in subscriptions:
+            by_loop[subscription.loop].append(subscription)
+        for loop, group in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver, group, event)
+            except RuntimeError:
+                # The loop is closed, its streams are gone as well
+                continue
+        return len(subscriptions)
+
+
+# Process Wide Hub
+hub = LiveHub()
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from auctions import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves auctions closed for more than --older-than days, with their bids and comments, "
+        "to the archive in batches; --purge-before deletes archived months"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-o", "--older-than", type=float, default=None,
+            help="Days since the end of the archived auctions, ARCHIVE_AFTER_DAYS by default",
+        )
+        parser.add_argument("-b", "--batch-size", type=int, default=None, help="Auctions per transaction")
+        parser.add_argument(
+            "--purge-before", help="Deletes the archived auctions that ended before this month (YYYY-MM)"
+        )
+
+    def handle(self, *args, **options):
+        older_than = options["older_than"]
+        if older_than is None:
+            older_than = settings.ARCHIVE_AFTER_DAYS
+        if older_than < 0 or (options["batch_size"] is not None and options["batch_size"] <= 0):
+            raise CommandError("--older-than can't be negative and --batch-size must be positive")
+
+        before = timezone.now() - timedelta(days=older_than)
+        archived = archive.archive(before, options["batch_size"])
+        self.stdout.write(f"Archived {archived} auctions")
+
+        if options["purge_before"]:
+            month = parse_date(f"{options['purge_before']}-01")
+            if month is None:
+                raise CommandError(f"--purge-before takes a month like 2024-06: {options['purge_before']!r}")
+            self.stdout.write(f"Purged {archive.purge(month)} archived auctions")
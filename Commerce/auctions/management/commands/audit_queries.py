@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from auctions import audit
+from auctions.models import AuctionStatus
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays a workload against the views in a throwaway database and explains "
+        "every query, flagging full scans and temp B-tree sorts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-n", "--auctions", type=int, default=2000, help="Seeded auctions")
+        parser.add_argument("--plans", action="store_true", help="Prints the plan of every query")
+        parser.add_argument("--check", action="store_true", help="Fails if any query is flagged")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Query plans are only audited on SQLite")
+
+        # Throwaway Database, So Real Data Is Never Touched
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(PAGE_CACHE_ENABLED=False):
+                auctions = audit.seed(options["auctions"])
+                auction = next(a for a in auctions if a.status == AuctionStatus.ACTIVE)
+                # Plans as the planner sees them with real statistics
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+                reports = audit.audit(audit.workload(Client(), auction, auction.owner))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        flagged = audit.flagged(reports)
+        for report in reports:
+            if not (report.findings or options["plans"]):
+                continue
+            self.stdout.write(f"\n[{report.request}] {report.sql}")
+            for line in report.plan:
+                self.stdout.write(f"    {line}")
+            for finding in report.findings:
+                if finding.accepted:
+                    self.stdout.write(f"  - {finding.kind}: {finding.detail} (accepted: {finding.accepted})")
+                else:
+                    self.stdout.write(self.style.WARNING(f"  ! {finding.kind}: {finding.detail}"))
+
+        self.stdout.write(f"\n{len(reports)} query shapes, {len(flagged)} flagged")
+        if flagged and options["check"]:
+            raise CommandError(f"{len(flagged)} query shapes scan or sort!")
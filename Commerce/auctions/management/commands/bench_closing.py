@@ -0,0 +1,95 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from auctions import closing, notifications, stats
+from auctions.models import Auction, AuctionCategories, AuctionStatus, Bid
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks closing throughput on synthetic auctions ending at once in a throwaway database, "
+        "and checks every winner and statistics count"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-n", "--auctions", type=int, default=100_000, help="Auctions ending")
+        parser.add_argument("-b", "--batch-size", type=int, default=closing.BATCH_SIZE, help="Auctions per batch")
+        parser.add_argument(
+            "--spread", type=float, default=0, help="Seconds the end times are spread over, 0 for the same second"
+        )
+
+    def handle(self, *args, **options):
+        if options["auctions"] <= 0 or options["batch_size"] <= 0:
+            raise CommandError("--auctions and --batch-size must be positive")
+
+        # Throwaway Database, So Real Data Is Never Touched
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.benchmark(options)
+        finally:
+            # Watchers of the closed auctions are notified before the database goes
+            notifications.wait()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def benchmark(self, options):
+        count, batch_size = options["auctions"], 10_000
+        owner = User.objects.create(username="bench")
+        bidders = User.objects.bulk_create(User(username=f"bidder{i}") for i in range(100))
+        ends_at = timezone.now() - timedelta(seconds=options["spread"] + 1)
+        categories = AuctionCategories.values
+
+        started = time.perf_counter()
+        for start in range(0, count, batch_size):
+            Auction.objects.bulk_create(
+                Auction(
+                    name=f"lot {i}",
+                    price=1.0,
+                    category=categories[i % len(categories)],
+                    owner=owner,
+                    ends_at=ends_at + timedelta(seconds=options["spread"] * i / count),
+                )
+                for i in range(start, min(count, start + batch_size))
+            )
+        # Two bids per auction, the second one on top
+        auction_ids = list(Auction.objects.values_list("id", flat=True))
+        for start in range(0, count, batch_size):
+            Bid.objects.bulk_create(
+                Bid(auction_id=auction_id, bidder=bidders[(n + offset) % len(bidders)], price=2.0 + offset)
+                for n, auction_id in enumerate(auction_ids[start : start + batch_size], start)
+                for offset in (0, 1)
+            )
+        top_bids = Bid.objects.filter(auction=OuterRef("pk")).order_by("-price").values("pk")[:1]
+        Auction.objects.update(top_bid=Subquery(top_bids))
+        stats.rebuild()
+        self.stdout.write(f"Seeded {count} ended auctions in {time.perf_counter() - started:.1f}s")
+
+        batches = closed = 0
+        started = time.perf_counter()
+        while True:
+            batch = closing.close_due(batch_size=options["batch_size"])
+            closed += batch
+            batches += 1
+            if batch < options["batch_size"]:
+                break
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Closed {closed} auctions in {batches} batches of {options['batch_size']} "
+            f"in {elapsed:.2f}s: {closed / elapsed:.0f} auctions/s"
+        )
+
+        # Every auction closed once, won by its top bidder, and counted in its bucket
+        wrong_winners = Auction.objects.exclude(winner=F("top_bid__bidder")).count()
+        still_active = Auction.objects.filter(status=AuctionStatus.ACTIVE).count()
+        counted = stats.counts(status=AuctionStatus.CLOSED)
+        if closed != count or wrong_winners or still_active or counted != count:
+            raise CommandError(
+                f"Closing went wrong: {closed} closed, {still_active} still active, "
+                f"{wrong_winners} wrong winners, {counted} counted closed"
+            )
+        self.stdout.write("Every auction was closed once with its top bidder as winner")
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions.live import hub
+from auctions.views import live_events
+
+
+class Command(BaseCommand):
+    help = "Benchmarks live update streams: memory per idle subscriber and fan-out latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument("-s", "--subscribers", type=int, default=10000, help="Idle streams to hold open")
+        parser.add_argument("-a", "--auctions", type=int, default=1, help="Auctions the streams are spread over")
+        parser.add_argument(
+            "--max-bytes",
+            type=int,
+            default=4096,
+            help="Fails if an idle stream costs more memory than this many bytes",
+        )
+
+    def handle(self, *args, **options):
+        subscribers = options["subscribers"]
+        auctions = options["auctions"]
+        if subscribers <= 0 or auctions <= 0:
+            raise CommandError("--subscribers and --auctions must be positive")
+
+        report = asyncio.run(self.benchmark(subscribers, auctions))
+
+        per_subscriber = report["memory"] / subscribers
+        self.stdout.write(f"Subscribers:           {subscribers} over {auctions} auction(s)")
+        self.stdout.write(f"Memory held:           {report['memory'] / 1024 / 1024:.2f} MiB")
+        self.stdout.write(f"Memory per subscriber: {per_subscriber:.0f} bytes")
+        self.stdout.write(f"Subscribe time:        {report['subscribe'] * 1000:.1f} ms")
+        self.stdout.write(f"Fan-out latency:       {report['fan_out'] * 1000:.1f} ms (publish to last delivery)")
+
+        if per_subscriber > options["max_bytes"]:
+            raise CommandError(
+                f"Idle subscriber costs {per_subscriber:.0f} bytes, budget is {options['max_bytes']}"
+            )
+
+    async def benchmark(self, subscribers, auctions):
+        delivered = 0
+        all_delivered = asyncio.Event()
+
+        async def consume(stream):
+            nonlocal delivered
+            # Skips the initial retry hint
+            await anext(stream)
+            async for chunk in stream:
+                if chunk.startswith(b"event:"):
+                    delivered += 1
+                    if delivered == subscribers:
+                        all_delivered.set()
+
+        # Idle Streams
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        tasks = [
+            asyncio.create_task(consume(live_events(-(number % auctions) - 1)))
+            for number in range(subscribers)
+        ]
+        while hub.subscribers_count() < subscribers:
+            await asyncio.sleep(0)
+        subscribe_time = time.perf_counter() - started
+        memory = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        # Fan-out From A Writer Thread, Like A Bid Request Would
+        started = time.perf_counter()
+        writers = [
+            threading.Thread(target=hub.publish, args=(-number - 1, "price", {"price": 1.0}))
+            for number in range(auctions)
+        ]
+        for writer in writers:
+            writer.start()
+        await all_delivered.wait()
+        fan_out_time = time.perf_counter() - started
+        for writer in writers:
+            writer.join()
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        return {"memory": memory, "subscribe": subscribe_time, "fan_out": fan_out_time}
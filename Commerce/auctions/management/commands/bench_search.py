@@ -0,0 +1,102 @@
+import itertools
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from auctions.forms import AuctionsListingFiltersForm
+from auctions.models import Auction, AuctionCategories
+from auctions.search import rebuild_index, search
+from auctions.views import filter_auctions
+
+SYLLABLES = ("ka", "lo", "mi", "ra", "te", "su", "no", "vi", "de", "po", "ze", "an", "or", "ul", "ex")
+
+
+def vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = "Benchmarks full-text search latency on synthetic auctions in a throwaway database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("-n", "--auctions", type=int, default=1_000_000, help="Synthetic auctions")
+        parser.add_argument("-q", "--queries", type=int, default=200, help="Queries to time")
+        parser.add_argument("--per-page", type=int, default=8, help="Results per page")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        # Throwaway Database, So Real Data Is Never Touched
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def benchmark(self, options):
+        rng = random.Random(options["seed"])
+        words = vocabulary(5000, rng)
+        # Zipf like word frequencies, like real listings
+        weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+        categories = AuctionCategories.values
+
+        started = time.perf_counter()
+        owner = User.objects.create(username="bench")
+        batch_size = 10_000
+        for start in range(0, options["auctions"], batch_size):
+            count = min(batch_size, options["auctions"] - start)
+            Auction.objects.bulk_create(
+                Auction(
+                    name=" ".join(rng.choices(words, cum_weights=weights, k=3)),
+                    description=" ".join(rng.choices(words, cum_weights=weights, k=20)),
+                    price=round(rng.uniform(1, 10_000), 2),
+                    category=rng.choice(categories),
+                    owner=owner,
+                )
+                for _ in range(count)
+            )
+        rebuild_index()
+        self.stdout.write(f"Seeded and indexed {options['auctions']} auctions in {time.perf_counter() - started:.1f}s")
+
+        # Single words, word pairs, and pairs narrowed by a listing filter
+        cases = {
+            "one word": lambda: (rng.choice(words), None),
+            "two words": lambda: (" ".join(rng.choices(words, cum_weights=weights, k=2)), None),
+            "filtered": lambda: (rng.choice(words), {"category": rng.choice(categories)}),
+        }
+        for name, make_case in cases.items():
+            page_times, count_times = [], []
+            for _ in range(options["queries"]):
+                query, filters = make_case()
+                auctions = Auction.objects.all()
+                if filters:
+                    form = AuctionsListingFiltersForm(filters)
+                    form.is_valid()
+                    auctions, _ = filter_auctions(form, auctions)
+                results = search(query, auctions)
+
+                started = time.perf_counter()
+                list(results[: options["per_page"]])
+                page_times.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                results.count()
+                count_times.append(time.perf_counter() - started)
+
+            self.stdout.write(
+                f"{name:>10}: first page p50 {statistics.median(page_times) * 1000:.2f} ms, "
+                f"p99 {percentile(page_times, 0.99) * 1000:.2f} ms; "
+                f"count p50 {statistics.median(count_times) * 1000:.2f} ms, "
+                f"p99 {percentile(count_times, 0.99) * 1000:.2f} ms"
+            )
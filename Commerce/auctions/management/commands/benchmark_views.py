@@ -0,0 +1,105 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from auctions import benchmark, notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks every view on a synthetic dataset in a throwaway database: query counts, "
+        "p50/p99 latency and peak allocations, compared with the stored baseline and, for pages "
+        "meant to stay flat, across scales"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-s",
+            "--scale",
+            type=int,
+            action="append",
+            help="Auctions (and bids and comments) to seed, repeatable; defaults to 1000",
+        )
+        parser.add_argument(
+            "-a", "--all-scales", action="store_true", help="Runs every baseline scale, 10^3 to 10^6 auctions"
+        )
+        parser.add_argument("-r", "--repeat", type=int, default=20, help="Timed requests per case")
+        parser.add_argument("-c", "--case", action="append", help="Only runs the named cases")
+        parser.add_argument("--tolerance", type=float, default=benchmark.TOLERANCE)
+        parser.add_argument(
+            "--flat-ratio",
+            type=float,
+            default=benchmark.FLAT_RATIO,
+            help="Largest p50 growth of the flat cases from 10^3 to 10^6 auctions",
+        )
+        parser.add_argument("--baseline", default=str(benchmark.BASELINE_PATH), help="Baseline JSON file")
+        parser.add_argument(
+            "--update-baseline", action="store_true", help="Stores the results as the new baseline"
+        )
+
+    def handle(self, *args, **options):
+        scales = list(benchmark.SCALES) if options["all_scales"] else options["scale"] or [1000]
+        if min(scales) <= 0 or options["repeat"] <= 0:
+            raise CommandError("--scale and --repeat must be positive")
+
+        baseline = benchmark.load_baseline(options["baseline"])
+        failures = []
+        # The baseline with this run's figures, for the comparison across scales
+        measured = {scale: dict(figures) for scale, figures in baseline.items()}
+        for scale in scales:
+            results = self.benchmark(scale, options)
+            self.report(scale, results)
+            measured[str(scale)] = {**measured.get(str(scale), {}), **results}
+
+            failures += [
+                f"{name}: status {figures['status']}"
+                for name, figures in results.items()
+                if figures["status"] != self.expected[name]
+            ]
+            if options["update_baseline"]:
+                baseline[str(scale)] = {**baseline.get(str(scale), {}), **results}
+            else:
+                failures += [
+                    f"scale {scale}, {message}"
+                    for message in benchmark.compare(results, baseline.get(str(scale), {}), options["tolerance"])
+                ]
+
+        failures += benchmark.compare_scales(measured, options["flat_ratio"])
+
+        if options["update_baseline"]:
+            benchmark.save_baseline(baseline, options["baseline"])
+            self.stdout.write(f"Baseline saved to {options['baseline']}")
+
+        for failure in failures:
+            self.stdout.write(self.style.ERROR(f" - {failure}"))
+        if failures:
+            raise CommandError(f"{len(failures)} benchmark regressions!")
+
+    @property
+    def expected(self):
+        return {case.name: case.status for case in benchmark.cases()}
+
+    def benchmark(self, scale, options):
+        # Throwaway Database, So Real Data Is Never Touched
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # Measures the views themselves, not the anonymous page cache
+            with override_settings(PAGE_CACHE_ENABLED=False):
+                fixtures = benchmark.seed(scale)
+                return benchmark.run(fixtures, options["repeat"], options["case"])
+        finally:
+            # Fan-outs of the benchmarked bids finish before the database goes
+            notifications.wait()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def report(self, scale, results):
+        self.stdout.write(f"\nScale {scale}")
+        self.stdout.write(f"{'case':<20} {'status':>6} {'queries':>7} {'p50 ms':>8} {'p99 ms':>8} {'peak KiB':>9}")
+        for name, figures in results.items():
+            self.stdout.write(
+                f"{name:<20} {figures['status']:>6} {figures['queries']:>7} "
+                f"{figures['p50_ms']:>8.2f} {figures['p99_ms']:>8.2f} {figures['peak_kib']:>9.1f}"
+            )
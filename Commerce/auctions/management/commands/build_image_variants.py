@@ -0,0 +1,44 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions import images
+from auctions.models import Auction, UserProfile
+
+
+def stored_images():
+    """Names of every auction picture and avatar, defaults included."""
+    names = set(Auction.objects.values_list("picture", flat=True).distinct())
+    names.update(UserProfile.objects.values_list("avatar", flat=True).distinct())
+    names.update((Auction.picture.field.default, UserProfile.avatar.field.default))
+    names.discard("")
+    return sorted(names)
+
+
+class Command(BaseCommand):
+    help = "Builds the missing resized variants of auction pictures and avatars in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument("-w", "--workers", type=int, default=4, help="Parallel workers")
+        parser.add_argument("--force", action="store_true", help="Rebuilds existing variants too")
+
+    def handle(self, *args, **options):
+        if options["workers"] <= 0:
+            raise CommandError("--workers must be positive")
+
+        names = stored_images()
+        started = time.perf_counter()
+        built = 0
+        # Pillow releases the GIL while decoding, resizing and encoding
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = {pool.submit(images.build_variants, name, options["force"]): name for name in names}
+            for done, future in enumerate(as_completed(futures), 1):
+                variants = future.result()
+                built += len(variants)
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"[{done}/{len(names)}] {futures[future]}: {len(variants)} variants")
+
+        self.stdout.write(
+            f"Built {built} variants of {len(names)} images in {time.perf_counter() - started:.1f}s"
+        )
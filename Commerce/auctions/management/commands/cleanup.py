@@ -1,8 +1,27 @@
-from django.core.management.base import BaseCommand
-from pathlib import Path
-from django.conf import settings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time as day_start, timedelta
+import json
 import logging
-from auctions.models import UserProfile, Auction
+import os
+import re
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from auctions.models import UserProfile, Auction, ArchivedAuction
+
+# Directories holding uploads stored by upload name; content addressed
+# uploads live in their subdirectories and are collected by collect_media
+IMAGE_DIRECTORIES = ("auction_images", "profile_images")
+# Database rows fetched per round trip
+CHUNK_SIZE = 10_000
+# Seconds between progress readouts
+PROGRESS_INTERVAL = 1.0
+DURATION = re.compile(r"^(\d+(?:\.\d+)?)([smhd])$")
+DURATION_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
 
 # Counts the error logs
 class CallCounted(logging.Handler):
@@ -28,54 +47,117 @@ if not logger.handlers:
 callcounted = CallCounted()
 logger.addHandler(callcounted)
 
-def safe_iterdir(path:Path):
-    '''Functions returns a set of iterable files Paths if the directory exists'''
+def referenced_images():
+    '''Names of the uploaded images in use, streamed from the database in chunks'''
+    names = set()
+    # Archived auctions (auctions.archive) keep their pictures
+    for model, field in ((UserProfile, "avatar"), (Auction, "picture"), (ArchivedAuction, "picture")):
+        default = model._meta.get_field(field).default
+        rows = (
+            model.objects.exclude(**{field: default})
+            .order_by()
+            .values_list(field, flat=True)
+            .iterator(chunk_size=CHUNK_SIZE)
+        )
+        # Only names directly in an images directory can match a scanned file
+        names.update(name for name in rows if name.count("/") == 1)
+    return names
+
+def scan_images(directory, since=None):
+    '''Yields the os.DirEntry of files directly in a directory (modified since a timestamp if given)'''
     try:
-        return list(f for f in path.iterdir() if f.is_file())
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                if since is not None and entry.stat(follow_symlinks=False).st_mtime < since:
+                    continue
+                yield entry
     except FileNotFoundError:
-        logger.warning(f"Directory not found: {path}")
-        return list()
+        pass
+
+def parse_since(value):
+    '''Timestamp of an ISO date or datetime, or of a duration ago like 90m, 24h or 7d'''
+    duration = DURATION.match(value)
+    if duration:
+        amount, unit = duration.groups()
+        return time.time() - timedelta(**{DURATION_UNITS[unit]: float(amount)}).total_seconds()
+
+    moment = parse_datetime(value)
+    if moment is None and parse_date(value) is not None:
+        moment = datetime.combine(parse_date(value), day_start())
+    if moment is None:
+        raise CommandError(f"--since takes an ISO date or datetime, or a duration like 24h: {value!r}")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment.timestamp()
+
+class Progress:
+    '''Writes a count and its throughput at most every PROGRESS_INTERVAL seconds'''
+
+    def __init__(self, stream, label, enabled=True):
+        self.stream = stream
+        self.label = label
+        self.enabled = enabled
+        self.count = 0
+        self.started = self.shown = time.perf_counter()
+
+    @property
+    def rate(self):
+        return self.count / max(time.perf_counter() - self.started, 1e-9)
+
+    def step(self, count=1):
+        self.count += count
+        now = time.perf_counter()
+        if self.enabled and now - self.shown >= PROGRESS_INTERVAL:
+            self.shown = now
+            self.stream.write(f"{self.label}: {self.count} files ({self.rate:.0f} files/s)")
 
 class Command(BaseCommand):
     help = "This command helps you with dumped image files cleanup"
 
     def add_arguments(self, parser):
         parser.add_argument("-y", "--yes", action="store_true", help="Skips confirmation!")
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Prints a JSON report of the abundant files, removes nothing"
+        )
+        parser.add_argument(
+            "--since",
+            help="Only files modified since an ISO date or datetime, or a duration ago like 90m, 24h or 7d",
+        )
+        parser.add_argument("-w", "--workers", type=int, default=8, help="Parallel file removals")
 
     def handle(self, *args, **options):
         # Handling log
         if options["verbosity"] > 1:
             logger.setLevel(logging.INFO)
+        if options["workers"] <= 0:
+            raise CommandError("--workers must be positive")
+        since = parse_since(options["since"]) if options["since"] else None
+        callcounted.error_count = 0
+        started = time.perf_counter()
 
-        # All the associated avatar image files
-        userprofile_images = set(
-            Path(userprofile.avatar.path)
-            for userprofile in UserProfile.objects.all()
-            if userprofile.avatar
-            and userprofile.avatar != UserProfile.avatar.field.default
-        )
-        # All the associated auction picture image files
-        auction_images = set(
-            Path(auction.picture.path)
-            for auction in Auction.objects.all()
-            if auction.picture and auction.picture != Auction.picture.field.default
-        )
+        # Every associated avatar and auction picture
+        referenced = referenced_images()
 
-        # Images direcotories paths
-        auction_images_dir_path = Path(settings.MEDIA_ROOT).joinpath("auction_images")
-        profile_images_dir_path = Path(settings.MEDIA_ROOT).joinpath("profile_images")
+        # The abundant files, with their resized variants (auctions.images)
+        scanning = Progress(self.stderr, "Scanned", options["verbosity"] > 0)
+        differences = []
+        for directory in IMAGE_DIRECTORIES:
+            directory_path = os.path.join(settings.MEDIA_ROOT, directory)
+            for entry in scan_images(directory_path, since):
+                scanning.step()
+                if f"{directory}/{entry.name}" not in referenced:
+                    differences.append(entry.path)
+            for entry in scan_images(os.path.join(directory_path, "variants"), since):
+                scanning.step()
+                # Named "<original name>.<variant>.webp"
+                if f"{directory}/{entry.name.rsplit('.', 2)[0]}" not in referenced:
+                    differences.append(entry.path)
 
-        # All the auction_images directory image files
-        all_images = set(
-            safe_iterdir(auction_images_dir_path)
-        )
-        # All the userprofile avatars image files
-        all_images.update(
-            safe_iterdir(profile_images_dir_path)
-        )
-
-        # The Aboundant files
-        differences = all_images.difference(userprofile_images, auction_images)
+        if options["dry_run"]:
+            self.report(differences, scanning.count, since, started)
+            return
         if not differences:
             self.stdout.write("Already cleanedUp nothing todo!")
             return
@@ -83,7 +165,7 @@ class Command(BaseCommand):
         if not options["yes"]:
             # Shows images that are going to get removed
             self.stdout.write("Following image files are going to get removed!")
-            self.stdout.write('\n'.join(f" - {image.name}" for image in differences))
+            self.stdout.write('\n'.join(f" - {os.path.basename(image)}" for image in differences))
             # Permission to remove images
             try:
                 permission = input("This action is irreversible input; y or yes to continue: ")
@@ -93,24 +175,55 @@ class Command(BaseCommand):
             if permission.lower().strip() not in ["y", "yes"]:
                 logger.info("Process aborted by user!")
                 return
-                
-            
-        # Removing Abundant image files
+
+        # Removing Abundant image files, unlinks wait on the disk so threads overlap them
+        removing = Progress(self.stderr, "Removed", options["verbosity"] > 0)
         removed_images_count = 0
-        for image in differences:
-            try:
-                image.unlink()
-                removed_images_count += 1
-                logger.info(f"Removed file: {image.name}")
-            except FileNotFoundError:
-                logger.error(f"File not found: {image.name}")
-            except PermissionError:
-                logger.error(f"Permission denied: {image.name}")
-            except OSError as e:
-                logger.error(f"OS Error: {e}")
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            # Submitted by chunks, so pending removals stay bounded
+            for start in range(0, len(differences), CHUNK_SIZE):
+                for removed in pool.map(self.remove, differences[start : start + CHUNK_SIZE]):
+                    removing.step()
+                    removed_images_count += removed
 
         # info for user
+        elapsed = time.perf_counter() - started
         if removed_images_count > 0:
-            self.stdout.write(f"Cleaned Up {removed_images_count} abundant images")
+            self.stdout.write(
+                f"Cleaned Up {removed_images_count} abundant images of {scanning.count} files "
+                f"in {elapsed:.1f}s ({scanning.count / max(elapsed, 1e-9):.0f} files/s)"
+            )
         if callcounted.error_count > 0:
-            self.stdout.write(f"{callcounted.error_count} errors occurred!")
\ No newline at end of file
+            self.stdout.write(f"{callcounted.error_count} errors occurred!")
+
+    def remove(self, image):
+        name = os.path.basename(image)
+        try:
+            os.unlink(image)
+            logger.info(f"Removed file: {name}")
+            return True
+        except FileNotFoundError:
+            logger.error(f"File not found: {name}")
+        except PermissionError:
+            logger.error(f"Permission denied: {name}")
+        except OSError as e:
+            logger.error(f"OS Error: {e}")
+        return False
+
+    def report(self, differences, scanned, since, started):
+        abundant = []
+        for image in sorted(differences):
+            try:
+                size = os.stat(image).st_size
+            except FileNotFoundError:
+                continue
+            abundant.append({"name": os.path.relpath(image, settings.MEDIA_ROOT), "bytes": size})
+        report = {
+            "since": datetime.fromtimestamp(since).astimezone().isoformat() if since is not None else None,
+            "scanned": scanned,
+            "abundant": abundant,
+            "abundant_count": len(abundant),
+            "abundant_bytes": sum(image["bytes"] for image in abundant),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        self.stdout.write(json.dumps(report, indent=2))
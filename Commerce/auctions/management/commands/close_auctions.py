@@ -0,0 +1,60 @@
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from auctions import closing
+
+# Shortest sleep while due auctions wait for their bid book to settle
+MIN_POLL_INTERVAL = 0.1
+
+
+class Command(BaseCommand):
+    help = (
+        "Closes auctions whose end time has passed, in batches, and finalizes their winners; "
+        "runs until interrupted unless --once is given"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-b", "--batch-size", type=int, default=closing.BATCH_SIZE, help="Auctions per batch")
+        parser.add_argument(
+            "-i", "--interval", type=float, default=5.0, help="Longest sleep between polls, in seconds"
+        )
+        parser.add_argument("--once", action="store_true", help="Closes the due auctions, then exits")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0 or options["interval"] <= 0:
+            raise CommandError("--batch-size and --interval must be positive")
+
+        stopped = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *args: stopped.set())
+
+        total = 0
+        while not stopped.is_set():
+            started = time.perf_counter()
+            closed = closing.close_due(batch_size=options["batch_size"])
+            total += closed
+            if closed and options["verbosity"] > 1:
+                self.stdout.write(f"Closed {closed} auctions in {time.perf_counter() - started:.3f}s")
+
+            # A full batch means more auctions are due
+            if closed >= options["batch_size"]:
+                continue
+            if options["once"]:
+                break
+
+            # Sleeps until the next end time, polling at least every interval
+            next_end = closing.next_end()
+            delay = options["interval"]
+            if next_end is not None:
+                delay = min(delay, max((next_end - timezone.now()).total_seconds(), MIN_POLL_INTERVAL))
+            stopped.wait(delay)
+            # The connection may have outlived its lifetime while sleeping
+            close_old_connections()
+
+        self.stdout.write(f"Closed {total} auctions")
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions import blobs
+
+
+class Command(BaseCommand):
+    help = "Deletes the stored auction pictures and avatars nothing refers to anymore, with their variants"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace",
+            type=float,
+            default=blobs.COLLECT_GRACE.total_seconds(),
+            help="Seconds an image stays unreferenced before it's collected",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Lists the images without deleting them")
+
+    def handle(self, *args, **options):
+        if options["grace"] < 0:
+            raise CommandError("--grace can't be negative")
+
+        collected = blobs.collect(timedelta(seconds=options["grace"]), options["dry_run"])
+        if options["verbosity"] > 1 or options["dry_run"]:
+            for name in collected:
+                self.stdout.write(f" - {name}")
+        verb = "Would collect" if options["dry_run"] else "Collected"
+        self.stdout.write(f"{verb} {len(collected)} unreferenced images")
@@ -0,0 +1,54 @@
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from auctions import blobs, caching, images
+from auctions.models import Auction, UserProfile
+from auctions.storage import blob_storage
+
+# "<upload dir>/<2 hex>/<2 hex>/<sha256><extension>", see auctions.storage
+BLOB_NAME = re.compile(r"^[^/]+/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves auction pictures and avatars stored under their upload names to content addressed "
+        "names, so duplicates share one file; collect_media then deletes the old files"
+    )
+
+    def handle(self, *args, **options):
+        storage = blob_storage()
+        moved = names = 0
+        for model, field in ((Auction, "picture"), (UserProfile, "avatar")):
+            legacy = [
+                name
+                for name in model.objects.order_by().values_list(field, flat=True).distinct()
+                if blobs.counted(name) and not BLOB_NAME.match(name)
+            ]
+            for name in legacy:
+                try:
+                    with storage.open(name) as file:
+                        stored = storage.save(name, file)
+                except FileNotFoundError:
+                    self.stderr.write(f"File not found: {name}")
+                    continue
+
+                # QuerySet.update() bypasses the signals keeping the references
+                with transaction.atomic():
+                    rows = model.objects.filter(**{field: name})
+                    pks = list(rows.values_list("pk", flat=True))
+                    count = rows.update(**{field: stored})
+                    blobs.retain(stored, count)
+                    blobs.release(name, count)
+                    images.schedule(stored)
+                if model is Auction:
+                    caching.bump("listings", *(f"auction:{pk}" for pk in pks))
+
+                names += 1
+                moved += count
+                if options["verbosity"] > 1:
+                    self.stdout.write(f" - {name} -> {stored} ({count})")
+
+        images.wait()
+        self.stdout.write(f"Moved {moved} images from {names} upload names to content addressed names")
@@ -0,0 +1,24 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions import bulk
+
+
+class Command(BaseCommand):
+    help = "Streams auctions, bids or comments as CSV or JSON Lines to stdout"
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=tuple(bulk.EXPORTS), help="What to export")
+        parser.add_argument("-f", "--format", choices=tuple(bulk.FORMATS), default="csv")
+        parser.add_argument("-o", "--owner", help="Only this username's auctions, and the bids and comments on them")
+
+    def handle(self, *args, **options):
+        owner = None
+        if options["owner"]:
+            try:
+                owner = User.objects.get(username=options["owner"])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['owner']!r} does not exist")
+
+        for chunk in bulk.export_rows(options["kind"], options["format"], owner):
+            self.stdout.write(chunk, ending="")
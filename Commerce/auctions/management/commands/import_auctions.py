@@ -0,0 +1,58 @@
+import json
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions import bulk
+
+
+class Command(BaseCommand):
+    help = "Imports auctions from a CSV or JSON Lines file, reporting the rows that fail validation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV (with a header row) or JSON Lines file, - for stdin")
+        parser.add_argument("-o", "--owner", required=True, help="Username owning the imported auctions")
+        parser.add_argument(
+            "-f", "--format", choices=tuple(bulk.FORMATS), help="Format of the file, guessed from its extension"
+        )
+        parser.add_argument(
+            "-b", "--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE, help="Auctions per insert"
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Validates the rows without inserting them")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size must be positive")
+        try:
+            owner = User.objects.get(username=options["owner"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['owner']!r} does not exist")
+
+        path = options["path"]
+        format = options["format"] or bulk.format_of(path)
+        started = time.perf_counter()
+        try:
+            if path == "-":
+                lines = bulk.text_lines(sys.stdin.buffer)
+            else:
+                lines = open(path, encoding="utf-8-sig", newline="")
+        except OSError as error:
+            raise CommandError(f"Can't read {path}: {error}")
+        with lines:
+            try:
+                report = bulk.import_auctions(
+                    bulk.read_rows(lines, format), owner, options["batch_size"], options["dry_run"]
+                )
+            except UnicodeDecodeError as error:
+                raise CommandError(f"{path} must be UTF-8 encoded: {error}")
+
+        for rejected in report.errors:
+            self.stderr.write(f"Line {rejected['line']}: {json.dumps(rejected['errors'])}")
+        elapsed = time.perf_counter() - started
+        verb = "Validated" if options["dry_run"] else "Imported"
+        self.stdout.write(
+            f"{verb} {report.created} auctions, rejected {len(report.errors)} rows in {elapsed:.1f}s"
+        )
@@ -0,0 +1,215 @@
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from auctions import notifications, stats
+from auctions.bidding import place_bid
+from auctions.models import Auction, AuctionCategories
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def summary(latencies, errors, elapsed, **counts):
+    """Throughput and latency figures of one kind of request."""
+    return {
+        "per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "errors": len(errors),
+        "error_kinds": dict(Counter(errors)),
+        **counts,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Load tests the database profile (COMMERCE_DB_PROFILE) in a throwaway database: concurrent "
+        "bidders and listing readers, reporting bids/sec and listing requests/sec; --compare runs "
+        "several profiles"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-d", "--duration", type=float, default=10, help="Seconds of load")
+        parser.add_argument("-b", "--bidders", type=int, default=8, help="Bidder threads")
+        parser.add_argument("-r", "--readers", type=int, default=8, help="Listing reader threads")
+        parser.add_argument("-a", "--auctions", type=int, default=1000, help="Auctions seeded, bids go to the first 20")
+        parser.add_argument(
+            "--compare",
+            help="Comma separated profiles of settings.DATABASE_PROFILES, each run in its own process",
+        )
+        parser.add_argument("--json", action="store_true", help="Prints the report as JSON")
+
+    def handle(self, *args, **options):
+        if options["duration"] <= 0 or options["auctions"] <= 0:
+            raise CommandError("--duration and --auctions must be positive")
+        if options["bidders"] < 0 or options["readers"] < 0 or not options["bidders"] + options["readers"]:
+            raise CommandError("--bidders and --readers can't be negative, nor both zero")
+
+        if options["compare"]:
+            self.compare(options)
+            return
+
+        # Throwaway Database, So Real Data Is Never Touched
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # Measures the database, not the anonymous page cache
+            with override_settings(PAGE_CACHE_ENABLED=False, QUERY_BUDGET_ENABLED=False):
+                report = self.load(options)
+        finally:
+            notifications.wait()
+            connection.close()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report))
+        else:
+            self.report([report])
+
+    def load(self, options):
+        owner = User.objects.create(username="load")
+        bidders = User.objects.bulk_create(User(username=f"load{i}") for i in range(options["bidders"]))
+        categories = AuctionCategories.values
+        Auction.objects.bulk_create(
+            Auction(name=f"load lot {i}", price=1.0, category=categories[i % len(categories)], owner=owner)
+            for i in range(options["auctions"])
+        )
+        stats.rebuild()
+        # Bids compete over a few busy auctions, like hot listings do
+        auction_ids = list(Auction.objects.order_by("id").values_list("id", flat=True)[:20])
+        listing = reverse("listing")
+        # Rising prices, so most bids are accepted and write
+        prices = itertools.count(2)
+
+        # Appended to by every thread, which list.append does atomically
+        bid_latencies, bid_errors, outcomes = [], [], []
+        listing_latencies, listing_errors = [], []
+        barrier = threading.Barrier(options["bidders"] + options["readers"] + 1)
+        deadline = None
+
+        def timed(latencies, errors, request):
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    request()
+                except DatabaseError as error:
+                    errors.append(str(error))
+                else:
+                    latencies.append(time.perf_counter() - started)
+                finally:
+                    # Ends the "request" like request_finished does, honoring CONN_MAX_AGE
+                    close_old_connections()
+
+        def bidder(user, seed):
+            rng = random.Random(seed)
+
+            def bid():
+                outcomes.append(place_bid(rng.choice(auction_ids), user, float(next(prices))))
+
+            barrier.wait()
+            try:
+                timed(bid_latencies, bid_errors, bid)
+            finally:
+                connection.close()
+
+        def reader(seed):
+            rng = random.Random(seed)
+            client = Client()
+
+            def get_listing():
+                response = client.get(listing, {"page": rng.randint(1, 5)})
+                if response.status_code != 200:
+                    raise DatabaseError(f"status {response.status_code}")
+
+            barrier.wait()
+            try:
+                timed(listing_latencies, listing_errors, get_listing)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=bidder, args=(user, n)) for n, user in enumerate(bidders)]
+        threads += [threading.Thread(target=reader, args=(n,)) for n in range(options["readers"])]
+        for thread in threads:
+            thread.start()
+        deadline = time.perf_counter() + options["duration"]
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        return {
+            "profile": settings.DATABASE_PROFILE,
+            "engine": connection.vendor,
+            "bidders": options["bidders"],
+            "readers": options["readers"],
+            "seconds": round(elapsed, 2),
+            "bids": summary(
+                bid_latencies, bid_errors, elapsed, accepted=outcomes.count(True), rejected=outcomes.count(False)
+            ),
+            "listing": summary(listing_latencies, listing_errors, elapsed),
+        }
+
+    def compare(self, options):
+        """Runs every profile in its own process, since settings pick it at startup."""
+        reports = []
+        arguments = [
+            "--duration", str(options["duration"]), "--bidders", str(options["bidders"]),
+            "--readers", str(options["readers"]), "--auctions", str(options["auctions"]), "--json",
+        ]
+        for profile in options["compare"].split(","):
+            profile = profile.strip()
+            if profile not in settings.DATABASE_PROFILES:
+                raise CommandError(f"Unknown profile {profile!r}, one of {', '.join(settings.DATABASE_PROFILES)}")
+            self.stderr.write(f"Load testing {profile}...")
+            process = subprocess.run(
+                [sys.executable, str(settings.BASE_DIR / "manage.py"), "load_test", *arguments],
+                env={**os.environ, "COMMERCE_DB_PROFILE": profile},
+                capture_output=True,
+                text=True,
+            )
+            if process.returncode:
+                error = (process.stderr.strip().splitlines() or ["failed"])[-1]
+                reports.append({"profile": profile, "failed": error})
+            else:
+                reports.append(json.loads(process.stdout.strip().splitlines()[-1]))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(reports))
+        else:
+            self.report(reports)
+
+    def report(self, reports):
+        self.stdout.write(
+            f"{'profile':<16} {'bids/s':>8} {'bid p50':>8} {'bid p99':>8} {'bid err':>8} "
+            f"{'list/s':>8} {'list p50':>8} {'list p99':>8} {'list err':>8}"
+        )
+        for report in reports:
+            if "failed" in report:
+                self.stdout.write(f"{report['profile']:<16} failed: {report['failed']}")
+                continue
+            bids, listing = report["bids"], report["listing"]
+            self.stdout.write(
+                f"{report['profile']:<16} {bids['per_second']:>8} {bids['p50_ms']:>8} {bids['p99_ms']:>8} "
+                f"{bids['errors']:>8} {listing['per_second']:>8} {listing['p50_ms']:>8} "
+                f"{listing['p99_ms']:>8} {listing['errors']:>8}"
+            )
+        self.stdout.write("Latencies in ms; errors include \"database is locked\" failures")
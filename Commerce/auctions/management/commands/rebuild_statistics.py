@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Max, Min
+
+from auctions import stats
+from auctions.models import Auction, AuctionStatistics
+
+
+def actual_buckets():
+    """Statistics computed from the Auction table."""
+    rows = (
+        Auction.objects.order_by()
+        .values_list("category", "status")
+        .annotate(Count("id"), Min("price"), Max("price"))
+    )
+    return {(category, status): tuple(figures) for category, status, *figures in rows}
+
+
+def stored_buckets():
+    """Statistics maintained in the AuctionStatistics table, empty buckets left out."""
+    rows = AuctionStatistics.objects.filter(count__gt=0).values_list(
+        "category", "status", "count", "min_price", "max_price"
+    )
+    return {(category, status): tuple(figures) for category, status, *figures in rows}
+
+
+class Command(BaseCommand):
+    help = "Verifies the auction statistics counters against the Auction table and rebuilds them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true", help="Only verifies, fails if the counters drifted"
+        )
+
+    def handle(self, *args, **options):
+        actual = actual_buckets()
+        stored = stored_buckets()
+
+        # Reports Drifted Buckets
+        mismatches = sorted(
+            bucket for bucket in actual.keys() | stored.keys() if actual.get(bucket) != stored.get(bucket)
+        )
+        for category, status in mismatches:
+            self.stdout.write(
+                f" - category {category}, status {status}: "
+                f"stored {stored.get((category, status))}, actual {actual.get((category, status))}"
+            )
+
+        if not mismatches:
+            self.stdout.write("Statistics are in sync!")
+            return
+
+        if options["check"]:
+            raise CommandError(f"{len(mismatches)} statistics buckets drifted!")
+
+        stats.rebuild()
+        if stored_buckets() != actual_buckets():
+            raise CommandError("Statistics still drift after rebuild!")
+        self.stdout.write(f"Rebuilt statistics, fixed {len(mismatches)} buckets")
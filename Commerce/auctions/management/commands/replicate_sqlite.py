@@ -0,0 +1,47 @@
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+
+from auctions import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Copies the SQLite primary into the SQLite replicas (COMMERCE_DB_REPLICAS) every interval, "
+        "standing in for replication locally; runs until interrupted unless --once is given"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-i", "--interval", type=float, default=2.0, help="Seconds between copies")
+        parser.add_argument("--once", action="store_true", help="Copies once, then exits")
+
+    def handle(self, *args, **options):
+        if options["interval"] <= 0:
+            raise CommandError("--interval must be positive")
+        aliases = [alias for alias in settings.DATABASE_REPLICAS if connections[alias].vendor == "sqlite"]
+        if connections["default"].vendor != "sqlite" or not aliases:
+            raise CommandError("Needs a SQLite primary and SQLite replicas in COMMERCE_DB_REPLICAS")
+
+        stopped = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *args: stopped.set())
+
+        while not stopped.is_set():
+            for alias in aliases:
+                started = time.perf_counter()
+                replicas.sync_sqlite(alias)
+                if options["verbosity"] > 1:
+                    self.stdout.write(
+                        f"Copied to {replicas.sqlite_path(alias)} in {time.perf_counter() - started:.3f}s"
+                    )
+            if options["once"]:
+                break
+            stopped.wait(options["interval"])
+            close_old_connections()
+
+        self.stdout.write(f"Replicated to {', '.join(replicas.sqlite_path(alias) for alias in aliases)}")
@@ -0,0 +1,41 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from auctions import ledger
+
+
+class Command(BaseCommand):
+    help = (
+        "Folds new bid attempts into per-minute bid rollups (bids per minute, price curve); "
+        "runs until interrupted unless --once is given"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-i", "--interval", type=float, default=10.0, help="Seconds between roll ups")
+        parser.add_argument("--once", action="store_true", help="Rolls up the new attempts, then exits")
+
+    def handle(self, *args, **options):
+        if options["interval"] <= 0:
+            raise CommandError("--interval must be positive")
+
+        stopped = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *args: stopped.set())
+
+        total = 0
+        while not stopped.is_set():
+            rolled_up = ledger.roll_up()
+            total += rolled_up
+            if rolled_up and options["verbosity"] > 1:
+                self.stdout.write(f"Rolled up {rolled_up} bid attempts")
+            if options["once"]:
+                break
+            stopped.wait(options["interval"])
+            # The connection may have outlived its lifetime while sleeping
+            close_old_connections()
+
+        self.stdout.write(f"Rolled up {total} bid attempts")
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remove_duplicate_bids(apps, schema_editor):
+    """Keeps only the highest bid of each bidder on an auction."""
+    Bid = apps.get_model("auctions", "Bid")
+    Auction = apps.get_model("auctions", "Auction")
+
+    duplicates = (
+        Bid.objects.values("auction_id", "bidder_id")
+        .annotate(total=models.Count("id"))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        bids = Bid.objects.filter(
+            auction_id=duplicate["auction_id"], bidder_id=duplicate["bidder_id"]
+        ).order_by("-price", "-id")
+        kept = bids.first()
+        # Top bids pointing to a removed duplicate move to the kept bid
+        Auction.objects.filter(top_bid__in=bids.exclude(id=kept.id)).update(top_bid=kept)
+        bids.exclude(id=kept.id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0008_alter_auction_category_alter_auction_price_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_bids, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='bid',
+            name='auctions_bi_auction_331710_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='bid',
+            constraint=models.UniqueConstraint(fields=('auction', 'bidder'), name='unique_auction_bidder'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0009_bid_unique_auction_bidder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auction',
+            name='hot',
+            field=models.BooleanField(default=False),
+        ),
+    ]
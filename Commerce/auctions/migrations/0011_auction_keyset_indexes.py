@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0010_auction_hot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auction',
+            index=models.Index(fields=['date', 'id'], name='auctions_au_date_3e4256_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auction',
+            index=models.Index(fields=['price', 'id'], name='auctions_au_price_65d126_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0011_auction_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuctionStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('1', 'Apparel and Accessories'), ('2', 'Consumer Electronics'), ('3', 'Home and Kitchen Appliances'), ('4', 'Health and Beauty'), ('5', 'Furniture and Decor'), ('6', 'Sports and Fitness'), ('7', 'Books and Media'), ('8', 'Toys and Games'), ('9', 'Food and Beverage'), ('10', 'Auto and Parts'), ('11', 'Other or Uncategorized')])),
+                ('status', models.CharField(choices=[('A', 'Active'), ('D', 'Deactive'), ('C', 'Closed')])),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('min_price', models.FloatField(blank=True, null=True)),
+                ('max_price', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Auction Statistics',
+                'verbose_name_plural': 'Auction Statistics',
+                'constraints': [models.UniqueConstraint(fields=('category', 'status'), name='unique_statistics_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:22
+
+from django.db import migrations, models
+
+
+def populate_statistics(apps, schema_editor):
+    """Counts existing auctions, later writes maintain the counters."""
+    Auction = apps.get_model("auctions", "Auction")
+    AuctionStatistics = apps.get_model("auctions", "AuctionStatistics")
+
+    rows = (
+        Auction.objects.order_by()
+        .values("category", "status")
+        .annotate(
+            count=models.Count("id"),
+            min_price=models.Min("price"),
+            max_price=models.Max("price"),
+        )
+    )
+    AuctionStatistics.objects.all().delete()
+    AuctionStatistics.objects.bulk_create(AuctionStatistics(**row) for row in rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0012_auctionstatistics'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_statistics, migrations.RunPython.noop),
+    ]
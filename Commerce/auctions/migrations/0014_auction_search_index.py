@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:26
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """FTS5 inverted index over auction names and descriptions (SQLite only)."""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS auctions_auction_fts USING fts5(name, description)"
+    )
+    # Default ranking: names weigh more than descriptions
+    schema_editor.execute(
+        "INSERT INTO auctions_auction_fts(auctions_auction_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')"
+    )
+    schema_editor.execute(
+        "INSERT INTO auctions_auction_fts(rowid, name, description) "
+        "SELECT id, name, description FROM auctions_auction"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS auctions_auction_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0013_populate_auctionstatistics'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
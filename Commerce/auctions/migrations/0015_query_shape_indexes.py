@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0014_auction_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auction',
+            name='status',
+            field=models.CharField(choices=[('A', 'Active'), ('D', 'Deactive'), ('C', 'Closed')], default='A'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='auction',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='auctions.auction'),
+        ),
+        migrations.AddIndex(
+            model_name='auction',
+            index=models.Index(condition=models.Q(('status', 'A')), fields=['status', 'date', 'id'], name='auction_active_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auction',
+            index=models.Index(fields=['category', 'date', 'id'], name='auctions_au_categor_392e46_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auction',
+            index=models.Index(fields=['status', 'category', 'date', 'id'], name='auctions_au_status_b86472_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['auction', '-date'], name='auctions_co_auction_15cef8_idx'),
+        ),
+    ]
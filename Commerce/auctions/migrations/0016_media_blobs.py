@@ -0,0 +1,53 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:57
+
+import auctions.storage
+from django.db import migrations, models
+
+
+def count_references(apps, schema_editor):
+    """Counts the references of existing images, later writes maintain them."""
+    Auction = apps.get_model("auctions", "Auction")
+    UserProfile = apps.get_model("auctions", "UserProfile")
+    MediaBlob = apps.get_model("auctions", "MediaBlob")
+
+    references = {}
+    for model, field, default in ((Auction, "picture", "auction.png"), (UserProfile, "avatar", "default.png")):
+        rows = model.objects.exclude(**{field: ""}).exclude(**{field: default}).order_by().values(field)
+        for row in rows.annotate(count=models.Count("id")):
+            references[row[field]] = references.get(row[field], 0) + row["count"]
+    MediaBlob.objects.bulk_create(MediaBlob(name=name, references=count) for name, count in references.items())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0015_query_shape_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auction',
+            name='picture',
+            field=models.ImageField(default='auction.png', storage=auctions.storage.blob_storage, upload_to='auction_images'),
+        ),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='avatar',
+            field=models.ImageField(default='default.png', storage=auctions.storage.blob_storage, upload_to='profile_images'),
+        ),
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('references', models.PositiveIntegerField(default=0)),
+                ('released', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Media Blob',
+                'verbose_name_plural': 'Media Blobs',
+                'indexes': [models.Index(condition=models.Q(('references', 0)), fields=['released'], name='media_blob_orphan_idx')],
+            },
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
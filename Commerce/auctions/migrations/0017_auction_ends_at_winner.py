@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def finalize_winners(apps, schema_editor):
+    """Auctions closed before winners were stored are won by their top bidder."""
+    Auction = apps.get_model("auctions", "Auction")
+    Bid = apps.get_model("auctions", "Bid")
+
+    top_bidder = Bid.objects.filter(pk=models.OuterRef("top_bid")).values("bidder")[:1]
+    Auction.objects.filter(status="C", top_bid__isnull=False).update(winner=models.Subquery(top_bidder))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0016_media_blobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auction',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='auction',
+            name='winner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='won_auctions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='auction',
+            index=models.Index(condition=models.Q(('ends_at__isnull', False), ('status', 'A')), fields=['status', 'ends_at', 'id'], name='auction_closing_idx'),
+        ),
+        migrations.RunPython(finalize_winners, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0017_auction_ends_at_winner'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bid',
+            name='auction',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='bid_auction', to='auctions.auction'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['auction', 'price'], name='auctions_bi_auction_70a2dc_idx'),
+        ),
+    ]
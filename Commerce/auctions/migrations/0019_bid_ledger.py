@@ -0,0 +1,56 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0018_bid_auction_price'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BidAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateTimeField(auto_now_add=True)),
+                ('price', models.FloatField()),
+                ('outcome', models.PositiveSmallIntegerField(choices=[(1, 'Accepted'), (2, 'Rejected')])),
+                ('auction', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='auctions.auction')),
+                ('bidder', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Bid Attempt',
+                'verbose_name_plural': 'Bid Attempts',
+                'indexes': [models.Index(fields=['auction', 'date'], name='auctions_bi_auction_2ad5f0_idx'), models.Index(fields=['bidder', 'date'], name='auctions_bi_bidder__d15b68_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BidRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('minute', models.DateTimeField()),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('accepted', models.PositiveIntegerField(default=0)),
+                ('low', models.FloatField(blank=True, null=True)),
+                ('high', models.FloatField(blank=True, null=True)),
+                ('last_attempt', models.BigIntegerField(db_index=True)),
+                ('auction', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='auctions.auction')),
+            ],
+            options={
+                'verbose_name': 'Bid Rollup',
+                'verbose_name_plural': 'Bid Rollups',
+                'constraints': [models.UniqueConstraint(fields=('auction', 'minute'), name='unique_bid_rollup_bucket')],
+            },
+        ),
+        # Every bidder's latest bid starts the ledger, at its original date
+        migrations.RunSQL(
+            "INSERT INTO auctions_bidattempt (date, price, outcome, auction_id, bidder_id) "
+            "SELECT date, price, 1, auction_id, bidder_id FROM auctions_bid ORDER BY date, id",
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0019_bid_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # The watch list's table becomes an explicit through model, as it is
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='WatchListEntry',
+                    fields=[
+                        ('id', models.AutoField(primary_key=True, serialize=False)),
+                        ('auction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auctions.auction')),
+                        ('userprofile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auctions.userprofile')),
+                    ],
+                    options={
+                        'verbose_name': 'Watch List Entry',
+                        'verbose_name_plural': 'Watch List Entries',
+                        'db_table': 'auctions_userprofile_watch_list',
+                        'unique_together': {('userprofile', 'auction')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='userprofile',
+                    name='watch_list',
+                    field=models.ManyToManyField(blank=True, through='auctions.WatchListEntry', to='auctions.auction'),
+                ),
+            ],
+        ),
+        # Its single column indexes give way to the (auction, userprofile) index
+        migrations.AlterField(
+            model_name='watchlistentry',
+            name='auction',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='auctions.auction'),
+        ),
+        migrations.AlterField(
+            model_name='watchlistentry',
+            name='userprofile',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='auctions.userprofile'),
+        ),
+        migrations.AddIndex(
+            model_name='watchlistentry',
+            index=models.Index(fields=['auction', 'userprofile'], name='auctions_us_auction_2ed4d6_idx'),
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'New Bid'), (2, 'Closed')])),
+                ('price', models.FloatField()),
+                ('read', models.BooleanField(default=False)),
+                ('auction', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='auctions.auction')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Notification',
+                'verbose_name_plural': 'Notifications',
+                'indexes': [models.Index(fields=['user', 'date'], name='auctions_no_user_id_14f33f_idx'), models.Index(condition=models.Q(('read', False)), fields=['user'], name='notification_unread_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:13
+
+import auctions.storage
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0020_watchers_notifications'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAuction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateTimeField()),
+                ('name', models.CharField(max_length=50)),
+                ('description', models.TextField(blank=True)),
+                ('picture', models.ImageField(default='auction.png', storage=auctions.storage.blob_storage, upload_to='auction_images')),
+                ('price', models.FloatField()),
+                ('category', models.CharField(choices=[('1', 'Apparel and Accessories'), ('2', 'Consumer Electronics'), ('3', 'Home and Kitchen Appliances'), ('4', 'Health and Beauty'), ('5', 'Furniture and Decor'), ('6', 'Sports and Fitness'), ('7', 'Books and Media'), ('8', 'Toys and Games'), ('9', 'Food and Beverage'), ('10', 'Auto and Parts'), ('11', 'Other or Uncategorized')], default='11')),
+                ('status', models.CharField(choices=[('A', 'Active'), ('D', 'Deactive'), ('C', 'Closed')], default='C')),
+                ('ends_at', models.DateTimeField(blank=True, null=True)),
+                ('period', models.DateField()),
+                ('archived', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archived Auction',
+                'verbose_name_plural': 'Archived Auctions',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedBid',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateTimeField()),
+                ('price', models.FloatField()),
+            ],
+            options={
+                'verbose_name': 'Archived Bid',
+                'verbose_name_plural': 'Archived Bids',
+                'ordering': ('price',),
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateTimeField()),
+                ('text', models.CharField(max_length=600)),
+            ],
+            options={
+                'verbose_name': 'Archived Comment',
+                'verbose_name_plural': 'Archived Comments',
+                'ordering': ('-date',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['auction'], name='auctions_no_auction_1dd376_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedauction',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_auctions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedauction',
+            name='winner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='won_archived_auctions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedbid',
+            name='auction',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bids', to='auctions.archivedauction'),
+        ),
+        migrations.AddField(
+            model_name='archivedbid',
+            name='bidder',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bids', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='auction',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='auctions.archivedauction'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='commenter',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='archivedauction',
+            index=models.Index(fields=['period'], name='auctions_ar_period_d7e29b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['auction', '-date'], name='auctions_ar_auction_bc1ab2_idx'),
+        ),
+    ]
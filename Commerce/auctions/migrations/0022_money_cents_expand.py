@@ -0,0 +1,184 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:25
+
+"""
+Prices move from float columns to integer cents columns (auctions.money) in
+three steps, so the previous release keeps serving while they run:
+
+0022 (expand) adds a nullable <column>_cents next to every float price
+column, makes the float columns nullable (rows written by this release
+don't set them), indexes the cents columns and installs triggers copying
+each write to either column into the other one.
+
+0023 (backfill) fills the cents columns of existing rows in batches,
+committing each one.
+
+0024 (contract) drops the triggers and float columns and makes the cents
+columns NOT NULL; run it once no process of the previous release is left:
+    python manage.py migrate auctions 0023
+    (deploy, wait for the previous release to drain)
+    python manage.py migrate auctions
+"""
+
+import auctions.money
+from django.db import migrations, models
+
+# Float price columns per model, with whether they're nullable
+MONEY_COLUMNS = {
+    "auction": {"price": False},
+    "bid": {"price": False},
+    "auctionstatistics": {"min_price": True, "max_price": True},
+    "bidattempt": {"price": False},
+    "bidrollup": {"low": True, "high": True},
+    "notification": {"price": False},
+    "archivedauction": {"price": False},
+    "archivedbid": {"price": False},
+}
+
+SQLITE_TRIGGERS = (
+    # Inserts of the previous release set the float, this release's the cents
+    """CREATE TRIGGER {name}_insert_cents AFTER INSERT ON {table}
+    WHEN NEW.{cents} IS NULL AND NEW.{column} IS NOT NULL
+    BEGIN UPDATE {table} SET {cents} = CAST(ROUND(NEW.{column} * 100) AS INTEGER) WHERE id = NEW.id; END""",
+    """CREATE TRIGGER {name}_insert_float AFTER INSERT ON {table}
+    WHEN NEW.{column} IS NULL AND NEW.{cents} IS NOT NULL
+    BEGIN UPDATE {table} SET {column} = NEW.{cents} / 100.0 WHERE id = NEW.id; END""",
+    # Each update copies the other way only while the two differ, so they stop there
+    """CREATE TRIGGER {name}_update_cents AFTER UPDATE OF {column} ON {table}
+    WHEN NEW.{cents} IS NOT CAST(ROUND(NEW.{column} * 100) AS INTEGER)
+    BEGIN UPDATE {table} SET {cents} = CAST(ROUND(NEW.{column} * 100) AS INTEGER) WHERE id = NEW.id; END""",
+    """CREATE TRIGGER {name}_update_float AFTER UPDATE OF {cents} ON {table}
+    WHEN CAST(ROUND(NEW.{column} * 100) AS INTEGER) IS NOT NEW.{cents}
+    BEGIN UPDATE {table} SET {column} = NEW.{cents} / 100.0 WHERE id = NEW.id; END""",
+)
+
+POSTGRESQL_TRIGGER = """
+CREATE FUNCTION {name}_sync() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.{cents} IS NULL THEN
+            NEW.{cents} := round(NEW.{column} * 100);
+        ELSIF NEW.{column} IS NULL THEN
+            NEW.{column} := NEW.{cents} / 100.0;
+        END IF;
+    ELSIF NEW.{column} IS DISTINCT FROM OLD.{column} THEN
+        NEW.{cents} := round(NEW.{column} * 100);
+    ELSIF NEW.{cents} IS DISTINCT FROM OLD.{cents} THEN
+        NEW.{column} := NEW.{cents} / 100.0;
+    END IF;
+    RETURN NEW;
+END $$ LANGUAGE plpgsql;
+CREATE TRIGGER {name}_sync BEFORE INSERT OR UPDATE ON {table} FOR EACH ROW EXECUTE FUNCTION {name}_sync();
+"""
+
+
+def money_columns(apps):
+    """(table, float column, cents column, trigger name prefix) of every price column."""
+    for model_name, columns in MONEY_COLUMNS.items():
+        table = apps.get_model("auctions", model_name)._meta.db_table
+        for column in columns:
+            yield table, column, f"{column}_cents", f"{table}_{column}"
+
+
+def create_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, column, cents, name in money_columns(apps):
+        names = {"table": table, "column": column, "cents": cents, "name": name}
+        if vendor == "sqlite":
+            for trigger in SQLITE_TRIGGERS:
+                schema_editor.execute(trigger.format(**names))
+        elif vendor == "postgresql":
+            schema_editor.execute(POSTGRESQL_TRIGGER.format(**names))
+        else:
+            raise NotImplementedError(f"Price columns can't be kept in sync on {vendor}")
+
+
+def drop_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, column, cents, name in money_columns(apps):
+        if vendor == "sqlite":
+            for suffix in ("insert_cents", "insert_float", "update_cents", "update_float"):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}_{suffix}")
+        elif vendor == "postgresql":
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}_sync ON {table}")
+            schema_editor.execute(f"DROP FUNCTION IF EXISTS {name}_sync()")
+
+
+def database_operations():
+    operations = []
+    for model_name, columns in MONEY_COLUMNS.items():
+        for column, nullable in columns.items():
+            float_field = models.FloatField(blank=nullable, null=True, db_index=model_name == "auction")
+            if not nullable:
+                operations.append(migrations.AlterField(model_name=model_name, name=column, field=float_field))
+            operations.append(
+                migrations.AddField(
+                    model_name=model_name,
+                    name=f"{column}_cents",
+                    field=models.BigIntegerField(blank=nullable, null=True, db_index=model_name == "auction"),
+                )
+            )
+    operations += [
+        migrations.AddIndex(
+            model_name="auction",
+            index=models.Index(fields=["status", "category", "price_cents"], name="auction_filter_price_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="auction",
+            index=models.Index(fields=["price_cents", "id"], name="auction_price_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="bid",
+            index=models.Index(fields=["auction", "price_cents"], name="bid_auction_price_idx"),
+        ),
+        # Last, SQLite drops triggers with the tables it rebuilds to alter them
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
+    return operations
+
+
+def state_operations():
+    operations = [
+        migrations.RemoveIndex(model_name="auction", name="auctions_au_status_874074_idx"),
+        migrations.RemoveIndex(model_name="auction", name="auctions_au_price_65d126_idx"),
+        migrations.RemoveIndex(model_name="bid", name="auctions_bi_auction_70a2dc_idx"),
+    ]
+    for model_name, columns in MONEY_COLUMNS.items():
+        for column, nullable in columns.items():
+            operations.append(
+                migrations.AlterField(
+                    model_name=model_name,
+                    name=column,
+                    field=auctions.money.MoneyField(
+                        blank=nullable, null=nullable, db_column=f"{column}_cents", db_index=model_name == "auction"
+                    ),
+                )
+            )
+    operations += [
+        migrations.AddIndex(
+            model_name="auction",
+            index=models.Index(fields=["status", "category", "price"], name="auction_filter_price_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="auction",
+            index=models.Index(fields=["price", "id"], name="auction_price_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="bid",
+            index=models.Index(fields=["auction", "price"], name="bid_auction_price_idx"),
+        ),
+    ]
+    return operations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0021_archive'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=database_operations(),
+            state_operations=state_operations(),
+        ),
+    ]
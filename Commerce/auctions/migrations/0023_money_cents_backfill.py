@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:25
+
+from django.db import migrations
+
+# Rows per UPDATE, each committed on its own so writers are never held up for long
+BATCH_SIZE = 10000
+
+# Float price columns per table
+MONEY_COLUMNS = {
+    "auctions_auction": ("price",),
+    "auctions_bid": ("price",),
+    "auctions_auctionstatistics": ("min_price", "max_price"),
+    "auctions_bidattempt": ("price",),
+    "auctions_bidrollup": ("low", "high"),
+    "auctions_notification": ("price",),
+    "auctions_archivedauction": ("price",),
+    "auctions_archivedbid": ("price",),
+}
+
+
+def backfill(apps, schema_editor):
+    """Fills the cents columns of the rows written before the sync triggers, in primary key ranges."""
+    connection = schema_editor.connection
+    quote = schema_editor.quote_name
+    for table, columns in MONEY_COLUMNS.items():
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT MIN(id), MAX(id) FROM {quote(table)}")
+            low, high = cursor.fetchone()
+        if low is None:
+            continue
+        assignments = ", ".join(
+            f"{quote(column + '_cents')} = CAST(ROUND({quote(column)} * 100) AS BIGINT)" for column in columns
+        )
+        missing = " OR ".join(
+            f"({quote(column + '_cents')} IS NULL AND {quote(column)} IS NOT NULL)" for column in columns
+        )
+        # Idempotent, so a backfill that was interrupted just runs again
+        statement = f"UPDATE {quote(table)} SET {assignments} WHERE id >= %s AND id < %s AND ({missing})"
+        for start in range(low, high + 1, BATCH_SIZE):
+            with connection.cursor() as cursor:
+                cursor.execute(statement, [start, start + BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+
+    # A transaction per batch rather than one holding every row
+    atomic = False
+
+    dependencies = [
+        ('auctions', '0022_money_cents_expand'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop, atomic=False),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:25
+
+from django.db import migrations
+
+# Float price columns per model, with whether they're nullable
+MONEY_COLUMNS = {
+    "auction": {"price": False},
+    "bid": {"price": False},
+    "auctionstatistics": {"min_price": True, "max_price": True},
+    "bidattempt": {"price": False},
+    "bidrollup": {"low": True, "high": True},
+    "notification": {"price": False},
+    "archivedauction": {"price": False},
+    "archivedbid": {"price": False},
+}
+
+
+def contract(apps, schema_editor):
+    """
+    Drops the sync triggers and the float price columns, and makes the cents columns NOT NULL.
+
+    Only once no process of the previous release, which writes the float
+    columns, is left.
+    """
+    connection = schema_editor.connection
+    introspection = connection.introspection
+    for model_name, columns in MONEY_COLUMNS.items():
+        model = apps.get_model("auctions", model_name)
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            existing = {column.name for column in introspection.get_table_description(cursor, table)}
+            constraints = introspection.get_constraints(cursor, table)
+        for column, nullable in columns.items():
+            if connection.vendor == "postgresql":
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {table}_{column}_sync ON {table}")
+                schema_editor.execute(f"DROP FUNCTION IF EXISTS {table}_{column}_sync()")
+            else:
+                for suffix in ("insert_cents", "insert_float", "update_cents", "update_float"):
+                    schema_editor.execute(f"DROP TRIGGER IF EXISTS {table}_{column}_{suffix}")
+            if column not in existing:
+                continue
+            # Indexes of the float column, which SQLite won't drop it under
+            for name, constraint in constraints.items():
+                if constraint["index"] and column in constraint["columns"]:
+                    schema_editor.execute(schema_editor._delete_index_sql(model, name))
+            schema_editor.execute(
+                f"ALTER TABLE {schema_editor.quote_name(table)} DROP COLUMN {schema_editor.quote_name(column)}"
+            )
+        for column, nullable in columns.items():
+            if nullable:
+                continue
+            # Left nullable by 0022, for rows the previous release inserted before the triggers set them
+            field = model._meta.get_field(column)
+            old_field = field.clone()
+            old_field.null = True
+            old_field.set_attributes_from_name(column)
+            schema_editor.alter_field(model, old_field, field)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0023_money_cents_backfill'),
+    ]
+
+    operations = [
+        migrations.RunPython(contract),
+    ]
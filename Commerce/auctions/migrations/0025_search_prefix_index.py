@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-18 04:10
+
+from django.db import migrations
+
+# Last words of a query match as prefixes (auctions.search); FTS5 reads prefixes
+# of these lengths from their own index instead of merging every term's postings
+PREFIX_LENGTHS = "2 3 4"
+
+
+def recreate_search_index(options):
+    """Rebuilds the FTS5 index with the given table options (SQLite only)."""
+
+    def recreate(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        schema_editor.execute("DROP TABLE IF EXISTS auctions_auction_fts")
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE auctions_auction_fts USING fts5(name, description{options})"
+        )
+        # Default ranking: names weigh more than descriptions
+        schema_editor.execute(
+            "INSERT INTO auctions_auction_fts(auctions_auction_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')"
+        )
+        schema_editor.execute(
+            "INSERT INTO auctions_auction_fts(rowid, name, description) "
+            "SELECT id, name, description FROM auctions_auction"
+        )
+
+    return recreate
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0024_money_cents_contract'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            recreate_search_index(f", prefix='{PREFIX_LENGTHS}'"), recreate_search_index("")
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-18 04:40
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def end_closed_auctions(apps, schema_editor):
+    """
+    Ends the auctions closed by hand without an end time now.
+
+    The archive only ages auctions by their end time (auctions.archive); when
+    these closed isn't known, so they're archived ARCHIVE_AFTER_DAYS from now.
+    """
+    Auction = apps.get_model("auctions", "Auction")
+    Auction.objects.filter(status="C", ends_at__isnull=True).update(ends_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0025_search_prefix_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(end_closed_auctions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 04:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0026_end_closed_auctions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['date', 'id'], name='comment_date_id_idx'),
+        ),
+    ]
@@ -1,8 +1,15 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 # User Management Requirements
 from django.contrib.auth.models import User
 
+# Content Addressed Media Storage
+from auctions.storage import blob_storage
+
+# Prices In Integer Cents
+from auctions.money import MoneyField
+
 
 ''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
 # UserProfile
@@ -11,15 +18,54 @@ class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, db_index=True)
 
     # Specs
-    avatar = models.ImageField(default="default.png", upload_to="profile_images")
+    avatar = models.ImageField(default="default.png", upload_to="profile_images", storage=blob_storage)
     bio = models.CharField(max_length=300, blank=True)
 
     # Personal Contents
-    watch_list = models.ManyToManyField("Auction", blank=True)
+    watch_list = models.ManyToManyField("Auction", blank=True, through="WatchListEntry")
     
     def __str__(self):
         return f"Username: {self.user.username}"
 
+    # Avatar references (auctions.blobs) are counted by signals in the same transaction
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+
+class WatchListEntry(models.Model):
+    '''
+    An auction on a user's watch list, the through table of UserProfile.watch_list.
+
+    Looked up by user through the unique (userprofile, auction) index, and by
+    auction through the (auction, userprofile) index, which resolves an
+    auction's watchers in profile order without reading the table
+    (auctions.notifications).
+    '''
+
+    # The integer key of the original table
+    id = models.AutoField(primary_key=True)
+
+    # Relations
+    userprofile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, db_index=False)
+    auction = models.ForeignKey("Auction", on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        '''Meta definition for WatchListEntry.'''
+        # Kept from the table Django created for the plain ManyToManyField
+        db_table = "auctions_userprofile_watch_list"
+        unique_together = [("userprofile", "auction")]
+        # An Auction's Watchers (auctions.notifications)
+        indexes = [
+            models.Index(fields=['auction', 'userprofile']),
+        ]
+
+        verbose_name = 'Watch List Entry'
+        verbose_name_plural = 'Watch List Entries'
+
+    def __str__(self):
+        return f"{self.userprofile_id}: {self.auction_id}"
+
 
 ''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
 # Text Choices For Auction's Categories
@@ -51,16 +97,24 @@ class Auction(models.Model):
     date = models.DateTimeField(auto_now_add=True)
     name = models.CharField(max_length=50)
     description = models.TextField(blank=True)
-    picture = models.ImageField(default="auction.png", upload_to="auction_images")
-    price = models.FloatField(db_index=True)
+    picture = models.ImageField(default="auction.png", upload_to="auction_images", storage=blob_storage)
+    # Integer cents (auctions.money), in a column of its own so the float one retired without downtime
+    price = MoneyField(db_index=True, db_column="price_cents")
     category = models.CharField(
         choices=AuctionCategories, default=AuctionCategories.OTHER, db_index=True
     )
-    status = models.CharField(choices=AuctionStatus, default=AuctionStatus.ACTIVE, db_index=True)
+    # Indexed by the composite and partial indexes below
+    status = models.CharField(choices=AuctionStatus, default=AuctionStatus.ACTIVE)
+    # Hot auctions are served from the in-process bid book (auctions.bidbook)
+    hot = models.BooleanField(default=False)
+    # Bids are refused past the end time, the close_auctions command closes it (auctions.closing)
+    ends_at = models.DateTimeField(blank=True, null=True)
 
     # Relations
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
     top_bid = models.ForeignKey("Bid", blank=True, null=True, on_delete=models.SET_NULL, related_name="auction_top_bid")
+    # The top bidder when the auction closed
+    winner = models.ForeignKey(User, blank=True, null=True, on_delete=models.SET_NULL, related_name="won_auctions")
         
 
     class Meta:
@@ -70,7 +124,26 @@ class Auction(models.Model):
         # Indexing
         indexes = [
             # For Filtering
-            models.Index(fields=['status', 'category', 'price']),
+            models.Index(fields=['status', 'category', 'price'], name='auction_filter_price_idx'),
+            # For Keyset Pagination Seeks (auctions.pagination)
+            models.Index(fields=['date', 'id']),
+            models.Index(fields=['price', 'id'], name='auction_price_id_idx'),
+            # For Date Ordered Listings Without A Sort (auctions.audit)
+            # Active auctions only, status leads so it's chosen as an equality seek
+            models.Index(
+                fields=['status', 'date', 'id'],
+                condition=models.Q(status=AuctionStatus.ACTIVE),
+                name='auction_active_date_idx',
+            ),
+            models.Index(fields=['category', 'date', 'id']),
+            models.Index(fields=['status', 'category', 'date', 'id']),
+            # For Closing Due Auctions In End Time Order (auctions.closing)
+            # Status leads for the same reason as above
+            models.Index(
+                fields=['status', 'ends_at', 'id'],
+                condition=models.Q(status=AuctionStatus.ACTIVE, ends_at__isnull=False),
+                name='auction_closing_idx',
+            ),
         ]
         
         verbose_name = "Auction"
@@ -79,20 +152,21 @@ class Auction(models.Model):
     def __str__(self):
         return f"{self.name}: {self.price}"
 
-    # Updates top_bid and price for every higher bid
-    def top_bid_handler(self, new_bid):
-        '''
-            Return True if: Conditions Met, False other wise
-            Updates price and top_bid
-        '''
-        if new_bid.price <= self.price:
-            return False
-        
-        new_bid.save()
-        self.price = new_bid.price
-        self.top_bid = new_bid
-        self.save()
-        return True
+    # Statistics counters (auctions.stats) are updated by signals in the same transaction,
+    # deletes are already atomic
+    def save(self, *args, **kwargs):
+        self.end_if_closed()
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+    def end_if_closed(self, now=None):
+        """Ends a closed auction now unless it already ended; the archive ages it from then (auctions.archive)."""
+        if self.status == AuctionStatus.CLOSED:
+            now = now or timezone.now()
+            if self.ends_at is None or self.ends_at > now:
+                self.ends_at = now
+
+    # Bids are accepted by auctions.bidding.place_bid
             
             
 ''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
@@ -101,19 +175,24 @@ class Bid(models.Model):
     
     # Specification
     date = models.DateTimeField(auto_now_add=True)
-    price = models.FloatField()
+    price = MoneyField(db_column="price_cents")
     
     # Relations
     bidder = models.ForeignKey(User, on_delete=models.CASCADE)
-    auction = models.ForeignKey(Auction, on_delete=models.CASCADE, related_name="bid_auction")
+    # Looked up through the (auction, bidder) and (auction, price) indexes
+    auction = models.ForeignKey(Auction, on_delete=models.CASCADE, related_name="bid_auction", db_index=False)
     
     class Meta:
         '''Meta definition for Bid.'''
         ordering = ("price",)
 
-        # Indexes
+        # One Bid Per Bidder On Each Auction (Also Serves As The Lookup Index)
+        constraints = [
+            models.UniqueConstraint(fields=['auction', 'bidder'], name='unique_auction_bidder'),
+        ]
+        # An Auction's Bids By Price, Which Is The Order They Were Placed In (auctions.api)
         indexes = [
-            models.Index(fields=['auction', 'bidder']),
+            models.Index(fields=['auction', 'price'], name='bid_auction_price_idx'),
         ]
         
         verbose_name = 'Bid'
@@ -133,7 +212,8 @@ class Comment(models.Model):
     
     # Relations
     commenter = models.ForeignKey(User, on_delete=models.CASCADE)
-    auction = models.ForeignKey(Auction, on_delete=models.CASCADE , db_index=True)
+    # Looked up through the (auction, -date) index
+    auction = models.ForeignKey(Auction, on_delete=models.CASCADE, db_index=False)
     
     
     
@@ -141,8 +221,301 @@ class Comment(models.Model):
         '''Meta definition for Comment.'''
         ordering = ("-date",)
 
+        # An Auction's Latest Comments, And All Of Them (Admin)
+        indexes = [
+            models.Index(fields=['auction', '-date']),
+            models.Index(fields=['date', 'id'], name='comment_date_id_idx'),
+        ]
+
         verbose_name = 'Comment'
         verbose_name_plural = 'Comments'
 
     def __str__(self):
-        return f"{self.commenter.username}: {self.text}"
\ No newline at end of file
+        return f"{self.commenter.username}: {self.text}"
+
+''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
+class AuctionStatistics(models.Model):
+    '''
+    Price bounds and auctions count of one (category, status) bucket.
+
+    Maintained by auctions.stats; global and per-category figures are folded
+    from the buckets.
+    '''
+
+    # Bucket
+    category = models.CharField(choices=AuctionCategories)
+    status = models.CharField(choices=AuctionStatus)
+
+    # Statistics
+    count = models.PositiveIntegerField(default=0)
+    min_price = MoneyField(blank=True, null=True, db_column="min_price_cents")
+    max_price = MoneyField(blank=True, null=True, db_column="max_price_cents")
+
+    class Meta:
+        '''Meta definition for AuctionStatistics.'''
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'status'], name='unique_statistics_bucket'),
+        ]
+
+        verbose_name = 'Auction Statistics'
+        verbose_name_plural = 'Auction Statistics'
+
+    def __str__(self):
+        return f"{self.get_category_display()} / {self.get_status_display()}: {self.count}"
+
+
+''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
+class MediaBlob(models.Model):
+    '''
+    References to one stored auction picture or avatar.
+
+    Maintained by auctions.blobs; rows without references are orphans the
+    collect_media command deletes with their files.
+    '''
+
+    name = models.CharField(max_length=100, unique=True)
+    references = models.PositiveIntegerField(default=0)
+    released = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        '''Meta definition for MediaBlob.'''
+        indexes = [
+            # Orphans only, so collecting them never reads referenced rows
+            models.Index(
+                fields=['released'],
+                condition=models.Q(references=0),
+                name='media_blob_orphan_idx',
+            ),
+        ]
+
+        verbose_name = 'Media Blob'
+        verbose_name_plural = 'Media Blobs'
+
+    def __str__(self):
+        return f"{self.name}: {self.references}"
+
+
+''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
+# Outcomes Of Bid Attempts
+class BidOutcome(models.IntegerChoices):
+    ACCEPTED = 1, "Accepted"
+    REJECTED = 2, "Rejected"
+
+
+class BidAttempt(models.Model):
+    '''
+    Append-only ledger of every bid attempt and its outcome.
+
+    Written by auctions.ledger and never updated, unlike Bid which keeps
+    each bidder's latest bid; rows have no default ordering and only the two
+    history indexes, so inserts stay cheap.
+    '''
+
+    # Specification
+    date = models.DateTimeField(auto_now_add=True)
+    price = MoneyField(db_column="price_cents")
+    outcome = models.PositiveSmallIntegerField(choices=BidOutcome)
+
+    # Relations, looked up through the history indexes below
+    auction = models.ForeignKey(Auction, on_delete=models.CASCADE, db_index=False)
+    bidder = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        '''Meta definition for BidAttempt.'''
+        # Per Auction And Per Bidder Histories
+        indexes = [
+            models.Index(fields=['auction', 'date']),
+            models.Index(fields=['bidder', 'date']),
+        ]
+
+        verbose_name = 'Bid Attempt'
+        verbose_name_plural = 'Bid Attempts'
+
+    def __str__(self):
+        return f"{self.auction_id}: {self.price} ({self.get_outcome_display()})"
+
+
+class BidRollup(models.Model):
+    '''
+    Bid attempts of an auction in one minute, precomputed for charts.
+
+    Maintained by auctions.ledger.roll_up from the attempts after the
+    highest last_attempt.
+    '''
+
+    # Bucket
+    auction = models.ForeignKey(Auction, on_delete=models.CASCADE, db_index=False)
+    minute = models.DateTimeField()
+
+    # Figures
+    attempts = models.PositiveIntegerField(default=0)
+    accepted = models.PositiveIntegerField(default=0)
+    # Price curve: lowest and highest accepted price of the minute
+    low = MoneyField(blank=True, null=True, db_column="low_cents")
+    high = MoneyField(blank=True, null=True, db_column="high_cents")
+    # Latest BidAttempt id rolled up into the bucket
+    last_attempt = models.BigIntegerField(db_index=True)
+
+    class Meta:
+        '''Meta definition for BidRollup.'''
+        constraints = [
+            models.UniqueConstraint(fields=['auction', 'minute'], name='unique_bid_rollup_bucket'),
+        ]
+
+        verbose_name = 'Bid Rollup'
+        verbose_name_plural = 'Bid Rollups'
+
+    def __str__(self):
+        return f"{self.auction_id} @ {self.minute:%Y-%m-%d %H:%M}: {self.attempts}"
+
+
+''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
+# Events Watchers Are Notified Of
+class NotificationKind(models.IntegerChoices):
+    BID = 1, "New Bid"
+    CLOSED = 2, "Closed"
+
+
+class Notification(models.Model):
+    '''
+    An inbox entry of a user about an auction on their watch list.
+
+    Written in bulk by auctions.notifications when a bid is accepted or the
+    auction closes; rows have no default ordering and only the inbox and
+    unread indexes.
+    '''
+
+    # Specification
+    # Not auto_now_add, so one fan-out shares a date
+    date = models.DateTimeField(default=timezone.now)
+    kind = models.PositiveSmallIntegerField(choices=NotificationKind)
+    # The new price, or the final price of a closed auction
+    price = MoneyField(db_column="price_cents")
+    read = models.BooleanField(default=False)
+
+    # Relations, looked up through the indexes below
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    auction = models.ForeignKey(Auction, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        '''Meta definition for Notification.'''
+        indexes = [
+            # A User's Inbox, Newest First
+            models.Index(fields=['user', 'date']),
+            # Unread Counts Only Read Unread Rows
+            models.Index(fields=['user'], condition=models.Q(read=False), name='notification_unread_idx'),
+            # An Auction's Notifications, Deleted With It (auctions.archive)
+            models.Index(fields=['auction']),
+        ]
+
+        verbose_name = 'Notification'
+        verbose_name_plural = 'Notifications'
+
+    def __str__(self):
+        return f"{self.user_id}: {self.auction_id} {self.get_kind_display()} ({self.price})"
+
+
+''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
+class ArchivedAuction(models.Model):
+    '''
+    A closed auction moved out of the Auction table by auctions.archive.
+
+    Keeps the auction's id, so its page and links keep working (views.auction
+    falls back to it), and the fields the page shows. Rows are partitioned by
+    period, the month the auction ended, which is what whole months are
+    purged by.
+    '''
+
+    # The Auction's id
+    id = models.BigIntegerField(primary_key=True)
+
+    # Specification
+    date = models.DateTimeField()
+    name = models.CharField(max_length=50)
+    description = models.TextField(blank=True)
+    # Keeps the picture's reference (auctions.blobs) until purged
+    picture = models.ImageField(default="auction.png", upload_to="auction_images", storage=blob_storage)
+    price = MoneyField(db_column="price_cents")
+    category = models.CharField(choices=AuctionCategories, default=AuctionCategories.OTHER)
+    status = models.CharField(choices=AuctionStatus, default=AuctionStatus.CLOSED)
+    ends_at = models.DateTimeField(blank=True, null=True)
+
+    # Archiving
+    # First day of the month the auction ended
+    period = models.DateField()
+    archived = models.DateTimeField(auto_now_add=True)
+
+    # Relations
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_auctions")
+    winner = models.ForeignKey(
+        User, blank=True, null=True, on_delete=models.SET_NULL, related_name="won_archived_auctions"
+    )
+
+    class Meta:
+        '''Meta definition for ArchivedAuction.'''
+        # Whole Periods Are Purged
+        indexes = [
+            models.Index(fields=['period']),
+        ]
+
+        verbose_name = 'Archived Auction'
+        verbose_name_plural = 'Archived Auctions'
+
+    def __str__(self):
+        return f"{self.name}: {self.price}"
+
+
+class ArchivedBid(models.Model):
+    '''A bid of an archived auction, with the Bid's id.'''
+
+    # The Bid's id
+    id = models.BigIntegerField(primary_key=True)
+
+    # Specification
+    date = models.DateTimeField()
+    price = MoneyField(db_column="price_cents")
+
+    # Relations
+    bidder = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_bids")
+    auction = models.ForeignKey(ArchivedAuction, on_delete=models.CASCADE, related_name="bids")
+
+    class Meta:
+        '''Meta definition for ArchivedBid.'''
+        ordering = ("price",)
+
+        verbose_name = 'Archived Bid'
+        verbose_name_plural = 'Archived Bids'
+
+    def __str__(self):
+        return f"{self.auction_id}: {self.price}"
+
+
+class ArchivedComment(models.Model):
+    '''A comment of an archived auction, with the Comment's id.'''
+
+    # The Comment's id
+    id = models.BigIntegerField(primary_key=True)
+
+    # Specification
+    date = models.DateTimeField()
+    text = models.CharField(max_length=600)
+
+    # Relations
+    commenter = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_comments")
+    # Looked up through the (auction, -date) index
+    auction = models.ForeignKey(ArchivedAuction, on_delete=models.CASCADE, db_index=False, related_name="comments")
+
+    class Meta:
+        '''Meta definition for ArchivedComment.'''
+        ordering = ("-date",)
+
+        # An Archived Auction's Latest Comments
+        indexes = [
+            models.Index(fields=['auction', '-date']),
+        ]
+
+        verbose_name = 'Archived Comment'
+        verbose_name_plural = 'Archived Comments'
+
+    def __str__(self):
+        return f"{self.commenter_id}: {self.text}"
@@ -0,0 +1,120 @@
+"""
+Prices as integer cents.
+
+Prices are stored as integer minor units (MoneyField, a BIGINT column), so
+comparisons in SQL, like a bid topping the auction's price or a listing's
+price range, are exact integer comparisons seeking integer indexes. In
+Python they're Decimals with two places, which add, compare and render
+exactly; amount() turns submitted text (or a float from older callers) into
+one without going through binary floating point.
+
+Prices are bounded by the BIGINT column: amount() rejects anything beyond
+MAX_PRICE (2**63 - 1 cents) with a ValueError, and MoneyField's form field
+validates against it.
+
+JSON has no decimal type: MoneyJSONEncoder writes prices as numbers, that is
+doubles, which hold any decimal of up to 15 significant digits exactly, so
+prices below 10**13 round trip exactly; larger ones come out as the nearest
+double.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django import forms
+from django.core import exceptions
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+CENT = Decimal("0.01")
+# Largest price a BIGINT column of cents holds
+MAX_CENTS = 2**63 - 1
+MAX_PRICE = Decimal(MAX_CENTS).scaleb(-2)
+
+
+def amount(value):
+    """
+    A price as a Decimal with two places, rounding half cents up.
+
+    Args:
+        value (str, int, float or Decimal): The price, e.g. submitted text.
+
+    Raises:
+        ValueError: If it isn't a finite number, or is beyond MAX_PRICE.
+    """
+    if isinstance(value, float):
+        # The shortest text of the float, so 0.1 is 0.10 rather than 0.1000000000000000055
+        value = repr(value)
+    try:
+        # Too many digits fail to quantize too
+        price = Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+    except (InvalidOperation, TypeError, ValueError):
+        raise ValueError(f"Not a price: {value!r}")
+    if not price.is_finite():
+        raise ValueError(f"Not a price: {value!r}")
+    if abs(price) > MAX_PRICE:
+        raise ValueError(f"Price out of range: {value!r}")
+    return price
+
+
+def to_cents(value):
+    """A price as integer cents."""
+    return int(amount(value).scaleb(2))
+
+
+def from_cents(cents):
+    """Integer cents as a price."""
+    return Decimal(cents).scaleb(-2)
+
+
+class MoneyField(models.Field):
+    """A price stored as integer cents in a BIGINT column, a two-place Decimal in Python."""
+
+    description = "Price in integer cents"
+    default_error_messages = {
+        "invalid": "“%(value)s” value must be a price.",
+    }
+
+    def get_internal_type(self):
+        # Integer column, with the plain lookups, so price__gte=10.5 isn't rounded like IntegerField does
+        return "BigIntegerField"
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else from_cents(value)
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        try:
+            return amount(value)
+        except ValueError:
+            raise exceptions.ValidationError(self.error_messages["invalid"], code="invalid", params={"value": value})
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None:
+            return None
+        try:
+            return to_cents(value)
+        except ValueError as error:
+            raise ValueError(f"Field '{self.name}' expected a price but got {value!r}.") from error
+
+    def formfield(self, **kwargs):
+        return super().formfield(
+            **{
+                "form_class": forms.DecimalField,
+                "max_digits": len(str(MAX_CENTS)),
+                "decimal_places": 2,
+                "max_value": MAX_PRICE,
+                "min_value": -MAX_PRICE,
+                **kwargs,
+            }
+        )
+
+
+class MoneyJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder writing prices (Decimals) as numbers instead of strings."""
+
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return super().default(o)
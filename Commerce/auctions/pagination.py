@@ -0,0 +1,196 @@
+"""
+Keyset (seek) pagination.
+
+Instead of OFFSET, every page continues from the sort key of the previous
+page's boundary row, ``WHERE key >= last_key AND (key > last_key OR id > last_id)``.
+The leading range on ``key`` lets an index on ``(key, id)`` seek straight to the
+boundary. Deep pages cost the same as the first
+one, and no COUNT is issued unless it is explicitly requested.
+
+Also provides CountedPaginator, a page number paginator that is handed its
+total instead of issuing a COUNT, and CappedPaginator, one that counts up to a
+cap.
+"""
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+# Prices In Integer Cents
+from auctions.money import amount
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    # Prices (auctions.money) as exact text
+    return str(value) if isinstance(value, Decimal) else value
+
+
+def encode_cursor(direction, key, pk):
+    """Returns an opaque cursor token for a page boundary."""
+    data = json.dumps([direction, _encode(key), pk], separators=(",", ":"))
+    return urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Returns (direction, key, pk) of a cursor token."""
+    try:
+        padding = "=" * (-len(token) % 4)
+        direction, key, pk = json.loads(urlsafe_b64decode(token + padding))
+    except (BinasciiError, ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidCursor("Malformed cursor")
+    if direction not in ("next", "prev") or not isinstance(pk, int):
+        raise InvalidCursor("Malformed cursor")
+    return direction, key, pk
+
+
+class KeysetPage:
+    """A page of a KeysetPaginator; iterable like django's Page."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def _cursor(self, direction, obj):
+        return encode_cursor(direction, getattr(obj, self.paginator.key), obj.pk)
+
+    @property
+    def next_cursor(self):
+        if not (self._has_next and self.object_list):
+            return None
+        return self._cursor("next", self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not (self._has_previous and self.object_list):
+            return None
+        return self._cursor("prev", self.object_list[0])
+
+
+class KeysetPaginator:
+    """
+    Paginates a queryset by seeking on ``(key, id)``.
+
+    Args:
+        queryset (QuerySet): Rows to paginate, its ordering is replaced.
+        per_page (int): Items on each page.
+        key (str): Field to order by, one of KEYS.
+        descending (bool): Pages run from the highest key down, e.g. newest first.
+    """
+
+    # Supported sort keys and how cursor values are parsed back
+    KEYS = {
+        "date": datetime.fromisoformat,
+        "price": amount,
+    }
+
+    def __init__(self, queryset, per_page, key="date", descending=False):
+        if key not in self.KEYS:
+            raise ValueError(f"Unsupported keyset key: {key}")
+        self.queryset = queryset
+        self.per_page = per_page
+        self.key = key
+        self.descending = descending
+
+    @property
+    def count(self):
+        """Total items; issues a COUNT, so only use it when explicitly asked for."""
+        if not hasattr(self, "_count"):
+            self._count = self.queryset.count()
+        return self._count
+
+    def get_page(self, token=None):
+        """
+        Returns the page after/before the cursor, or the first page.
+
+        Malformed cursors fall back to the first page.
+        """
+        key = self.key
+        direction, value, pk = "next", None, None
+        if token:
+            try:
+                direction, value, pk = decode_cursor(token)
+                value = self.KEYS[key](value)
+            except (InvalidCursor, ValueError, TypeError):
+                direction, value, pk = "next", None, None
+
+        # Seeks up the index for next pages, down for previous ones, the other
+        # way round when descending
+        queryset = self.queryset
+        if (direction == "next") != self.descending:
+            queryset = queryset.order_by(key, "pk")
+            if pk is not None:
+                queryset = queryset.filter(**{f"{key}__gte": value}).filter(
+                    Q(**{f"{key}__gt": value}) | Q(pk__gt=pk)
+                )
+        else:
+            queryset = queryset.order_by(f"-{key}", "-pk")
+            if pk is not None:
+                queryset = queryset.filter(**{f"{key}__lte": value}).filter(
+                    Q(**{f"{key}__lt": value}) | Q(pk__lt=pk)
+                )
+
+        # One extra row tells whether there's more in the seek direction
+        rows = list(queryset[: self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+
+        if direction == "next":
+            return KeysetPage(rows, self, has_next=more, has_previous=pk is not None)
+        # Nothing before the cursor anymore
+        if not rows:
+            return self.get_page()
+        rows.reverse()
+        return KeysetPage(rows, self, has_next=True, has_previous=more)
+
+
+class CountedPaginator(Paginator):
+    """Page number Paginator with a known total, e.g. from the statistics counters."""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._known_count = count
+
+    @cached_property
+    def count(self):
+        return self._known_count
+
+
+class CappedPaginator(Paginator):
+    """
+    Page number Paginator counting at most max_count rows, e.g. for the admin.
+
+    Its COUNT reads the first max_count rows of the ordering; pages past the
+    cap are not reachable.
+    """
+
+    max_count = 10000
+
+    @cached_property
+    def count(self):
+        return self.object_list[: self.max_count].count()
@@ -0,0 +1,86 @@
+"""
+Query budgets.
+
+Views declare how many queries a request may run, so their cost stays
+constant whatever the number of rows. With QUERY_BUDGET_ENABLED (DEBUG by
+default) a view going over its budget raises QueryBudgetExceeded listing the
+queries it ran, which makes a new N+1 pattern fail loudly in development.
+
+Budgets include the session and user the view loads lazily. Transaction
+control statements, and one-off maintenance wrapped in exempt() (e.g. the
+statistics rebuild of an empty table), don't count.
+"""
+
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+TRANSACTION_STATEMENTS = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE SAVEPOINT")
+
+_exempt = ContextVar("query_budget_exempt", default=False)
+
+
+@contextmanager
+def exempt():
+    """Leaves the queries of the block out of any budget."""
+    token = _exempt.set(True)
+    try:
+        yield
+    finally:
+        _exempt.reset(token)
+
+
+class QueryCounter:
+    """Database execute wrapper recording the SQL of every counted query."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not (_exempt.get() or sql.startswith(TRANSACTION_STATEMENTS)):
+            self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+
+def query_budget(budget):
+    """
+    Limits the queries a view (or an admin view method) may run.
+
+    Args:
+        budget (int): Queries allowed, for any number of rows.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not settings.QUERY_BUDGET_ENABLED:
+                return view(*args, **kwargs)
+
+            counter = QueryCounter()
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(counter))
+                response = view(*args, **kwargs)
+                # Lazy responses run their queries while rendering
+                if hasattr(response, "render") and not response.is_rendered:
+                    response.render()
+
+            if len(counter.queries) > budget:
+                raise QueryBudgetExceeded(
+                    f"{view.__qualname__} ran {len(counter.queries)} queries, its budget is {budget}:\n"
+                    + "\n".join(counter.queries)
+                )
+            return response
+
+        wrapper.query_budget = budget
+        return wrapper
+
+    return decorator
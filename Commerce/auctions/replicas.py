@@ -0,0 +1,187 @@
+"""
+Read replicas for browse traffic.
+
+Views decorated with read_replica (index, categories, listing, auction), and
+querysets evaluated inside reading(), read the auctions app's tables from one
+of settings.DATABASE_REPLICAS; sessions and users, and every write, stay on
+the primary ("default"). Replicas are picked at random per query.
+
+Read-your-writes: a request that writes anything (ReplicaRouter.db_for_write)
+reads from the primary for the rest of it, and ReplicaMiddleware then sets a
+STICKY_COOKIE for REPLICA_STICKY_SECONDS, so the user who just bid or
+commented reads the primary until the replicas have caught up. The window
+has to exceed the replication lag.
+
+Failover: a replica that can't be connected to is left out for
+REPLICA_RETRY_SECONDS and its reads go to another replica or the primary. A
+replica lost in the middle of a query fails that query only.
+
+Pages rendered from a replica may be behind the version they're cached
+under (auctions.caching), so they're only cached for REPLICA_STICKY_SECONDS.
+"""
+
+import logging
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = "primary_reads"
+# Apps whose tables are replicated for reads; sessions and auth stay on the primary
+REPLICATED_APPS = {"auctions"}
+
+# The current request's routing: reading (nesting depth), sticky (the cookie) and
+# wrote; a dict, so the router's changes are seen whatever context it runs in
+_state = ContextVar("replica_routing", default=None)
+# Replicas left out, alias: when to try again
+_down = {}
+_down_lock = threading.Lock()
+
+
+# Routing State
+def _new_state(sticky=False):
+    return {"reading": 0, "sticky": sticky, "wrote": False, "served": False}
+
+
+@contextmanager
+def reading():
+    """Reads the queries of the block from a replica, unless the request is pinned to the primary."""
+    state = _state.get()
+    token = None
+    if state is None:
+        state = _new_state()
+        token = _state.set(state)
+    state["reading"] += 1
+    try:
+        yield
+    finally:
+        state["reading"] -= 1
+        if token is not None:
+            _state.reset(token)
+
+
+def read_replica(view):
+    """Serves a read-only view from a replica."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with reading():
+            return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def served():
+    """Whether a replica served a query of the current request."""
+    state = _state.get()
+    return bool(state and state["served"])
+
+
+# Replica Health
+def available():
+    """A connectable replica, picked at random, or None to read the primary."""
+    now = time.monotonic()
+    candidates = [alias for alias in settings.DATABASE_REPLICAS if _down.get(alias, 0) <= now]
+    random.shuffle(candidates)
+    for alias in candidates:
+        connection = connections[alias]
+        if connection.connection is None:
+            try:
+                connection.ensure_connection()
+            except DatabaseError as error:
+                with _down_lock:
+                    _down[alias] = now + settings.REPLICA_RETRY_SECONDS
+                logger.warning("Replica %s is unavailable, reading the primary: %s", alias, error)
+                continue
+        return alias
+    return None
+
+
+class ReplicaRouter:
+    """Routes the reads of read_replica views to the replicas, everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            not state
+            or not state["reading"]
+            or state["sticky"]
+            or state["wrote"]
+            or model._meta.app_label not in REPLICATED_APPS
+        ):
+            return None
+        # Related rows come from where the instance did
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        alias = available()
+        if alias is not None:
+            state["served"] = True
+        return alias
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state["wrote"] = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        return None if db not in settings.DATABASE_REPLICAS else False
+
+
+# Local Replication
+def sqlite_path(alias):
+    """The file of a SQLite replica, from its read-only URI."""
+    name = str(connections[alias].settings_dict["NAME"])
+    return name.removeprefix("file:").split("?", 1)[0]
+
+
+def sync_sqlite(alias):
+    """
+    Copies the primary into a SQLite replica with the online backup API.
+
+    Readers of the replica keep their connections and see the copy once it's
+    done, so two SQLite files stand in for a primary and its replica locally.
+
+    Args:
+        alias (str): The replica's alias.
+    """
+    source = connections["default"]
+    source.ensure_connection()
+    target = sqlite3.connect(sqlite_path(alias))
+    try:
+        source.connection.backup(target)
+    finally:
+        target.close()
+
+
+class ReplicaMiddleware:
+    """Pins a user's reads to the primary for REPLICA_STICKY_SECONDS after a request that wrote."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = _new_state(sticky=STICKY_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state["wrote"]:
+            response.set_cookie(
+                STICKY_COOKIE, "1", max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite="Lax"
+            )
+        return response
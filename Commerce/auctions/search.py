@@ -0,0 +1,169 @@
+"""
+Full-text search over auction names and descriptions.
+
+On SQLite the inverted index is an FTS5 table (FTS_TABLE) keyed by auction id,
+updated on every auction save/delete and ranked with BM25, names weighing more
+than descriptions (the table's rank option, bm25(10.0, 1.0), set by migration
+0014). Ranking reads every match, and BM25 every auction containing each
+word, so search(limit=...) ranks only the newest matches by the words that
+aren't in most auctions. Other databases fall back to case-insensitive
+matching ordered by date.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Models
+from auctions.models import Auction
+
+FTS_TABLE = "auctions_auction_fts"
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def fts_available():
+    return connection.vendor == "sqlite"
+
+
+def tokenize(query):
+    """Returns the words of a search query."""
+    return TOKEN_RE.findall(query.lower())
+
+
+def match_expression(tokens):
+    """
+    Builds a safe FTS5 MATCH expression from words.
+
+    Every word is quoted, so user input is never parsed as FTS5 syntax, and
+    the last word matches as a prefix for search-as-you-type.
+    """
+    return " ".join(phrases(tokens))
+
+
+def phrases(tokens):
+    """The quoted FTS5 phrase of every word, the last one a prefix."""
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return terms
+
+
+# Index Maintenance
+def rebuild_index():
+    """Re-indexes every auction, e.g. after bulk inserts that skip signals."""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, name, description) "
+            f"SELECT id, name, description FROM {Auction._meta.db_table}"
+        )
+
+
+def index_auction(auction):
+    """Adds or replaces an auction's postings."""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [auction.id])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (%s, %s, %s)",
+            [auction.id, auction.name, auction.description],
+        )
+
+
+def index_auctions(auctions):
+    """Adds the postings of new auctions, e.g. after bulk_create."""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (%s, %s, %s)",
+            [(auction.id, auction.name, auction.description) for auction in auctions],
+        )
+
+
+def unindex_auction(auction_id):
+    """Removes an auction's postings."""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [auction_id])
+
+
+def unindex_auctions(auction_ids):
+    """Removes the postings of auctions deleted without signals, e.g. archived."""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(auction_id,) for auction_id in auction_ids])
+
+
+# Querying
+def narrow_phrases(tokens, limit):
+    """The phrases of the words found in limit auctions at most, in one query."""
+    terms = phrases(tokens)
+    probe = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rowid DESC LIMIT 1 OFFSET %s"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT " + ", ".join(f"({probe})" for _ in terms), [param for term in terms for param in (term, limit)]
+        )
+        broad = cursor.fetchone()
+    return [term for term, rowid in zip(terms, broad) if rowid is None]
+
+
+def search(query, queryset=None, limit=None):
+    """
+    Returns the auctions matching every word of the query, best match first.
+
+    Args:
+        query (str): Words to search for.
+        queryset (QuerySet): Auctions to search in, e.g. already filtered by
+            AuctionsListingFiltersForm; defaults to all auctions.
+        limit (int): Ranks only the newest limit matches (before the
+            queryset's filters), so a query matching most auctions costs the
+            same as a narrow one; all of them by default. Words found in more
+            than limit auctions are left out of the ranking, as BM25 counts
+            every auction containing each word; without another word the
+            matches come newest first.
+    """
+    if queryset is None:
+        queryset = Auction.objects.all()
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset.none()
+
+    if fts_available():
+        table = Auction._meta.db_table
+        expression = match_expression(tokens)
+        matches = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+        where, params = [f"{FTS_TABLE}.rowid = {table}.id", f"{FTS_TABLE} MATCH %s"], [expression]
+        if limit is not None:
+            ranked = narrow_phrases(tokens, limit)
+            # Postings are read in rowid order: the newest matches are read
+            # without the others, and the ranked scan starts at the oldest one
+            matches = f"{matches} ORDER BY rowid DESC LIMIT %s"
+            where.append(f"{FTS_TABLE}.rowid >= COALESCE(({matches} OFFSET %s), 0)")
+            params = [" ".join(ranked), expression, 1, limit - 1]
+            queryset = queryset.filter(id__in=RawSQL(matches, [expression, limit]))
+            if not ranked:
+                return queryset.order_by("-id")
+        else:
+            queryset = queryset.filter(id__in=RawSQL(matches, [expression]))
+        # The IN list drives the query from the postings, also for COUNT
+        # queries, which would otherwise probe the index once per filtered row
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=where,
+            params=params,
+            select={"rank": f"{FTS_TABLE}.rank"},
+            order_by=["rank", "id"],
+        )
+
+    # Fallback: every word in the name or the description
+    for token in tokens:
+        queryset = queryset.filter(Q(name__icontains=token) | Q(description__icontains=token))
+    return queryset.order_by("-date", "-id")
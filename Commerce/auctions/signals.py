@@ -1,9 +1,27 @@
 # UserProfile Creation Response Requirements
-from auctions.models import UserProfile
+from auctions.models import Auction, AuctionStatus, Bid, Comment, UserProfile
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+# Hot Auctions
+from auctions.bidbook import get_bid_book
+
+# Statistics
+from auctions import stats
+
+# Caching
+from auctions import caching
+
+# Full-Text Search
+from auctions import search
+
+# Image Variants
+from auctions import images
+
+# Media Reference Counts
+from auctions import blobs
+
 # Userprofile Creation Response
 
 
@@ -15,3 +33,153 @@ def userprofile_creator(sender, **kwargs):
 
         # Creates UserProfile If Not Created Yet
         UserProfile.objects.get_or_create(user=user)
+
+
+# Hot Auction Bid Book Response
+@receiver(post_save, sender=Auction)
+def bid_book_updater(sender, **kwargs):
+    bid_book = get_bid_book()
+    if bid_book is None or kwargs.get("raw"):
+        return
+
+    auction = kwargs.get("instance")
+    # Serves Active Hot Auctions From The Book, Releases The Rest
+    if auction.hot and auction.status == AuctionStatus.ACTIVE:
+        bid_book.add(auction)
+    else:
+        bid_book.discard(auction.id)
+
+
+# Auction Statistics Response
+@receiver(pre_save, sender=Auction)
+def auction_state_tracker(sender, **kwargs):
+    auction = kwargs.get("instance")
+    # Remembers The Bucket And Picture An Edited Auction Leaves, In One Query
+    auction._statistics_bucket = auction._stored_picture = None
+    if not kwargs.get("raw") and not auction._state.adding:
+        previous = Auction.objects.filter(pk=auction.pk).values_list("category", "status", "picture").first()
+        if previous:
+            auction._statistics_bucket, auction._stored_picture = previous[:2], previous[2]
+
+
+@receiver(post_save, sender=Auction)
+def statistics_updater(sender, **kwargs):
+    if kwargs.get("raw"):
+        return
+
+    auction = kwargs.get("instance")
+    bucket = (auction.category, auction.status)
+    old_bucket = getattr(auction, "_statistics_bucket", None)
+    # Counts The New Auction, Or Moves An Edited One Between Buckets
+    if kwargs.get("created"):
+        stats.adjust(*bucket, 1)
+    elif old_bucket and old_bucket != bucket:
+        stats.adjust(*old_bucket, -1)
+        stats.adjust(*bucket, 1)
+    else:
+        stats.adjust(*bucket, 0)
+
+
+@receiver(post_delete, sender=Auction)
+def statistics_remover(sender, **kwargs):
+    auction = kwargs.get("instance")
+    stats.adjust(auction.category, auction.status, -1)
+
+
+# Page Cache Invalidation Response
+@receiver(post_save, sender=Auction)
+@receiver(post_delete, sender=Auction)
+def auction_pages_invalidator(sender, **kwargs):
+    caching.bump_auction(kwargs.get("instance").id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_pages_invalidator(sender, **kwargs):
+    caching.bump(f"auction:{kwargs.get('instance').auction_id}")
+
+
+# Bids are placed by auctions.bidding, which bumps the pages itself; this
+# covers bids edited or deleted elsewhere (admin)
+@receiver(post_save, sender=Bid)
+@receiver(post_delete, sender=Bid)
+def bid_pages_invalidator(sender, **kwargs):
+    caching.bump(f"auction:{kwargs.get('instance').auction_id}")
+
+
+# Search Index Response
+@receiver(post_save, sender=Auction)
+def search_indexer(sender, **kwargs):
+    if not kwargs.get("raw"):
+        search.index_auction(kwargs.get("instance"))
+
+
+@receiver(post_delete, sender=Auction)
+def search_unindexer(sender, **kwargs):
+    search.unindex_auction(kwargs.get("instance").id)
+
+
+# Image Variants Response
+def _image_saved(kwargs, field):
+    update_fields = kwargs.get("update_fields")
+    if kwargs.get("raw") or (update_fields is not None and field not in update_fields):
+        return
+    image = getattr(kwargs.get("instance"), field)
+    # Default images are built once by the build_image_variants command
+    if image.name != image.field.default:
+        images.schedule(image.name)
+
+
+@receiver(post_save, sender=Auction)
+def auction_picture_variants(sender, **kwargs):
+    _image_saved(kwargs, "picture")
+
+
+@receiver(post_save, sender=UserProfile)
+def avatar_variants(sender, **kwargs):
+    _image_saved(kwargs, "avatar")
+
+
+# Media Reference Counts Response
+def _image_references(kwargs, field, previous):
+    update_fields = kwargs.get("update_fields")
+    if kwargs.get("raw") or (update_fields is not None and field not in update_fields):
+        return
+    name = getattr(kwargs.get("instance"), field).name
+    # Retains The New Image, Releases The One It Replaces
+    if kwargs.get("created"):
+        blobs.retain(name)
+    elif previous is not None and previous != name:
+        blobs.retain(name)
+        blobs.release(previous)
+
+
+@receiver(post_save, sender=Auction)
+def auction_picture_references(sender, **kwargs):
+    _image_references(kwargs, "picture", getattr(kwargs.get("instance"), "_stored_picture", None))
+
+
+@receiver(pre_save, sender=UserProfile)
+def avatar_tracker(sender, **kwargs):
+    userprofile = kwargs.get("instance")
+    # Remembers The Avatar An Edited Profile Leaves
+    userprofile._stored_avatar = None
+    if not kwargs.get("raw") and not userprofile._state.adding:
+        userprofile._stored_avatar = (
+            UserProfile.objects.filter(pk=userprofile.pk).values_list("avatar", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=UserProfile)
+def avatar_references(sender, **kwargs):
+    _image_references(kwargs, "avatar", getattr(kwargs.get("instance"), "_stored_avatar", None))
+
+
+@receiver(post_delete, sender=Auction)
+def auction_picture_releaser(sender, **kwargs):
+    blobs.release(kwargs.get("instance").picture.name)
+
+
+@receiver(post_delete, sender=UserProfile)
+def avatar_releaser(sender, **kwargs):
+    blobs.release(kwargs.get("instance").avatar.name)
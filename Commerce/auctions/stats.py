@@ -0,0 +1,136 @@
+"""
+Auction statistics store.
+
+Keeps auctions count and price bounds per (category, status) bucket in the
+AuctionStatistics table. Counts are maintained with increments in the same
+transaction that creates, moves or deletes an auction, and price bounds are
+refreshed by index seeks on those writes and on accepted bids. Readers get the
+buckets from the cache (STATISTICS_CACHE_TTL seconds), and fold them into
+global, per-category or per-status figures without querying the Auction table.
+
+Writes through QuerySet.update() or bulk_create() bypass the counters; call
+adjust() for them, or rebuild with the rebuild_statistics command.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, OuterRef, Subquery
+from django.db.models.functions import Greatest
+
+from auctions import querybudget
+
+# Models
+from auctions.models import Auction, AuctionStatistics
+
+STATISTICS_CACHE_KEY = "auctions:statistics"
+
+
+def buckets():
+    """
+    Returns {(category, status): (count, min_price, max_price)}.
+
+    Read from the cache, then from the statistics table, and rebuilt from the
+    Auction table if the statistics table is empty.
+    """
+    data = cache.get(STATISTICS_CACHE_KEY)
+    if data is None:
+        rows = AuctionStatistics.objects.values_list(
+            "category", "status", "count", "min_price", "max_price"
+        )
+        data = {(category, status): tuple(figures) for category, status, *figures in rows}
+        if not data:
+            with querybudget.exempt():
+                data = rebuild()
+        cache.set(STATISTICS_CACHE_KEY, data, settings.STATISTICS_CACHE_TTL)
+    return data
+
+
+def rebuild():
+    """Recomputes every bucket with a single grouped aggregate."""
+    rows = (
+        Auction.objects.order_by()
+        .values("category", "status")
+        .annotate(count=Count("id"), min_price=Min("price"), max_price=Max("price"))
+    )
+    statistics = [AuctionStatistics(**row) for row in rows]
+    with transaction.atomic():
+        AuctionStatistics.objects.all().delete()
+        AuctionStatistics.objects.bulk_create(statistics)
+    cache.delete(STATISTICS_CACHE_KEY)
+    return {
+        (row.category, row.status): (row.count, row.min_price, row.max_price)
+        for row in statistics
+    }
+
+
+def _price_seeks():
+    """Subqueries for a bucket's lowest and highest price, both index seeks."""
+    bucket = Auction.objects.filter(category=OuterRef("category"), status=OuterRef("status"))
+    return {
+        "min_price": Subquery(bucket.order_by("price").values("price")[:1]),
+        "max_price": Subquery(bucket.order_by("-price").values("price")[:1]),
+    }
+
+
+def adjust(category, status, delta):
+    """
+    Moves a bucket's auctions count by delta and refreshes its price bounds.
+
+    A single UPDATE with an F() increment, so it runs inside the caller's
+    transaction and never counts rows (see Auction.save and Auction.delete).
+    """
+    bucket = AuctionStatistics.objects.filter(category=category, status=status)
+    figures = {"count": Greatest(F("count") + delta, 0), **_price_seeks()}
+    if not bucket.update(**figures):
+        # First auction of the bucket
+        AuctionStatistics.objects.bulk_create(
+            [AuctionStatistics(category=category, status=status)], ignore_conflicts=True
+        )
+        bucket.update(**figures)
+    cache.delete(STATISTICS_CACHE_KEY)
+
+
+def refresh_prices(auction_id):
+    """
+    Recomputes the price bounds of an auction's bucket after a bid.
+
+    A single UPDATE whose subqueries are index seeks for the bucket's lowest
+    and highest price; counts don't change on bids.
+    """
+    auction = Auction.objects.filter(pk=auction_id)
+    AuctionStatistics.objects.filter(
+        category=Subquery(auction.values("category")),
+        status=Subquery(auction.values("status")),
+    ).update(**_price_seeks())
+    cache.delete(STATISTICS_CACHE_KEY)
+
+
+def price_bounds(category=None, status=None):
+    """
+    Returns (min_price, max_price) of auctions, optionally for one category
+    and/or status; (None, None) if there's no auction.
+    """
+    min_price = max_price = None
+    for (bucket_category, bucket_status), (count, low, high) in buckets().items():
+        if not count:
+            continue
+        if category and bucket_category != category:
+            continue
+        if status and bucket_status != status:
+            continue
+        min_price = low if min_price is None else min(min_price, low)
+        max_price = high if max_price is None else max(max_price, high)
+    return min_price, max_price
+
+
+def counts(category=None, status=None):
+    """Returns the number of auctions, optionally for one category and/or status."""
+    total = 0
+    for (bucket_category, bucket_status), (count, low, high) in buckets().items():
+        if category and bucket_category != category:
+            continue
+        if status and bucket_status != status:
+            continue
+        total += count
+    return total
@@ -0,0 +1,59 @@
+"""
+Content addressed media storage.
+
+ContentAddressedStorage names an upload after the SHA-256 of its bytes,
+sharded under its upload directory as
+``<upload dir>/<2 hex>/<2 hex>/<sha256><extension>``. Identical pictures and
+avatars (re-listed items, repeated avatars) are stored once and share their
+variants (auctions.images); the references to each file are counted by
+auctions.blobs, and an upload reusing a stored file renews the grace period
+of its orphan, if any, so it isn't collected under the upload.
+"""
+
+import hashlib
+import os
+from pathlib import PurePosixPath
+from uuid import uuid4
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage, storages
+from django.db import transaction
+from django.db.models.functions import Now
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage deduplicating files by content."""
+
+    def get_available_name(self, name, max_length=None):
+        # The stored name is chosen from the content by _save
+        return name
+
+    def blob_name(self, name, digest):
+        path = PurePosixPath(name)
+        return str(path.parent / digest[:2] / digest[2:4] / f"{digest}{path.suffix.lower()}")
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk.encode() if isinstance(chunk, str) else chunk)
+        name = self.blob_name(name, digest.hexdigest())
+        # An orphan of the name gets a new grace period before the file is
+        # reused, so collection (auctions.blobs) leaves it to the upload's
+        # reference. A collection holding the name waits for this; it deletes
+        # the row and the file in one transaction, so a name collected meanwhile
+        # is found missing and written again.
+        with transaction.atomic():
+            apps.get_model("auctions", "MediaBlob").objects.filter(name=name, references=0).update(released=Now())
+            if self.exists(name):
+                return name
+
+        # Written aside then renamed, so concurrent uploads of the same content
+        # end as one complete file
+        temporary = super()._save(f"{name}.{uuid4().hex}.part", content)
+        os.replace(self.path(temporary), self.path(name))
+        return name
+
+
+def blob_storage():
+    """The storage of auction pictures and avatars (STORAGES["blobs"])."""
+    return storages["blobs"]
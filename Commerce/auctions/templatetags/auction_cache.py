@@ -0,0 +1,25 @@
+from django import template
+from django.template.loader import render_to_string
+
+from auctions.caching import cached_fragment, shows
+from auctions.images import variant_url
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def auction_card(context, auction):
+    """
+    Renders auction-card.html for an auction, cached by the values it shows,
+    so a card is re-rendered only after its name, picture or price change, or
+    once its card-size picture variant is built.
+
+    The page is recorded as showing the auction (auctions.caching.shows).
+    """
+    shows(getattr(context, "request", None), auction)
+    picture_url = variant_url(auction.picture, "card")
+    return cached_fragment(
+        "auction-card",
+        (auction.id, auction.name, picture_url, auction.price),
+        lambda: render_to_string("auction-card.html", {"auction": auction, "picture_url": picture_url}),
+    )
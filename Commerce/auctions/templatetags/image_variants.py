@@ -0,0 +1,14 @@
+from django import template
+
+from auctions import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def variant_url(field_file, variant):
+    """
+    URL of an image's variant ("thumb", "card" or "full", see auctions.images),
+    or of the original until the variant is built.
+    """
+    return images.variant_url(field_file, variant)
@@ -0,0 +1,15 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_numbers(page):
+    """
+    The page numbers linked from a page: the first and last ones and those
+    around it, with Paginator.ELLIPSIS in between, so the links don't grow
+    with the number of pages. None without a page.
+    """
+    if page is None:
+        return None
+    return page.paginator.get_elided_page_range(page.number)
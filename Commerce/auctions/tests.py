@@ -1,16 +1,55 @@
+import asyncio
+import json
 import os
 import shutil
 import tempfile
+import threading
+import time
 from base64 import b64decode
-from io import StringIO
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
 from pathlib import Path
+from unittest import mock
 
-from auctions.models import Auction, User, UserProfile
+from asgiref.sync import sync_to_async
+from auctions.bidbook import BidBook
+from auctions.bidding import place_bid
+from auctions.live import MAX_PENDING, hub
+from auctions.forms import AuctionForm, AuctionsListingFiltersForm
+from auctions.models import (
+    ArchivedAuction,
+    Auction,
+    AuctionCategories,
+    AuctionStatistics,
+    AuctionStatus,
+    Bid,
+    BidAttempt,
+    BidOutcome,
+    BidRollup,
+    Comment,
+    Notification,
+    NotificationKind,
+    User,
+    UserProfile,
+)
+from auctions import archive, audit, benchmark, blobs, bulk, caching, checks, closing, images, ledger, money, notifications, replicas, stats
+from auctions.models import MediaBlob
+from auctions.pagination import CappedPaginator
+from auctions.querybudget import QueryBudgetExceeded, query_budget
+from auctions.search import search
+from auctions.views import live_events
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.core.management import call_command
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.db.models import OuterRef, Subquery
 from django.forms import model_to_dict
-from django.test import TestCase, override_settings
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
 
 
 # An image generator for imagefield
@@ -281,9 +320,9 @@ class CleanUpManagementCommandTest(TestCase):
         output = StringIO()
         call_command("cleanup", "--yes", stdout=output)
         self.assertIn("Already cleanedUp nothing todo!", output.getvalue())
-        # Checking for not abondant files
-        auction_images = tuple(image for image in self.auction_images_path.iterdir())
-        profile_images = tuple(image for image in self.profile_images_path.iterdir())
+        # Checking for not abondant files, stored in content addressed subdirectories
+        auction_images = tuple(image for image in self.auction_images_path.rglob("*") if image.is_file())
+        profile_images = tuple(image for image in self.profile_images_path.rglob("*") if image.is_file())
 
         self.assertEqual(1, len(auction_images))
         self.assertEqual(1, len(profile_images))
@@ -294,3 +333,2011 @@ class CleanUpManagementCommandTest(TestCase):
     def tearDownClass(cls):
         super().tearDownClass()
         shutil.rmtree(cls.default_path, ignore_errors=True)
+
+
+class CleanupStreamingTest(TestCase):
+    def setUp(self):
+        self.media_root = Path(tempfile.mkdtemp())
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+        user = User.objects.create_user(username="username", password="NotSafe1234")
+        # Images stored by upload name, two in use
+        for directory in ("auction_images", "profile_images"):
+            self.media_root.joinpath(directory).mkdir()
+            for name in ("used.png", "old.png", "new.png"):
+                self.media_root.joinpath(directory, name).write_bytes(b"image")
+        Auction.objects.create(owner=user, name="auction", picture="auction_images/used.png", price=1.0)
+        UserProfile.objects.filter(user=user).update(avatar="profile_images/used.png")
+
+        # Abundant files written two days ago
+        two_days_ago = time.time() - 2 * 86400
+        for directory in ("auction_images", "profile_images"):
+            os.utime(self.media_root.joinpath(directory, "old.png"), (two_days_ago, two_days_ago))
+
+    def remaining(self):
+        return sorted(str(path.relative_to(self.media_root)) for path in self.media_root.rglob("*.png"))
+
+    def test_dry_run_reports_without_removing(self):
+        output = StringIO()
+        # A chunked read per model, whatever the number of rows
+        with self.assertNumQueries(3):
+            call_command("cleanup", "--dry-run", stdout=output)
+        report = json.loads(output.getvalue())
+
+        self.assertEqual(6, report["scanned"])
+        self.assertEqual(
+            ["auction_images/new.png", "auction_images/old.png", "profile_images/new.png", "profile_images/old.png"],
+            [image["name"] for image in report["abundant"]],
+        )
+        self.assertEqual((4, 20), (report["abundant_count"], report["abundant_bytes"]))
+        self.assertEqual(6, len(self.remaining()))
+
+    def test_since_only_considers_recent_files(self):
+        output = StringIO()
+        call_command("cleanup", "--dry-run", "--since", "1d", stdout=output)
+        report = json.loads(output.getvalue())
+        self.assertEqual(4, report["scanned"])
+        self.assertEqual(["auction_images/new.png", "profile_images/new.png"], [image["name"] for image in report["abundant"]])
+
+        since = (timezone.now() - timedelta(days=3)).date().isoformat()
+        output = StringIO()
+        call_command("cleanup", "--yes", "--since", since, "--workers", "4", stdout=output)
+        self.assertIn("Cleaned Up 4 abundant images of 6 files", output.getvalue())
+        self.assertEqual(["auction_images/used.png", "profile_images/used.png"], self.remaining())
+
+        with self.assertRaises(CommandError):
+            call_command("cleanup", "--since", "yesterday")
+
+    def test_archived_pictures_are_kept(self):
+        self.media_root.joinpath("auction_images", "archived.png").write_bytes(b"image")
+        owner = User.objects.get(username="username")
+        Auction.objects.create(
+            owner=owner, name="lamp", picture="auction_images/archived.png", price=1.0,
+            status=AuctionStatus.CLOSED, ends_at=timezone.now() - timedelta(days=40),
+        )
+        self.assertEqual(1, archive.archive())
+
+        output = StringIO()
+        call_command("cleanup", "--yes", stdout=output)
+        self.assertIn("Cleaned Up 4 abundant images of 7 files", output.getvalue())
+        self.assertEqual(
+            ["auction_images/archived.png", "auction_images/used.png", "profile_images/used.png"], self.remaining()
+        )
+
+
+class BidEngineTest(TestCase):
+    def setUp(self):
+        self.PASSWORD = "NotSafe1234"
+        self.owner = User.objects.create_user(username="owner", password=self.PASSWORD)
+        self.bidder = User.objects.create_user(username="bidder", password=self.PASSWORD)
+        self.auction = Auction.objects.create(name="auction", price=10.0, owner=self.owner)
+
+    def test_higher_bid_accepted(self):
+        self.assertTrue(place_bid(self.auction.id, self.bidder, 11.0))
+        self.auction.refresh_from_db()
+        self.assertEqual(11.0, self.auction.price)
+        self.assertEqual(self.bidder, self.auction.top_bid.bidder)
+
+    def test_lower_or_equal_bid_rejected(self):
+        self.assertTrue(place_bid(self.auction.id, self.bidder, 12.0))
+        self.assertFalse(place_bid(self.auction.id, self.owner, 12.0))
+        self.assertFalse(place_bid(self.auction.id, self.owner, 5.0))
+        # Rejected bids leave no trace
+        self.assertFalse(Bid.objects.filter(bidder=self.owner).exists())
+        self.auction.refresh_from_db()
+        self.assertEqual(12.0, self.auction.price)
+
+    def test_rebid_updates_existing_bid(self):
+        place_bid(self.auction.id, self.bidder, 11.0)
+        place_bid(self.auction.id, self.bidder, 15.0)
+        # A rejected re-bid keeps the previous price
+        place_bid(self.auction.id, self.bidder, 13.0)
+        bids = Bid.objects.filter(auction=self.auction, bidder=self.bidder)
+        self.assertEqual(1, bids.count())
+        self.assertEqual(15.0, bids.get().price)
+
+    def test_inactive_auction_rejected(self):
+        Auction.objects.filter(id=self.auction.id).update(status=AuctionStatus.CLOSED)
+        self.assertFalse(place_bid(self.auction.id, self.bidder, 100.0))
+
+    def test_bid_statement_count(self):
+        def statements(price):
+            with CaptureQueriesContext(connection) as queries:
+                place_bid(self.auction.id, self.bidder, price)
+            sqls = [query["sql"].upper() for query in queries.captured_queries]
+            return [sql for sql in sqls if not sql.startswith(("SAVEPOINT", "RELEASE", "ROLLBACK"))]
+
+        # The upsert, the conditional UPDATE and the ledger insert in the
+        # transaction, then the statistics UPDATE
+        accepted = statements(11.0)
+        self.assertEqual(4, len(accepted))
+        self.assertTrue(accepted[-1].startswith('UPDATE "AUCTIONS_AUCTIONSTATISTICS"'))
+        # The upsert and the UPDATE rolled back, then the ledger insert
+        self.assertEqual(3, len(statements(5.0)))
+
+    @override_settings(SOFT_CLOSE_WINDOW=60, SOFT_CLOSE_EXTENSION=120)
+    def test_soft_close_extends_last_minute_bids(self):
+        ends_at = timezone.now() + timedelta(seconds=30)
+        Auction.objects.filter(id=self.auction.id).update(ends_at=ends_at)
+        # Extended by the statement accepting the bid
+        self.test_bid_statement_count()
+        self.auction.refresh_from_db()
+        self.assertGreater(self.auction.ends_at, ends_at + timedelta(seconds=60))
+
+        # Rejected bids and bids before the window leave the end time alone
+        Auction.objects.filter(id=self.auction.id).update(ends_at=ends_at)
+        self.assertFalse(place_bid(self.auction.id, self.owner, 5.0))
+        later = timezone.now() + timedelta(hours=1)
+        Auction.objects.filter(id=self.auction.id).update(ends_at=later)
+        self.assertTrue(place_bid(self.auction.id, self.owner, 50.0))
+        self.auction.refresh_from_db()
+        self.assertEqual(later, self.auction.ends_at)
+
+    def test_bid_view(self):
+        self.client.login(username=self.bidder.username, password=self.PASSWORD)
+        url = reverse("bid", args=[self.auction.id])
+        response = self.client.post(url, {"price": "20"}, follow=True)
+        messages = [str(message) for message in response.context["messages"]]
+        self.assertIn("Your bid recorded successfully!", messages)
+
+        response = self.client.post(url, {"price": "inf"}, follow=True)
+        messages = [str(message) for message in response.context["messages"]]
+        self.assertIn("Price is required and must be number!", messages)
+
+        Auction.objects.filter(id=self.auction.id).update(status=AuctionStatus.CLOSED)
+        response = self.client.post(url, {"price": "30"}, follow=True)
+        messages = [str(message) for message in response.context["messages"]]
+        self.assertIn("Auction is Closed", messages)
+
+        response = self.client.post(reverse("bid", args=[self.auction.id + 100]), {"price": "30"})
+        self.assertEqual(404, response.status_code)
+
+
+class BidEngineConcurrencyTest(TransactionTestCase):
+    BIDDERS = 200
+
+    def setUp(self):
+        owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        self.auction = Auction.objects.create(name="auction", price=1.0, owner=owner)
+        self.bidders = User.objects.bulk_create(
+            User(username=f"bidder{i}") for i in range(self.BIDDERS)
+        )
+
+    def test_concurrent_bidders(self):
+        """Every bidder bids at once; the highest bid must win"""
+        barrier = threading.Barrier(self.BIDDERS)
+        accepted = []
+        errors = []
+
+        def bidder_thread(bidder, price):
+            barrier.wait()
+            try:
+                if place_bid(self.auction.id, bidder, price):
+                    accepted.append(price)
+            except Exception as error:  # pragma: no cover - reported below
+                errors.append(error)
+            finally:
+                connection.close()
+
+        # Shuffled prices so that lower bids often arrive last
+        prices = [float((i * 7919) % self.BIDDERS + 2) for i in range(self.BIDDERS)]
+        threads = [
+            threading.Thread(target=bidder_thread, args=(bidder, price))
+            for bidder, price in zip(self.bidders, prices)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], errors)
+        self.auction.refresh_from_db()
+        self.assertEqual(max(prices), self.auction.price)
+        self.assertEqual(max(prices), self.auction.top_bid.price)
+        # Every accepted bid is persisted, no bid got lost
+        self.assertEqual(len(accepted), Bid.objects.filter(auction=self.auction).count())
+
+
+@override_settings(SOFT_CLOSE_WINDOW=2, SOFT_CLOSE_EXTENSION=2)
+class SoftCloseConcurrencyTest(TransactionTestCase):
+    BIDDERS = 60
+
+    def setUp(self):
+        owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        self.ends_at = timezone.now() + timedelta(seconds=0.5)
+        self.auction = Auction.objects.create(name="auction", price=1.0, owner=owner, ends_at=self.ends_at)
+        self.bidders = User.objects.bulk_create(User(username=f"bidder{i}") for i in range(self.BIDDERS))
+
+    def burst(self, bidders, prices, accepted, errors):
+        barrier = threading.Barrier(len(bidders))
+
+        def bidder_thread(bidder, price):
+            barrier.wait()
+            try:
+                if place_bid(self.auction.id, bidder, price):
+                    accepted.append(price)
+            except Exception as error:  # pragma: no cover - reported below
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=bidder_thread, args=args) for args in zip(bidders, prices)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_bursts_at_the_boundary(self):
+        """Last second bursts extend the auction, so bids after the original end still count"""
+        half = self.BIDDERS // 2
+        accepted, late_accepted, errors = [], [], []
+        # Shuffled prices so that lower bids often arrive last
+        self.burst(self.bidders[:half], [float((i * 7) % half + 2) for i in range(half)], accepted, errors)
+
+        # Past the original end time, within the extension
+        time.sleep(max(0, (self.ends_at - timezone.now()).total_seconds()) + 0.2)
+        self.burst(self.bidders[half:], [float((i * 7) % half + 100) for i in range(half)], late_accepted, errors)
+
+        self.assertEqual([], errors)
+        self.assertTrue(late_accepted)
+        self.auction.refresh_from_db()
+        self.assertEqual(max(late_accepted), self.auction.price)
+        self.assertEqual(max(late_accepted), self.auction.top_bid.price)
+        self.assertGreater(self.auction.ends_at, self.ends_at + timedelta(seconds=1))
+        self.assertLessEqual(self.auction.ends_at, timezone.now() + timedelta(seconds=2))
+        # Every accepted bid is persisted, no bid got lost
+        self.assertEqual(
+            len(accepted) + len(late_accepted), Bid.objects.filter(auction=self.auction).count()
+        )
+
+
+class BidBookTest(TestCase):
+    def setUp(self):
+        self.log_dir = Path(tempfile.mkdtemp())
+        self.owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        self.bidders = User.objects.bulk_create(
+            User(username=f"bidder{i}") for i in range(3)
+        )
+        self.auction = Auction.objects.create(
+            name="hot auction", price=10.0, owner=self.owner, hot=True
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.log_dir, ignore_errors=True)
+
+    def bid_book(self):
+        bid_book = BidBook(self.log_dir / "bidbook.log", fsync=False)
+        bid_book.load()
+        return bid_book
+
+    def test_ledger_records_every_bid(self):
+        bid_book = self.bid_book()
+        book = bid_book.book(self.auction.id)
+        for price in (11.0, 12.0, 12.0, 13.0):
+            bid_book.place(book, self.bidders[0].pk, price)
+        bid_book.stop()
+        # Each bidder keeps one Bid row, the ledger every attempt
+        self.assertEqual(1, Bid.objects.filter(auction=self.auction).count())
+        attempts = BidAttempt.objects.filter(auction=self.auction).order_by("id")
+        self.assertEqual(
+            [(11.0, BidOutcome.ACCEPTED), (12.0, BidOutcome.ACCEPTED), (13.0, BidOutcome.ACCEPTED), (12.0, BidOutcome.REJECTED)],
+            sorted(attempts.values_list("price", "outcome"), key=lambda attempt: attempt[1]),
+        )
+
+    def test_ended_auctions_refuse_bids(self):
+        self.auction.ends_at = timezone.now() - timedelta(seconds=1)
+        self.auction.save()
+        bid_book = self.bid_book()
+        book = bid_book.book(self.auction.id)
+        self.assertFalse(bid_book.place(book, self.bidders[0].pk, 20.0))
+
+        # Moving the end time reaches the loaded book
+        self.auction.ends_at = timezone.now() + timedelta(hours=1)
+        bid_book.add(self.auction)
+        self.assertTrue(bid_book.place(book, self.bidders[0].pk, 20.0))
+        bid_book.stop()
+
+    @override_settings(SOFT_CLOSE_WINDOW=60, SOFT_CLOSE_EXTENSION=60)
+    def test_soft_close_in_memory(self):
+        ends_at = timezone.now() + timedelta(seconds=10)
+        Auction.objects.filter(id=self.auction.id).update(ends_at=ends_at)
+        bid_book = self.bid_book()
+        book = bid_book.book(self.auction.id)
+        self.assertTrue(bid_book.place(book, self.bidders[0].pk, 20.0))
+        self.assertGreater(book.ends_at, ends_at + timedelta(seconds=40))
+
+        # The moved end time is written with the bids
+        bid_book.flush()
+        self.auction.refresh_from_db()
+        self.assertEqual(book.ends_at, self.auction.ends_at)
+        bid_book.stop()
+
+    def test_bids_validated_in_memory(self):
+        bid_book = self.bid_book()
+        book = bid_book.book(self.auction.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(bid_book.place(book, self.bidders[0].id, 11.0))
+            self.assertFalse(bid_book.place(book, self.bidders[1].id, 11.0))
+            self.assertTrue(bid_book.place(book, self.bidders[1].id, 12.5))
+        self.assertEqual(12.5, book.price)
+        self.assertEqual({self.bidders[0].id: 11.0, self.bidders[1].id: 12.5}, book.bids)
+
+    def test_flush_writes_batches(self):
+        bid_book = self.bid_book()
+        book = bid_book.book(self.auction.id)
+        for price, bidder in zip((11.0, 12.0, 13.0, 14.0), self.bidders * 2):
+            bid_book.place(book, bidder.id, price)
+
+        self.assertEqual(4, bid_book.flush())
+        self.auction.refresh_from_db()
+        self.assertEqual(14.0, self.auction.price)
+        self.assertEqual(self.bidders[0], self.auction.top_bid.bidder)
+        # Only the latest bid of every bidder is kept
+        self.assertEqual(
+            {(self.bidders[0].id, 14.0), (self.bidders[1].id, 12.0), (self.bidders[2].id, 13.0)},
+            set(Bid.objects.filter(auction=self.auction).values_list("bidder_id", "price")),
+        )
+        # Fully flushed log is truncated
+        self.assertEqual(0, (self.log_dir / "bidbook.log").stat().st_size)
+
+    def test_crash_recovery_replays_log(self):
+        bid_book = self.bid_book()
+        book = bid_book.book(self.auction.id)
+        bid_book.place(book, self.bidders[0].id, 11.0)
+        bid_book.flush()
+        bid_book.place(book, self.bidders[1].id, 20.0)
+        # Crash: the last accepted bid never reached the database
+        bid_book.log.close()
+
+        recovered = self.bid_book()
+        self.assertEqual(20.0, recovered.book(self.auction.id).price)
+        self.assertEqual(1, recovered.flush())
+        self.auction.refresh_from_db()
+        self.assertEqual(20.0, self.auction.price)
+        self.assertEqual(self.bidders[1], self.auction.top_bid.bidder)
+
+    def test_only_hot_auctions_have_books(self):
+        cold = Auction.objects.create(name="cold auction", price=1.0, owner=self.owner)
+        bid_book = self.bid_book()
+        self.assertIsNone(bid_book.book(cold.id))
+        self.assertIsNotNone(bid_book.book(self.auction.id))
+
+
+class LiveUpdatesTest(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        self.auction = Auction.objects.create(name="auction", price=10.0, owner=self.owner)
+
+    async def next_event(self, stream):
+        """Waits for the stream's next chunk while letting subscription happen"""
+        return await asyncio.wait_for(anext(stream), timeout=5)
+
+    async def test_accepted_bid_is_streamed(self):
+        stream = live_events(self.auction.id)
+        self.assertEqual(b"retry: 3000\n\n", await anext(stream))
+        pending = asyncio.ensure_future(self.next_event(stream))
+        while not hub.subscribers_count(self.auction.id):
+            await asyncio.sleep(0)
+
+        # Rejected bids are not published
+        await sync_to_async(place_bid)(self.auction.id, self.owner, 5.0)
+        await sync_to_async(place_bid)(self.auction.id, self.owner, 12.0)
+        event = await pending
+        self.assertTrue(event.startswith(b"event: price\n"))
+        self.assertEqual({"price": 12.0}, json.loads(event.split(b"data: ")[1]))
+
+        await stream.aclose()
+        self.assertEqual(0, hub.subscribers_count(self.auction.id))
+
+    async def test_slow_subscriber_memory_is_bounded(self):
+        stream = live_events(self.auction.id)
+        await anext(stream)
+        pending = asyncio.ensure_future(self.next_event(stream))
+        while not hub.subscribers_count(self.auction.id):
+            await asyncio.sleep(0)
+
+        for price in range(MAX_PENDING * 3):
+            hub.publish(self.auction.id, "price", {"price": price})
+        await asyncio.sleep(0)
+        (subscription,) = hub.subscriptions[self.auction.id]
+        self.assertLessEqual(len(subscription.events), MAX_PENDING)
+        pending.cancel()
+        await asyncio.gather(pending, return_exceptions=True)
+        await stream.aclose()
+
+    async def test_live_unknown_auction(self):
+        response = await self.async_client.get(reverse("live", args=[self.auction.id + 100]))
+        self.assertEqual(404, response.status_code)
+
+    def test_comment_is_published(self):
+        self.client.force_login(self.owner)
+        with mock.patch.object(hub, "publish") as publish:
+            self.client.post(reverse("comment", args=[self.auction.id]), {"comment": "Nice!"})
+        publish.assert_called_once()
+        self.assertEqual("comment", publish.call_args.args[1])
+        self.assertEqual("Nice!", publish.call_args.args[2]["text"])
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class ListingPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        # Repeated prices check the id tie breaker
+        Auction.objects.bulk_create(
+            Auction(name=f"auction{i}", price=float(i % 7), owner=owner) for i in range(23)
+        )
+        # bulk_create bypasses the statistics counters
+        stats.rebuild()
+        cls.listing_url = reverse("listing")
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, params):
+        """Follows next cursors, returning every page's auction ids"""
+        pages = []
+        response = self.client.get(self.listing_url, params)
+        while True:
+            page = response.context["page"]
+            pages.append([auction.id for auction in page])
+            if not page.has_next():
+                return pages, page
+            response = self.client.get(
+                self.listing_url, {**params, "cursor": page.next_cursor}
+            )
+
+    def test_cursor_mode_covers_every_auction(self):
+        for order in ("date", "price"):
+            pages, _ = self.walk({"mode": "cursor", "order": order, "per_page_number": 5})
+            ids = [auction_id for page in pages for auction_id in page]
+            expected = list(
+                Auction.objects.order_by(order, "id").values_list("id", flat=True)
+            )
+            self.assertEqual(expected, ids)
+            self.assertEqual([5, 5, 5, 5, 3], [len(page) for page in pages])
+
+    def test_cursor_mode_previous_pages(self):
+        pages, last_page = self.walk({"mode": "cursor", "per_page_number": 5})
+        page = last_page
+        for expected in reversed(pages[:-1]):
+            response = self.client.get(
+                self.listing_url, {"cursor": page.previous_cursor, "per_page_number": 5}
+            )
+            page = response.context["page"]
+            self.assertEqual(expected, [auction.id for auction in page])
+        self.assertFalse(page.has_previous())
+
+    def test_cursor_mode_skips_count(self):
+        # Warms up the statistics used by the filter form
+        self.client.get(self.listing_url, {"mode": "cursor"})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.listing_url, {"mode": "cursor"})
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries.captured_queries))
+
+        response = self.client.get(self.listing_url, {"mode": "cursor", "count": "1"})
+        self.assertContains(response, "23 auctions")
+
+    def test_malformed_cursor_falls_back_to_first_page(self):
+        response = self.client.get(self.listing_url, {"cursor": "not-a-cursor"})
+        self.assertEqual(200, response.status_code)
+        self.assertFalse(response.context["page"].has_previous())
+
+    def test_page_numbers_mode_uses_counters(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.listing_url, {"page": 2, "per_page_number": 5})
+        counts = [query for query in queries.captured_queries if "COUNT(" in query["sql"]]
+        self.assertEqual(0, len(counts))
+        self.assertEqual(2, response.context["page"].number)
+        self.assertEqual(5, response.context["page"].paginator.num_pages)
+
+    def test_page_numbers_mode_price_filter_counts_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                self.listing_url, {"start_price": 3, "per_page_number": 5}
+            )
+        counts = [query for query in queries.captured_queries if "COUNT(" in query["sql"]]
+        self.assertEqual(1, len(counts))
+        self.assertEqual(
+            Auction.objects.filter(price__gte=3).count(),
+            response.context["page"].paginator.count,
+        )
+
+
+class AuctionStatisticsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        self.bidder = User.objects.create_user(username="bidder", password="NotSafe1234")
+        self.books = Auction.objects.create(
+            name="book", price=5.0, owner=self.owner, category=AuctionCategories.BOOKS_AND_MEDIA
+        )
+        self.car = Auction.objects.create(
+            name="car", price=500.0, owner=self.owner, category=AuctionCategories.AUTO_AND_PARTS
+        )
+        self.toy = Auction.objects.create(
+            name="toy", price=20.0, owner=self.owner, category=AuctionCategories.TOYS_AND_GAMES,
+            status=AuctionStatus.DEACTIVE,
+        )
+
+    def test_price_bounds(self):
+        self.assertEqual((5.0, 500.0), stats.price_bounds())
+        self.assertEqual((500.0, 500.0), stats.price_bounds(category=AuctionCategories.AUTO_AND_PARTS))
+        self.assertEqual((20.0, 20.0), stats.price_bounds(status=AuctionStatus.DEACTIVE))
+        self.assertEqual((None, None), stats.price_bounds(category=AuctionCategories.OTHER))
+
+    def test_refreshed_on_save_and_delete(self):
+        # Moving an auction refreshes both buckets
+        self.car.category = AuctionCategories.TOYS_AND_GAMES
+        self.car.save()
+        self.assertEqual((None, None), stats.price_bounds(category=AuctionCategories.AUTO_AND_PARTS))
+        self.assertEqual((20.0, 500.0), stats.price_bounds(category=AuctionCategories.TOYS_AND_GAMES))
+
+        self.car.delete()
+        self.assertEqual((5.0, 20.0), stats.price_bounds())
+
+    def test_refreshed_on_bid(self):
+        place_bid(self.books.id, self.bidder, 1000.0)
+        self.assertEqual((20.0, 1000.0), stats.price_bounds())
+        self.assertEqual((1000.0, 1000.0), stats.price_bounds(category=AuctionCategories.BOOKS_AND_MEDIA))
+
+    def test_rebuild_matches_refreshes(self):
+        refreshed = stats.buckets()
+        AuctionStatistics.objects.all().delete()
+        cache.clear()
+        self.assertEqual(refreshed, stats.buckets())
+
+    def test_filters_form_reads_cache(self):
+        stats.buckets()
+        with self.assertNumQueries(0):
+            form = AuctionsListingFiltersForm({"category": AuctionCategories.BOOKS_AND_MEDIA})
+        self.assertEqual(5.0, form.fields["start_price"].initial)
+        self.assertEqual(5.0, form.fields["end_price"].initial)
+        with self.assertNumQueries(0):
+            form = AuctionsListingFiltersForm()
+        self.assertEqual(5.0, form.fields["start_price"].initial)
+        self.assertEqual(500.0, form.fields["end_price"].initial)
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class AuctionCountersTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        self.auctions = [
+            Auction.objects.create(name=f"auction{i}", price=1.0, owner=self.owner)
+            for i in range(3)
+        ]
+
+    def test_counters_follow_writes(self):
+        self.assertEqual(3, stats.counts(status=AuctionStatus.ACTIVE))
+        self.auctions[0].status = AuctionStatus.CLOSED
+        self.auctions[0].save()
+        self.auctions[1].category = AuctionCategories.BOOKS_AND_MEDIA
+        self.auctions[1].save()
+        self.auctions[2].delete()
+
+        self.assertEqual(1, stats.counts(status=AuctionStatus.ACTIVE))
+        self.assertEqual(1, stats.counts(status=AuctionStatus.CLOSED))
+        self.assertEqual(1, stats.counts(category=AuctionCategories.BOOKS_AND_MEDIA))
+        self.assertEqual(2, stats.counts())
+
+    def test_index_and_categories_skip_count(self):
+        stats.buckets()
+        for url in (reverse("index"), reverse("categories")):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(200, response.status_code)
+            self.assertFalse(any("COUNT(" in query["sql"] for query in queries.captured_queries))
+        self.assertContains(response, "3 auctions")
+
+    def test_rebuild_statistics_command(self):
+        output = StringIO()
+        call_command("rebuild_statistics", "--check", stdout=output)
+        self.assertIn("Statistics are in sync!", output.getvalue())
+
+        # Drift: writes that bypass the counters
+        Auction.objects.filter(id=self.auctions[0].id).update(status=AuctionStatus.CLOSED)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_statistics", "--check", stdout=StringIO())
+
+        output = StringIO()
+        call_command("rebuild_statistics", stdout=output)
+        self.assertIn("Rebuilt statistics, fixed 2 buckets", output.getvalue())
+        self.assertEqual(1, stats.counts(status=AuctionStatus.CLOSED))
+
+
+class PageCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        caching.statistics.reset()
+        self.owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        self.bidder = User.objects.create_user(username="bidder", password="NotSafe1234")
+        self.auction = Auction.objects.create(name="auction", price=10.0, owner=self.owner)
+        self.auction_url = reverse("auction", args=[self.auction.id])
+
+    def test_anonymous_pages_are_cached(self):
+        for url in (reverse("index"), reverse("categories"), reverse("listing"), self.auction_url):
+            self.client.get(url)
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertEqual(200, response.status_code)
+        report = caching.statistics.report()["page"]
+        self.assertEqual((4, 4), (report["hits"], report["misses"]))
+        self.assertEqual(0.5, report["hit_rate"])
+        self.assertGreater(report["saved_seconds"], 0)
+
+    def test_listing_key_covers_query_string(self):
+        listing_url = reverse("listing")
+        self.client.get(listing_url, {"status": "A", "category": "1"})
+        # Same parameters in another order hit, other parameters miss
+        with self.assertNumQueries(0):
+            self.client.get(f"{listing_url}?category=1&status=A")
+        response = self.client.get(listing_url, {"status": "C"})
+        self.assertIsNotNone(response.context)
+
+    def test_authenticated_pages_are_not_cached(self):
+        self.client.force_login(self.bidder)
+        self.client.get(self.auction_url)
+        response = self.client.get(self.auction_url)
+        self.assertIsNotNone(response.context)
+
+    def test_writes_invalidate_pages(self):
+        self.client.get(self.auction_url)
+        self.client.get(reverse("index"))
+
+        place_bid(self.auction.id, self.bidder, 42.0)
+        self.assertContains(self.client.get(self.auction_url), "42.00")
+        self.assertContains(self.client.get(reverse("index")), "42.00")
+
+        Comment.objects.create(auction=self.auction, commenter=self.bidder, text="Fresh comment")
+        self.assertContains(self.client.get(self.auction_url), "Fresh comment")
+
+        self.auction.name = "renamed"
+        self.auction.save()
+        self.assertContains(self.client.get(reverse("index")), "renamed")
+
+    def test_bids_only_invalidate_the_lists_showing_their_auction(self):
+        other = Auction.objects.create(name="other", price=3.0, owner=self.owner)
+        shown_url = f"{reverse('listing')}?per_page_number=1&page=1"
+        other_url = f"{reverse('listing')}?per_page_number=1&page=2"
+        priced_url = f"{reverse('listing')}?order=price&mode=cursor"
+        for url in (shown_url, other_url, priced_url):
+            self.client.get(url)
+
+        place_bid(self.auction.id, self.bidder, 42.0)
+        with self.assertNumQueries(0):
+            self.client.get(other_url)
+        self.assertContains(self.client.get(shown_url), "42.00")
+        self.assertContains(self.client.get(priced_url), "42.00")
+        self.assertNotContains(self.client.get(other_url), "42.00")
+        self.assertContains(self.client.get(other_url), other.name)
+
+    def test_lists_rendered_during_a_bid_are_not_cached(self):
+        url = reverse("listing")
+        real_versions = caching.versions
+
+        # The bid lands after the page read its auctions, before their versions
+        def versions(*scopes):
+            if f"auction:{self.auction.id}" in scopes and not Bid.objects.exists():
+                place_bid(self.auction.id, self.bidder, 42.0)
+            return real_versions(*scopes)
+
+        with mock.patch.object(caching, "versions", versions):
+            self.assertNotContains(self.client.get(url), "42.00")
+        self.assertContains(self.client.get(url), "42.00")
+
+    def test_listing_is_assembled_from_cached_cards(self):
+        other = Auction.objects.create(name="other", price=3.0, owner=self.owner)
+        self.client.get(reverse("index"))
+        caching.statistics.reset()
+        # Different page, same cards
+        self.client.get(reverse("listing"))
+        report = caching.statistics.report()["fragment"]
+        self.assertEqual((2, 0), (report["hits"], report["misses"]))
+
+        # Only the card whose price changed is re-rendered
+        place_bid(other.id, self.bidder, 4.0)
+        caching.statistics.reset()
+        self.client.get(reverse("listing"))
+        report = caching.statistics.report()["fragment"]
+        self.assertEqual((1, 1), (report["hits"], report["misses"]))
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class SharedCacheCheckTest(TestCase):
+    LOCAL = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    REDIS = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://localhost"}}
+
+    def check_ids(self):
+        return [message.id for message in checks.check_shared_cache(None)]
+
+    def test_several_workers_refuse_a_process_local_cache(self):
+        cached_db = "django.contrib.sessions.backends.cached_db"
+        with override_settings(CACHES=self.LOCAL, WORKER_PROCESSES=2, PAGE_CACHE_ENABLED=True, SESSION_ENGINE=cached_db):
+            self.assertEqual(["auctions.E001", "auctions.E002", "auctions.W001"], self.check_ids())
+        # What the settings fall back to without a shared cache
+        db = "django.contrib.sessions.backends.db"
+        with override_settings(CACHES=self.LOCAL, WORKER_PROCESSES=2, PAGE_CACHE_ENABLED=False, SESSION_ENGINE=db):
+            self.assertEqual(["auctions.W001"], self.check_ids())
+        with override_settings(CACHES=self.REDIS, WORKER_PROCESSES=2, PAGE_CACHE_ENABLED=True, SESSION_ENGINE=cached_db):
+            self.assertEqual([], self.check_ids())
+        with override_settings(CACHES=self.LOCAL, WORKER_PROCESSES=1, PAGE_CACHE_ENABLED=True, SESSION_ENGINE=cached_db):
+            self.assertEqual([], self.check_ids())
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        self.in_name = Auction.objects.create(
+            name="Vintage camera", description="Works fine", price=10.0, owner=self.owner
+        )
+        self.in_description = Auction.objects.create(
+            name="Old box", description="Contains a vintage lens", price=20.0, owner=self.owner,
+            category=AuctionCategories.CONSUMER_ELECTRONICS,
+        )
+        Auction.objects.create(name="Bicycle", description="Red", price=30.0, owner=self.owner)
+
+    def test_names_rank_above_descriptions(self):
+        self.assertEqual([self.in_name, self.in_description], list(search("vintage")))
+
+    def test_every_word_must_match(self):
+        self.assertEqual([self.in_description], list(search("vintage lens")))
+        self.assertEqual([], list(search("vintage bicycle")))
+
+    def test_last_word_matches_as_prefix(self):
+        self.assertEqual([self.in_name], list(search("vintage cam")))
+        self.assertEqual([self.in_name, self.in_description], list(search("vi")))
+
+    def test_limit_ranks_the_newest_matches(self):
+        self.assertEqual([self.in_description], list(search("vintage", limit=1)))
+        self.assertEqual([self.in_name, self.in_description], list(search("vintage", limit=2)))
+        self.assertEqual([], list(search("bicycle", Auction.objects.filter(price__lt=30), limit=1)))
+
+    def test_limit_ranks_by_the_narrow_words(self):
+        lens = Auction.objects.create(name="Lens cap", description="Vintage", price=5.0, owner=self.owner)
+        # "vintage" is in 3 auctions, more than the limit: "lens" alone ranks
+        self.assertEqual([lens, self.in_description], list(search("vintage lens", limit=2)))
+        self.assertEqual([lens, self.in_description], list(search("vintage", limit=2)))
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual([], list(search('"*')))
+        self.assertEqual([], list(search('vintage OR bicycle')))
+        # Operators are plain words, which no auction contains
+        self.assertEqual([], list(search('"vintage" NEAR(camera)')))
+
+    def test_index_follows_saves_and_deletes(self):
+        self.in_name.name = "Digital camera"
+        self.in_name.save()
+        self.assertEqual([self.in_description], list(search("vintage")))
+        self.assertEqual([self.in_name], list(search("digital")))
+
+        self.in_description.delete()
+        self.assertEqual([], list(search("vintage")))
+
+    def test_combines_with_filters(self):
+        auctions = Auction.objects.filter(category=AuctionCategories.CONSUMER_ELECTRONICS)
+        self.assertEqual([self.in_description], list(search("vintage", auctions)))
+        self.assertEqual(1, search("vintage", auctions).count())
+
+    def test_search_view(self):
+        response = self.client.get(reverse("search"), {"q": "vintage", "per_page_number": 1})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([self.in_name], list(response.context["page"]))
+        self.assertEqual(2, response.context["page"].paginator.count)
+
+        response = self.client.get(
+            reverse("search"), {"q": "vintage", "category": AuctionCategories.CONSUMER_ELECTRONICS}
+        )
+        self.assertEqual([self.in_description], list(response.context["page"]))
+        self.assertContains(self.client.get(reverse("search"), {"q": "nothing"}), "Nothing Matched")
+
+    def test_search_pages_are_bounded(self):
+        for n in range(14):
+            Auction.objects.create(name=f"Vintage lot {n}", description="Bulk", price=5.0, owner=self.owner)
+        with mock.patch("auctions.views.SEARCH_MAX_RESULTS", 12):
+            response = self.client.get(reverse("search"), {"q": "vintage", "per_page_number": 1})
+        # Matches past the cap aren't counted, and far pages are elided
+        self.assertEqual(12, response.context["page"].paginator.count)
+        self.assertContains(response, "page=12")
+        self.assertNotContains(response, "page=6")
+        self.assertContains(response, "…")
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class QueryShapeAuditTest(TestCase):
+    def test_views_neither_scan_nor_sort(self):
+        auctions = audit.seed(auctions=60, users=5)
+        auction = next(a for a in auctions if a.status == AuctionStatus.ACTIVE)
+        reports = audit.audit(audit.workload(self.client, auction, auction.owner))
+
+        self.assertGreater(len(reports), 20)
+        self.assertEqual([], [(report.request, report.plan) for report in audit.flagged(reports)])
+
+    def test_findings(self):
+        self.assertEqual(
+            [audit.Finding("scan", "SCAN auctions_bid", None)],
+            audit.inspect("SELECT * FROM auctions_bid", ["SCAN auctions_bid"]),
+        )
+        self.assertEqual([], audit.inspect("SELECT 1", ["SCAN auctions_auction USING INDEX x"]))
+        sort = "USE TEMP B-TREE FOR ORDER BY"
+        sql = "SELECT rank FROM auctions_auction_fts ORDER BY rank"
+        self.assertIsNotNone(audit.inspect(sql, [sort])[0].accepted)
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class BenchmarkSuiteTest(TestCase):
+    def test_every_url_is_benchmarked(self):
+        from auctions.urls import urlpatterns
+
+        names = {pattern.name for pattern in urlpatterns} | {"index", "register", "userprofile"}
+        covered = {case.url for case in benchmark.cases()} | set(benchmark.EXCLUDED)
+        self.assertEqual(set(), names - covered)
+
+    def test_cases_run(self):
+        fixtures = benchmark.seed(30)
+        results = benchmark.run(fixtures, repeat=1)
+
+        self.assertEqual(
+            {case.name: case.status for case in benchmark.cases()},
+            {name: figures["status"] for name, figures in results.items()},
+        )
+        self.assertGreater(results["auction"]["queries"], 0)
+        self.assertGreater(results["listing"]["peak_kib"], 0)
+
+    def test_regressions(self):
+        base = {"queries": 3, "p50_ms": 10.0, "p99_ms": 20.0, "peak_kib": 100.0}
+        baseline = {"auction": base}
+        # The p99 of a few samples is only reported
+        self.assertEqual([], benchmark.compare({"auction": dict(base, p99_ms=250.0)}, baseline))
+        self.assertEqual([], benchmark.compare({"new case": dict(base, queries=50)}, baseline))
+
+        regressions = benchmark.compare({"auction": dict(base, queries=4, p50_ms=40.0)}, baseline)
+        self.assertEqual(["auction: 4 queries, baseline 3", "auction: p50_ms 40.0, baseline 10.0"], regressions)
+
+    def test_flat_pages_dont_grow_with_the_scale(self):
+        figures = {"queries": 3, "p50_ms": 10.0, "p99_ms": 20.0, "peak_kib": 100.0}
+        small, large = str(benchmark.SCALES[0]), str(benchmark.SCALES[-1])
+        baseline = {
+            small: {"listing": figures, "export auctions": figures},
+            large: {"listing": dict(figures, p50_ms=25.0), "export auctions": dict(figures, p50_ms=900.0)},
+        }
+        # Within the ratio, and exports aren't flat
+        self.assertEqual([], benchmark.compare_scales(baseline))
+        # Past the ratio, however the page compares with its own scale's baseline
+        baseline[large]["listing"] = dict(figures, p50_ms=40.0)
+        self.assertEqual(
+            [f"listing: p50_ms 40.0 at scale {large}, 10.0 at scale {small}"], benchmark.compare_scales(baseline)
+        )
+        self.assertEqual([], benchmark.compare_scales({small: baseline[small]}))
+
+
+@override_settings(PAGE_CACHE_ENABLED=False, QUERY_BUDGET_ENABLED=True)
+class QueryBudgetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        self.bidder = User.objects.create_user(username="bidder", password="NotSafe1234")
+        self.admin = User.objects.create_superuser(username="admin", password="NotSafe1234")
+        self.auction = Auction.objects.create(name="auction", price=1.0, owner=self.owner)
+        place_bid(self.auction.id, self.bidder, 2.0)
+        self.auction.refresh_from_db()
+
+    def add_rows(self, count):
+        users = User.objects.bulk_create(User(username=f"user{i}") for i in range(len(User.objects.all()), count + 3))
+        Comment.objects.bulk_create(Comment(auction=self.auction, commenter=user, text="hi") for user in users)
+        Bid.objects.bulk_create(Bid(auction=self.auction, bidder=user, price=1.5) for user in users)
+        auctions = Auction.objects.bulk_create(Auction(name="other", price=1.0, owner=user) for user in users)
+        self.owner.userprofile.watch_list.add(*auctions)
+
+    def page_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(200, self.client.get(url).status_code)
+        return len(queries)
+
+    def test_pages_cost_the_same_for_any_number_of_rows(self):
+        self.client.force_login(self.admin)
+        urls = [
+            reverse("auction", args=[self.auction.id]),
+            reverse("admin:auctions_auction_changelist"),
+            reverse("admin:auctions_auction_change", args=[self.auction.id]),
+            reverse("admin:auctions_bid_changelist"),
+            reverse("admin:auctions_bid_change", args=[self.auction.top_bid_id]),
+            reverse("admin:auctions_comment_changelist"),
+        ]
+        self.add_rows(1)
+        # Warms process wide caches, e.g. content types
+        for url in urls:
+            self.page_queries(url)
+        few = [self.page_queries(url) for url in urls]
+        self.add_rows(15)
+        self.client.force_login(self.admin)
+        self.assertEqual(few, [self.page_queries(url) for url in urls])
+
+    def test_admin_changelists_count_up_to_a_cap(self):
+        self.client.force_login(self.admin)
+        self.add_rows(15)
+        with mock.patch.object(CappedPaginator, "max_count", 4):
+            response = self.client.get(reverse("admin:auctions_comment_changelist"))
+        changelist = response.context["cl"]
+        self.assertEqual(4, changelist.result_count)
+        self.assertIsNone(changelist.full_result_count)
+        self.assertEqual(Comment.objects.order_by("-date", "-id").first(), changelist.result_list[0])
+
+    def test_userprofile_cost_is_constant(self):
+        self.client.force_login(self.owner)
+        self.add_rows(1)
+        few = self.page_queries(reverse("userprofile"))
+        self.add_rows(15)
+        self.assertEqual(few, self.page_queries(reverse("userprofile")))
+
+    def test_views_stay_within_budgets(self):
+        for user in (None, self.bidder):
+            if user:
+                self.client.force_login(user)
+            for url in (
+                reverse("index"),
+                reverse("categories"),
+                reverse("listing") + "?start_price=1",
+                reverse("listing") + "?mode=cursor&count=1",
+                reverse("search") + "?q=auction",
+                reverse("auction", args=[self.auction.id]),
+            ):
+                cache.clear()
+                self.assertEqual(200, self.client.get(url).status_code)
+
+    def test_budget_exceeded_raises(self):
+        @query_budget(1)
+        def view():
+            return list(User.objects.all()) + list(Auction.objects.all())
+
+        with self.assertRaisesMessage(QueryBudgetExceeded, "ran 2 queries, its budget is 1"):
+            view()
+        with override_settings(QUERY_BUDGET_ENABLED=False):
+            view()
+
+
+class ImageVariantsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.owner = User.objects.create_user(username="owner", password="NotSafe1234")
+
+    def upload(self, size=(2000, 1000), mode="RGB"):
+        buffer = BytesIO()
+        Image.new(mode, size).save(buffer, "PNG")
+        return SimpleUploadedFile("picture.png", buffer.getvalue(), "image/png")
+
+    def variant_size(self, name, variant):
+        with Image.open(Path(self.media_root, images.variant_name(name, variant))) as image:
+            return image.format, image.size
+
+    def test_variants_are_resized_webp(self):
+        auction = Auction.objects.create(name="auction", price=1.0, owner=self.owner, picture=self.upload())
+        name = auction.picture.name
+        self.assertEqual(3, len(images.build_variants(name)))
+
+        self.assertEqual(("WEBP", (160, 80)), self.variant_size(name, "thumb"))
+        self.assertEqual(("WEBP", (480, 240)), self.variant_size(name, "card"))
+        self.assertEqual(("WEBP", (1600, 800)), self.variant_size(name, "full"))
+        # Already built
+        self.assertEqual([], images.build_variants(name))
+
+    def test_small_and_transparent_images(self):
+        auction = Auction.objects.create(
+            name="auction", price=1.0, owner=self.owner, picture=self.upload((300, 200), "RGBA")
+        )
+        images.build_variants(auction.picture.name)
+        self.assertEqual(("WEBP", (300, 200)), self.variant_size(auction.picture.name, "full"))
+        with Image.open(Path(self.media_root, images.variant_name(auction.picture.name, "card"))) as image:
+            self.assertEqual("RGBA", image.mode)
+
+    def test_uploads_are_processed_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            auction = Auction.objects.create(name="auction", price=1.0, owner=self.owner, picture=self.upload())
+            # Originals are served until the variants are built
+            self.assertEqual(auction.picture.url, images.variant_url(auction.picture, "card"))
+        images.wait()
+
+        card_url = images.variant_url(auction.picture, "card")
+        self.assertTrue(card_url.endswith(".card.webp"))
+        # Built variants are known from the cache, without a storage lookup
+        with mock.patch.object(images.default_storage, "exists") as exists:
+            self.assertEqual(card_url, images.variant_url(auction.picture, "card"))
+            self.client.get(reverse("api_auction", args=[auction.id]))
+        exists.assert_not_called()
+        self.assertContains(self.client.get(reverse("index")), card_url)
+        self.assertContains(self.client.get(reverse("auction", args=[auction.id])), ".full.webp")
+
+    def test_avatar_uploads_are_processed(self):
+        profile = self.owner.userprofile
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.avatar = self.upload()
+            profile.save()
+        images.wait()
+        self.assertEqual(("WEBP", (480, 240)), self.variant_size(profile.avatar.name, "card"))
+
+    def test_backfill_command(self):
+        Auction.objects.create(name="auction", price=1.0, owner=self.owner, picture=self.upload())
+        self.owner.userprofile.avatar = self.upload()
+        self.owner.userprofile.save()
+
+        output = StringIO()
+        # Two uploads; the default images don't exist in this media root
+        with self.assertLogs("auctions.images", "WARNING"):
+            call_command("build_image_variants", "--workers", "2", stdout=output)
+        self.assertIn("Built 6 variants of 4 images", output.getvalue())
+
+        output = StringIO()
+        with self.assertLogs("auctions.images", "WARNING"):
+            call_command("build_image_variants", stdout=output)
+        self.assertIn("Built 0 variants", output.getvalue())
+
+    def test_cleanup_removes_orphan_variants(self):
+        auction = Auction.objects.create(name="auction", price=1.0, owner=self.owner, picture=self.upload())
+        images.build_variants(auction.picture.name)
+        kept = images.variant_name(auction.picture.name, "card")
+        # Variant of an image stored by upload name, before content addressed storage
+        orphan = images.variant_name("auction_images/gone.png", "card")
+        Path(self.media_root, orphan).parent.mkdir(parents=True, exist_ok=True)
+        Path(self.media_root, orphan).write_bytes(b"orphan")
+
+        call_command("cleanup", "--yes", stdout=StringIO())
+        self.assertTrue(Path(self.media_root, kept).exists())
+        self.assertFalse(Path(self.media_root, orphan).exists())
+
+
+class MediaBlobTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.owner = User.objects.create_user(username="owner", password="NotSafe1234")
+
+    def upload(self, color="red", name="picture.png"):
+        buffer = BytesIO()
+        Image.new("RGB", (8, 8), color).save(buffer, "PNG")
+        return SimpleUploadedFile(name, buffer.getvalue(), "image/png")
+
+    def create(self, picture):
+        return Auction.objects.create(name="auction", price=1.0, owner=self.owner, picture=picture)
+
+    def references(self, name):
+        return MediaBlob.objects.get(name=name).references
+
+    def stored_files(self):
+        return sorted(
+            str(path.relative_to(self.media_root)) for path in Path(self.media_root).rglob("*") if path.is_file()
+        )
+
+    def test_duplicates_are_stored_once(self):
+        first = self.create(self.upload(name="first.PNG"))
+        second = self.create(self.upload(name="second.png"))
+        self.assertEqual(first.picture.name, second.picture.name)
+        self.assertRegex(first.picture.name, r"^auction_images/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.png$")
+        self.assertEqual([first.picture.name], self.stored_files())
+        self.assertEqual(2, self.references(first.picture.name))
+
+        # Same content, other upload directory
+        self.owner.userprofile.avatar = self.upload()
+        self.owner.userprofile.save()
+        self.assertTrue(self.owner.userprofile.avatar.name.startswith("profile_images/"))
+        self.assertEqual(1, self.references(self.owner.userprofile.avatar.name))
+
+    def test_references_follow_changes(self):
+        auction = self.create(self.upload("red"))
+        red = auction.picture.name
+        auction.picture = self.upload("blue")
+        auction.save()
+        blue = auction.picture.name
+        self.assertEqual((0, 1), (self.references(red), self.references(blue)))
+
+        # Saves leaving the picture alone don't count
+        auction.name = "renamed"
+        auction.save()
+        auction.save(update_fields=["name"])
+        self.assertEqual(1, self.references(blue))
+
+        auction.delete()
+        self.assertEqual(0, self.references(blue))
+        # Default images aren't counted
+        self.create("auction.png")
+        self.assertFalse(MediaBlob.objects.filter(name="auction.png").exists())
+
+    def test_collect_deletes_orphans_only(self):
+        kept = self.create(self.upload("red"))
+        orphan = self.create(self.upload("blue"))
+        orphan_name = orphan.picture.name
+        images.build_variants(orphan_name)
+        orphan.delete()
+
+        # Within the grace period
+        self.assertEqual([], blobs.collect())
+        self.assertEqual([orphan_name], blobs.collect(timedelta(0), dry_run=True))
+        self.assertEqual([orphan_name], blobs.collect(timedelta(0)))
+        self.assertEqual([kept.picture.name], self.stored_files())
+        self.assertFalse(MediaBlob.objects.filter(name=orphan_name).exists())
+
+        # Re-uploading the content stores it again
+        again = self.create(self.upload("blue"))
+        self.assertEqual(orphan_name, again.picture.name)
+        self.assertTrue(Path(again.picture.path).exists())
+
+    def test_uploads_reusing_an_orphan_keep_it_from_collection(self):
+        orphan = self.create(self.upload("blue"))
+        name = orphan.picture.name
+        orphan.delete()
+        MediaBlob.objects.filter(name=name).update(released=timezone.now() - 2 * blobs.COLLECT_GRACE)
+
+        # Stored, the auction referring to it not saved yet
+        self.assertEqual(name, blobs.blob_storage().save("auction_images/again.png", self.upload("blue")))
+        self.assertEqual([], blobs.collect())
+        self.assertEqual(name, self.create(self.upload("blue")).picture.name)
+        self.assertEqual([name], self.stored_files())
+
+    def test_collect_cost_doesnt_grow_with_images(self):
+        for color in range(20):
+            self.create(self.upload((color, 0, 0)))
+        self.create(self.upload("blue")).delete()
+        # The orphans, then a conditional delete per orphan in its own
+        # transaction (a savepoint here)
+        with self.assertNumQueries(4):
+            self.assertEqual(1, len(blobs.collect(timedelta(0))))
+
+        output = StringIO()
+        call_command("collect_media", "--grace", "0", stdout=output)
+        self.assertIn("Collected 0 unreferenced images", output.getvalue())
+
+    def test_dedupe_moves_upload_names(self):
+        # Images stored by upload name before content addressed storage
+        legacy = Path(self.media_root, "auction_images")
+        legacy.mkdir()
+        content = self.upload().read()
+        for name in ("one.png", "two.png"):
+            legacy.joinpath(name).write_bytes(content)
+        first = self.create("auction_images/one.png")
+        second = self.create("auction_images/two.png")
+
+        output = StringIO()
+        call_command("dedupe_media", stdout=output)
+        self.assertIn("Moved 2 images from 2 upload names", output.getvalue())
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.picture.name, second.picture.name)
+        self.assertEqual(2, self.references(first.picture.name))
+
+        call_command("collect_media", "--grace", "0", stdout=StringIO())
+        stored = [name for name in self.stored_files() if "/variants/" not in name]
+        self.assertEqual([first.picture.name], stored)
+
+
+class AuctionClosingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        self.bidders = User.objects.bulk_create(User(username=f"bidder{i}") for i in range(3))
+        self.ended = timezone.now() - timedelta(seconds=1)
+
+    def seed(self, count, ends_at, **fields):
+        """Auctions ending at once, each with two bids, the last bidder's on top."""
+        auctions = Auction.objects.bulk_create(
+            Auction(name=f"lot {i}", price=1.0, owner=self.owner, ends_at=ends_at, **fields) for i in range(count)
+        )
+        for auction in auctions:
+            Bid.objects.bulk_create(
+                Bid(auction=auction, bidder=bidder, price=2.0 + n) for n, bidder in enumerate(self.bidders[:2])
+            )
+        top_bids = Bid.objects.filter(auction=OuterRef("pk")).order_by("-price").values("pk")[:1]
+        Auction.objects.update(top_bid=Subquery(top_bids))
+        stats.rebuild()
+        return auctions
+
+    def test_ended_auctions_refuse_bids(self):
+        auction = Auction.objects.create(name="auction", price=1.0, owner=self.owner, ends_at=self.ended)
+        self.assertFalse(place_bid(auction.id, self.bidders[0], 2.0))
+
+        self.client.force_login(self.bidders[0])
+        response = self.client.post(reverse("bid", args=[auction.id]), {"price": 3.0}, follow=True)
+        self.assertContains(response, "Auction has ended!")
+        self.assertNotContains(response, 'name="price"')
+
+        auction.ends_at = timezone.now() + timedelta(hours=1)
+        auction.save()
+        self.assertTrue(place_bid(auction.id, self.bidders[0], 2.0))
+
+    def test_auctions_ending_at_once_are_closed_in_batches(self):
+        self.seed(1200, self.ended)
+        later = Auction.objects.create(
+            name="later", price=1.0, owner=self.owner, ends_at=timezone.now() + timedelta(hours=1)
+        )
+        self.assertEqual(1200, stats.counts(status=AuctionStatus.ACTIVE) - 1)
+
+        self.assertEqual(500, closing.close_due(batch_size=500))
+        # Two seeks, the category's closing UPDATE and its two statistics
+        # buckets, plus the savepoint, for the 500 auctions
+        with self.assertNumQueries(7):
+            self.assertEqual(500, closing.close_due(batch_size=500))
+        self.assertEqual(200, closing.close_due(batch_size=500))
+        self.assertEqual(0, closing.close_due(batch_size=500))
+
+        closed = Auction.objects.filter(status=AuctionStatus.CLOSED)
+        self.assertEqual(1200, closed.count())
+        self.assertEqual(1200, closed.filter(winner=self.bidders[1]).count())
+        self.assertEqual(1200, stats.counts(status=AuctionStatus.CLOSED))
+        self.assertEqual(1, stats.counts(status=AuctionStatus.ACTIVE))
+        self.assertEqual(later.ends_at, closing.next_end())
+
+    def racing_due(self, auction, **changes):
+        """closing.due, changing an auction after the two batch reads, before the UPDATE."""
+        due, calls = closing.due, iter(range(100))
+
+        def racing_due(now=None):
+            if next(calls) == 2:
+                Auction.objects.filter(pk=auction.pk).update(**changes)
+            return due(now)
+
+        return mock.patch.object(closing, "due", racing_due)
+
+    def test_closing_skips_changed_auctions(self):
+        kept, closed = self.seed(2, self.ended)
+        # Deactivated by its owner between the batch read and the UPDATE
+        with self.racing_due(kept, status=AuctionStatus.DEACTIVE):
+            self.assertEqual(1, closing.close_due())
+        kept.refresh_from_db()
+        self.assertEqual((AuctionStatus.DEACTIVE, None), (kept.status, kept.winner))
+        self.assertEqual(1, stats.counts(status=AuctionStatus.CLOSED))
+
+    def test_closing_skips_recategorized_auctions(self):
+        kept, closed = self.seed(2, self.ended)
+        # Moved to another category by its owner between the batch read and the UPDATE
+        with self.racing_due(kept, category=AuctionCategories.BOOKS_AND_MEDIA):
+            self.assertEqual(1, closing.close_due())
+        kept.refresh_from_db()
+        self.assertEqual(AuctionStatus.ACTIVE, kept.status)
+        self.assertEqual(1, stats.counts(category=closed.category, status=AuctionStatus.CLOSED))
+        # Closed with the next batch, counted in its new category
+        self.assertEqual(1, closing.close_due())
+        self.assertEqual(1, stats.counts(category=AuctionCategories.BOOKS_AND_MEDIA, status=AuctionStatus.CLOSED))
+
+    def test_hot_auctions_close_after_their_bids_settle(self):
+        self.seed(1, self.ended, hot=True)
+        self.assertEqual(0, closing.close_due())
+        self.assertEqual(1, closing.close_due(timezone.now() + closing.HOT_SETTLE))
+
+    def test_closed_pages_show_the_winner(self):
+        (auction,) = self.seed(1, self.ended)
+        self.client.get(reverse("auction", args=[auction.id]))
+
+        output = StringIO()
+        call_command("close_auctions", "--once", stdout=output)
+        self.assertIn("Closed 1 auctions", output.getvalue())
+        # The cached page was invalidated
+        self.assertContains(self.client.get(reverse("auction", args=[auction.id])), "Ended:")
+        self.client.force_login(self.bidders[1])
+        self.assertContains(self.client.get(reverse("auction", args=[auction.id])), "You've Won This Auction!")
+
+    def test_closing_by_hand_finalizes_the_winner(self):
+        (auction,) = self.seed(1, timezone.now() + timedelta(hours=1))
+        self.client.force_login(self.owner)
+        data = {"name": "lot", "description": "", "category": auction.category, "status": AuctionStatus.CLOSED}
+        self.client.post(reverse("edit_auction", args=[auction.id]), {**data, "ends_at": ""})
+        auction.refresh_from_db()
+        self.assertEqual((AuctionStatus.CLOSED, self.bidders[1].pk), (auction.status, auction.winner_id))
+
+    def test_owner_edits_keep_concurrent_bids(self):
+        (auction,) = self.seed(1, timezone.now() + timedelta(hours=1))
+        self.client.force_login(self.owner)
+        data = {"name": "renamed", "description": "", "category": auction.category, "ends_at": ""}
+        is_valid = AuctionForm.is_valid
+        prices = iter((10, 11))
+
+        # A bid is accepted after the edited auction was read, before it's written
+        def racing_is_valid(form):
+            self.assertTrue(place_bid(auction.id, self.bidders[0], next(prices)))
+            return is_valid(form)
+
+        with mock.patch.object(AuctionForm, "is_valid", racing_is_valid):
+            self.client.post(reverse("edit_auction", args=[auction.id]), {**data, "status": AuctionStatus.ACTIVE})
+            auction.refresh_from_db()
+            self.assertEqual(("renamed", 10, self.bidders[0].pk), (auction.name, auction.price, auction.top_bid.bidder_id))
+
+            self.client.post(reverse("edit_auction", args=[auction.id]), {**data, "status": AuctionStatus.CLOSED})
+        auction.refresh_from_db()
+        self.assertEqual(
+            (AuctionStatus.CLOSED, 11, self.bidders[0].pk), (auction.status, auction.price, auction.winner_id)
+        )
+        self.assertEqual((0, 1), (stats.counts(status=AuctionStatus.ACTIVE), stats.counts(status=AuctionStatus.CLOSED)))
+        self.assertFalse(closing.close(auction.id))
+
+    def test_end_time_must_be_in_the_future(self):
+        self.client.force_login(self.owner)
+        data = {"name": "lot", "description": "", "price": 1.0, "category": AuctionCategories.OTHER, "status": AuctionStatus.ACTIVE}
+        past = (timezone.now() - timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M")
+        response = self.client.post(reverse("add_auction"), {**data, "ends_at": past})
+        self.assertContains(response, "End Time Must Be In The Future!")
+        self.assertFalse(Auction.objects.exists())
+
+
+class BulkImportExportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        self.other = User.objects.create_user(username="other", password="NotSafe1234")
+        self.path = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def write(self, name, lines):
+        path = self.path / name
+        path.write_text("\n".join(lines) + "\n")
+        return str(path)
+
+    def test_command_imports_valid_rows_and_reports_the_others(self):
+        past = (timezone.now() - timedelta(hours=1)).isoformat()
+        path = self.write(
+            "auctions.csv",
+            [
+                "name,description,price,category,status,ends_at",
+                *(f"lot {i},imported,{i + 1},2,A," for i in range(5)),
+                "no price,,abc,2,A,",
+                ",no name,1,2,A,",
+                f"ended,,1,2,A,{past}",
+                "unknown category,,1,99,A,",
+                # Missing category and status get their defaults
+                "defaults,,7,,,",
+            ],
+        )
+        output, errors = StringIO(), StringIO()
+        call_command("import_auctions", path, "--owner", "owner", "--batch-size", "2", stdout=output, stderr=errors)
+
+        self.assertIn("Imported 6 auctions, rejected 4 rows", output.getvalue())
+        for line, field in ((7, "price"), (8, "name"), (9, "ends_at"), (10, "category")):
+            self.assertIn(f"Line {line}: {{\"{field}\"", errors.getvalue())
+        self.assertEqual(6, Auction.objects.filter(owner=self.owner).count())
+        defaults = Auction.objects.get(name="defaults")
+        self.assertEqual((AuctionCategories.OTHER, AuctionStatus.ACTIVE), (defaults.category, defaults.status))
+        # What the skipped signals would have done
+        self.assertEqual(6, stats.counts(status=AuctionStatus.ACTIVE))
+        self.assertEqual(5, search("lot", Auction.objects.all()).count())
+
+    def test_batches_are_inserted_with_one_statement(self):
+        rows = [(line, {"name": f"lot {line}", "price": "1", "category": "2", "status": "A"}, None) for line in range(10)]
+        with CaptureQueriesContext(connection) as queries:
+            report = bulk.import_auctions(rows, self.owner, batch_size=4)
+        self.assertEqual(10, report.created)
+        inserts = [query for query in queries if query["sql"].startswith('INSERT INTO "auctions_auction"')]
+        self.assertEqual(3, len(inserts))
+
+    def test_dry_run_inserts_nothing(self):
+        path = self.write("auctions.jsonl", [json.dumps({"name": "lot", "price": 1})])
+        output = StringIO()
+        call_command("import_auctions", path, "--owner", "owner", "--dry-run", stdout=output)
+        self.assertIn("Validated 1 auctions", output.getvalue())
+        self.assertFalse(Auction.objects.exists())
+
+    def test_endpoint_imports_uploads_and_bodies(self):
+        response = self.client.post(reverse("import_auctions"), {"file": SimpleUploadedFile("a.csv", b"name,price\nlot,1\n")})
+        self.assertEqual(302, response.status_code)
+        self.client.force_login(self.owner)
+
+        upload = SimpleUploadedFile("a.jsonl", b'{"name": "lot", "price": 1}\nnot json\n[1]\n\n{"name": "lot 2", "price": -1.5}\n')
+        report = self.client.post(reverse("import_auctions"), {"file": upload}).json()
+        self.assertEqual(2, report["created"])
+        self.assertEqual([2, 3], [error["line"] for error in report["errors"]])
+        self.assertIn("Invalid JSON", report["errors"][0]["errors"]["__all__"][0])
+
+        report = self.client.post(reverse("import_auctions"), "name,price\nlot 3,2\n", content_type="text/csv").json()
+        self.assertEqual({"created": 1, "rejected": 0, "errors": []}, report)
+        self.assertEqual(3, self.owner.auction_set.count())
+
+        self.assertEqual(400, self.client.post(reverse("import_auctions"), {}).status_code)
+        self.assertEqual(405, self.client.get(reverse("import_auctions")).status_code)
+
+    def test_exports_stream_the_users_rows(self):
+        mine = Auction.objects.create(name="mine, with a comma", price=1.0, owner=self.owner)
+        theirs = Auction.objects.create(name="theirs", price=1.0, owner=self.other)
+        Bid.objects.create(auction=mine, bidder=self.other, price=2.0)
+        Bid.objects.create(auction=theirs, bidder=self.owner, price=2.0)
+        Comment.objects.create(auction=mine, commenter=self.other, text="nice")
+
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse("export", args=["auctions"]))
+        self.assertTrue(response.streaming)
+        self.assertEqual('attachment; filename="auctions.csv"', response["Content-Disposition"])
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn('"mine, with a comma"', content)
+        self.assertNotIn("theirs", content)
+
+        response = self.client.get(reverse("export", args=["bids"]), {"format": "jsonl"})
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([(mine.id, "other", 2.0)], [(row["auction"], row["bidder"], row["price"]) for row in rows])
+
+        response = self.client.get(reverse("export", args=["comments"]))
+        self.assertIn("nice", b"".join(response.streaming_content).decode())
+        self.assertEqual(404, self.client.get(reverse("export", args=["users"])).status_code)
+        self.assertEqual(404, self.client.get(reverse("export", args=["bids"]), {"format": "xml"}).status_code)
+
+    def test_exported_auctions_import_again(self):
+        Auction.objects.bulk_create(Auction(name=f"lot {i}", price=i + 1.0, owner=self.owner) for i in range(1200))
+        output = StringIO()
+        # More rows than a fetched chunk or a written chunk
+        with mock.patch.object(bulk, "EXPORT_CHUNK_SIZE", 500):
+            call_command("export_auctions", "auctions", "--format", "jsonl", stdout=output)
+        path = self.write("export.jsonl", output.getvalue().splitlines())
+
+        call_command("import_auctions", path, "--owner", "other", stdout=StringIO())
+        self.assertEqual(
+            list(Auction.objects.filter(owner=self.owner).values_list("name", "price").order_by("id")),
+            list(Auction.objects.filter(owner=self.other).values_list("name", "price").order_by("id")),
+        )
+
+
+class JsonApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        self.bidders = User.objects.bulk_create(User(username=f"bidder{i}") for i in range(3))
+        self.auction = Auction.objects.create(
+            name="lamp", description="brass", price=1.0, owner=self.owner, category=AuctionCategories.FURNITURE_AND_DECOR
+        )
+        Auction.objects.create(name="book", price=5.0, owner=self.owner, category=AuctionCategories.BOOKS_AND_MEDIA)
+
+    def test_listing_filters_and_paginates(self):
+        response = self.client.get(reverse("api_listing"), {"category": AuctionCategories.FURNITURE_AND_DECOR})
+        self.assertEqual(["lamp"], [auction["name"] for auction in response.json()["results"]])
+
+        first = self.client.get(reverse("api_listing"), {"order": "price", "per_page": 1}).json()
+        self.assertEqual(["lamp"], [auction["name"] for auction in first["results"]])
+        second = self.client.get(reverse("api_listing"), {"order": "price", "per_page": 1, "cursor": first["next"]}).json()
+        self.assertEqual((["book"], None), ([auction["name"] for auction in second["results"]], second["next"]))
+
+        response = self.client.get(reverse("api_listing"), {"start_price": "cheap"})
+        self.assertEqual(400, response.status_code)
+        self.assertIn("start_price", response.json()["errors"])
+
+    def test_auction_details(self):
+        self.auction.winner = self.bidders[0]
+        self.auction.save()
+        data = self.client.get(reverse("api_auction", args=[self.auction.id])).json()
+        self.assertEqual(("lamp", "brass", "owner", "bidder0"), (data["name"], data["description"], data["owner"], data["winner"]))
+        self.assertEqual(404, self.client.get(reverse("api_auction", args=[0])).status_code)
+
+    def test_bids_and_comments_are_chronological(self):
+        for n, bidder in enumerate(self.bidders):
+            self.assertTrue(place_bid(self.auction.id, bidder, 2.0 + n))
+        for text in ("first", "second"):
+            Comment.objects.create(auction=self.auction, commenter=self.owner, text=text)
+
+        page = self.client.get(reverse("api_bids", args=[self.auction.id]), {"per_page": 2}).json()
+        self.assertEqual([("bidder0", 2.0), ("bidder1", 3.0)], [(bid["bidder"], bid["price"]) for bid in page["results"]])
+        page = self.client.get(reverse("api_bids", args=[self.auction.id]), {"cursor": page["next"]}).json()
+        self.assertEqual(["bidder2"], [bid["bidder"] for bid in page["results"]])
+
+        comments = self.client.get(reverse("api_comments", args=[self.auction.id])).json()["results"]
+        self.assertEqual(["first", "second"], [comment["text"] for comment in comments])
+
+    def test_unchanged_polls_are_answered_without_queries(self):
+        self.client.force_login(self.owner)
+        for url in (
+            reverse("api_listing"),
+            reverse("api_auction", args=[self.auction.id]),
+            reverse("api_bids", args=[self.auction.id]),
+            reverse("api_comments", args=[self.auction.id]),
+        ):
+            response = self.client.get(url)
+            self.assertEqual(200, response.status_code)
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(304, response.status_code)
+
+    def test_writes_change_the_etags(self):
+        url = reverse("api_auction", args=[self.auction.id])
+        listing = self.client.get(reverse("api_listing"))["ETag"]
+        etag = self.client.get(url)["ETag"]
+        # Other auctions' writes leave the auction alone
+        Auction.objects.create(name="chair", price=1.0, owner=self.owner)
+        self.assertEqual(304, self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code)
+        self.assertEqual(200, self.client.get(reverse("api_listing"), HTTP_IF_NONE_MATCH=listing).status_code)
+
+        for write in (
+            lambda: place_bid(self.auction.id, self.bidders[0], 2.0),
+            lambda: Comment.objects.create(auction=self.auction, commenter=self.owner, text="hi"),
+            lambda: Bid.objects.filter(auction=self.auction).get().delete(),
+        ):
+            write()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(200, response.status_code)
+            self.assertNotEqual(etag, response["ETag"])
+            etag = response["ETag"]
+
+        # Bids change the listing's ETag through the listed auctions
+        listing = self.client.get(reverse("api_listing"))["ETag"]
+        place_bid(self.auction.id, self.bidders[1], 5.0)
+        self.assertEqual(200, self.client.get(reverse("api_listing"), HTTP_IF_NONE_MATCH=listing).status_code)
+
+        # Query strings have their own ETags
+        self.assertNotEqual(
+            self.client.get(reverse("api_listing"), {"order": "price"})["ETag"],
+            self.client.get(reverse("api_listing"))["ETag"],
+        )
+
+
+class BidLedgerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        self.bidder = User.objects.create_user(username="bidder", password="NotSafe1234")
+        self.auction = Auction.objects.create(name="lamp", price=10.0, owner=self.owner)
+
+    def test_every_attempt_is_recorded(self):
+        for price in (11.0, 15.0, 13.0):
+            place_bid(self.auction.id, self.bidder, price)
+        # Bids on missing auctions are rejected without a ledger row
+        self.assertFalse(place_bid(0, self.bidder, 20.0))
+
+        self.assertEqual(15.0, Bid.objects.get(auction=self.auction, bidder=self.bidder).price)
+        self.assertEqual(
+            [(11.0, BidOutcome.ACCEPTED), (15.0, BidOutcome.ACCEPTED), (13.0, BidOutcome.REJECTED)],
+            list(BidAttempt.objects.order_by("id").values_list("price", "outcome")),
+        )
+
+    def test_history_views_are_paginated_newest_first(self):
+        other = Auction.objects.create(name="chair", price=1.0, owner=self.owner)
+        for price in range(11, 16):
+            place_bid(self.auction.id, self.bidder, float(price))
+        place_bid(other.id, self.owner, 2.0)
+
+        self.client.force_login(self.owner)
+        page = self.client.get(reverse("bid_history", args=[self.auction.id]), {"per_page_number": 3}).context["page"]
+        self.assertEqual([15.0, 14.0, 13.0], [attempt.price for attempt in page])
+        page = self.client.get(
+            reverse("bid_history", args=[self.auction.id]), {"per_page_number": 3, "cursor": page.next_cursor}
+        ).context["page"]
+        self.assertEqual(([12.0, 11.0], False), ([attempt.price for attempt in page], page.has_next()))
+        # Pages are bounded, whatever is asked for
+        page = self.client.get(reverse("bid_history", args=[self.auction.id]), {"per_page_number": 10_000_000}).context["page"]
+        self.assertEqual(100, page.paginator.per_page)
+        # Only the listing counts its cursor pages
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("bid_history", args=[self.auction.id]), {"count": 1})
+        self.assertNotContains(response, "pagination-current")
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries.captured_queries))
+
+        response = self.client.get(reverse("my_bids"))
+        self.assertEqual([other.id], [attempt.auction.id for attempt in response.context["page"]])
+        self.assertContains(response, "chair")
+        self.client.logout()
+        self.assertEqual(302, self.client.get(reverse("my_bids")).status_code)
+
+    def test_rollups_are_incremental(self):
+        minute = timezone.now().replace(second=0, microsecond=0) - timedelta(minutes=10)
+        rows = [(minute, 11.0, BidOutcome.ACCEPTED), (minute, 10.5, BidOutcome.REJECTED), (minute + timedelta(minutes=1), 12.0, BidOutcome.ACCEPTED)]
+        attempts = BidAttempt.objects.bulk_create(
+            BidAttempt(auction=self.auction, bidder=self.bidder, price=price, outcome=outcome) for date, price, outcome in rows
+        )
+        for attempt, (date, price, outcome) in zip(attempts, rows):
+            BidAttempt.objects.filter(pk=attempt.pk).update(date=date + timedelta(seconds=10))
+
+        # A bucket per batch
+        with mock.patch.object(ledger, "ROLLUP_BATCH_SIZE", 1):
+            self.assertEqual(3, ledger.roll_up())
+        self.assertEqual(0, ledger.roll_up())
+        # A late attempt in a rolled up minute is added to its bucket
+        late = BidAttempt.objects.create(auction=self.auction, bidder=self.bidder, price=11.5, outcome=BidOutcome.ACCEPTED)
+        BidAttempt.objects.filter(pk=late.pk).update(date=minute + timedelta(seconds=50))
+        # Recent attempts wait for concurrent transactions to settle
+        place_bid(self.auction.id, self.bidder, 20.0)
+        self.assertEqual(1, ledger.roll_up())
+
+        self.assertEqual(
+            [(3, 2, 11.0, 11.5), (1, 1, 12.0, 12.0)],
+            list(BidRollup.objects.order_by("minute").values_list("attempts", "accepted", "low", "high")),
+        )
+        self.assertEqual(1, ledger.roll_up(timezone.now() + ledger.ROLLUP_SETTLE))
+
+    def test_rollups_api_and_command(self):
+        url = reverse("api_rollups", args=[self.auction.id])
+        etag = self.client.get(url)["ETag"]
+        place_bid(self.auction.id, self.bidder, 11.0)
+        BidAttempt.objects.update(date=timezone.now() - timedelta(minutes=1))
+
+        output = StringIO()
+        call_command("rollup_bids", "--once", stdout=output)
+        self.assertIn("Rolled up 1 bid attempts", output.getvalue())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([(1, 1, 11.0, 11.0)], [(r["attempts"], r["accepted"], r["low"], r["high"]) for r in response.json()["results"]])
+
+
+class NotificationsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        self.auction = Auction.objects.create(name="lamp", price=10.0, owner=self.owner)
+        self.watchers = [User.objects.create_user(username=f"watcher{i}", password="NotSafe1234") for i in range(5)]
+        for watcher in self.watchers:
+            watcher.userprofile.watch_list.add(self.auction)
+
+    def test_fan_out_is_batched(self):
+        # A seek and a bulk insert per batch of 2, whatever the number of watchers
+        with self.assertNumQueries(6):
+            notified = notifications.fan_out(
+                self.auction.id, NotificationKind.BID, 11.0, exclude=self.watchers[0].pk, batch_size=2
+            )
+        self.assertEqual(4, notified)
+        self.assertEqual(
+            {watcher.pk for watcher in self.watchers[1:]},
+            set(Notification.objects.filter(auction=self.auction, price=11.0).values_list("user_id", flat=True)),
+        )
+
+    def test_accepted_bids_and_closes_are_scheduled(self):
+        with mock.patch.object(notifications, "_queue") as queue:
+            with self.captureOnCommitCallbacks(execute=True):
+                place_bid(self.auction.id, self.watchers[0], 9.0)
+                place_bid(self.auction.id, self.watchers[0], 12.0)
+        queue.assert_called_once_with(self.auction.id, NotificationKind.BID, 12.0, self.watchers[0].pk)
+
+        Auction.objects.filter(pk=self.auction.pk).update(ends_at=timezone.now() - timedelta(seconds=1))
+        with mock.patch.object(notifications, "_submit") as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                closing.close_due()
+        submit.assert_called_once_with(notifications.fan_out_closed, [self.auction.id])
+
+        # Only closed auctions with watchers are notified, at their final price
+        other = Auction.objects.create(name="chair", price=1.0, owner=self.owner, status=AuctionStatus.CLOSED)
+        self.assertEqual(5, notifications.fan_out_closed([self.auction.id, other.id]))
+        self.assertEqual(5, Notification.objects.filter(kind=NotificationKind.CLOSED, price=12.0).count())
+
+    def test_unread_count_is_cached(self):
+        watcher = self.watchers[0]
+        self.client.force_login(watcher)
+        url = reverse("unread_notifications")
+        self.assertEqual({"unread": 0}, self.client.get(url).json())
+        # The user only, the session comes from the cache
+        with self.assertNumQueries(1):
+            self.assertEqual({"unread": 0}, self.client.get(url).json())
+
+        notifications.fan_out(self.auction.id, NotificationKind.BID, 11.0)
+        notifications.fan_out(self.auction.id, NotificationKind.BID, 12.0)
+        self.assertEqual({"unread": 2}, self.client.get(url).json())
+
+        # The inbox shows the newest first and marks them as read
+        response = self.client.get(reverse("inbox"), {"per_page_number": 1})
+        self.assertEqual([12.0], [notification.price for notification in response.context["page"]])
+        self.assertContains(response, "lamp")
+        self.assertEqual({"unread": 1}, self.client.get(url).json())
+        self.assertEqual(1, notifications.mark_read(watcher.pk))
+        self.assertEqual({"unread": 0}, self.client.get(url).json())
+
+
+@override_settings(NOTIFICATION_DELAY=0.5)
+class NotificationsFanOutTest(TransactionTestCase):
+    def test_bids_are_fanned_out_in_the_background(self):
+        owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        bidder = User.objects.create_user(username="bidder", password="NotSafe1234")
+        auction = Auction.objects.create(name="lamp", price=10.0, owner=owner)
+        for user in (owner, bidder):
+            user.userprofile.watch_list.add(auction)
+
+        # A burst of bids fans out once, with the latest price
+        for price in (11.0, 12.0, 13.0):
+            self.assertTrue(place_bid(auction.id, bidder, price))
+        notifications.wait(timeout=10)
+        # The bidder isn't notified of their own bids
+        self.assertEqual(
+            [(owner.pk, NotificationKind.BID, 13.0)],
+            list(Notification.objects.values_list("user_id", "kind", "price")),
+        )
+
+
+class SessionAuthTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="user", password="NotSafe1234", first_name="user")
+        self.client.login(username="user", password="NotSafe1234")
+
+    def test_sessions_are_cached_and_written_through(self):
+        url = reverse("unread_notifications")
+        # Caches the unread count
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        sqls = [query["sql"] for query in queries.captured_queries]
+        # One query for the user, joined with the profile, and no session read or write
+        self.assertEqual(1, len(sqls))
+        self.assertIn('"auctions_userprofile"', sqls[0])
+        self.assertFalse(any("django_session" in sql for sql in sqls))
+
+        # The database keeps the session when the cache loses it
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(200, self.client.get(url).status_code)
+        sqls = [query["sql"] for query in queries.captured_queries]
+        self.assertEqual(1, sum(sql.startswith("SELECT") and "django_session" in sql for sql in sqls))
+        self.assertFalse(any(sql.startswith(("UPDATE", "INSERT")) and "django_session" in sql for sql in sqls))
+
+    def test_profile_comes_with_the_user(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(200, self.client.get(reverse("userprofile")).status_code)
+        self.assertFalse(
+            any(query["sql"].startswith('SELECT "auctions_userprofile"') for query in queries.captured_queries)
+        )
+        # Inactive users are logged out like with ModelBackend
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(302, self.client.get(reverse("userprofile")).status_code)
+
+    def test_model_backend_sessions_stay_logged_in(self):
+        self.client.force_login(self.user, backend="django.contrib.auth.backends.ModelBackend")
+        self.assertEqual(200, self.client.get(reverse("userprofile")).status_code)
+
+
+class DatabaseProfileTest(TestCase):
+    def test_sqlite_pragmas_are_applied_on_connect(self):
+        if connection.vendor != "sqlite" or not connection.settings_dict.get("OPTIONS"):
+            self.skipTest("The tuned SQLite profile isn't in use")
+        with connection.cursor() as cursor:
+            pragmas = {}
+            for pragma in ("journal_mode", "synchronous", "cache_size", "mmap_size"):
+                cursor.execute(f"PRAGMA {pragma}")
+                pragmas[pragma] = cursor.fetchone()[0]
+        # synchronous=NORMAL is 1
+        self.assertEqual({"journal_mode": "wal", "synchronous": 1, "cache_size": -65536, "mmap_size": 268435456}, pragmas)
+        self.assertEqual("IMMEDIATE", connection.transaction_mode)
+
+
+class ReadReplicaTest(TransactionTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # A second SQLite file, copied from the test database, stands in for the
+        # replica; a mirror of default, so it's never flushed
+        cls.directory = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.directory, "replica.sqlite3")
+        connections.settings["replica_test"] = {
+            **connections["default"].settings_dict,
+            "NAME": f"file:{cls.path}?mode=ro",
+            "OPTIONS": {"init_command": "PRAGMA query_only=ON"},
+            "TEST": {"MIRROR": "default"},
+        }
+        cls.databases = cls.databases | {"replica_test"}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections["replica_test"].close()
+        del connections["replica_test"]
+        del connections.settings["replica_test"]
+        del cls.databases
+        shutil.rmtree(cls.directory, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        self.bidder = User.objects.create_user(username="bidder", password="NotSafe1234", first_name="bidder")
+        self.auction = Auction.objects.create(name="lamp", price=10.0, owner=self.owner)
+        replicas.sync_sqlite("replica_test")
+        settings = override_settings(DATABASE_REPLICAS=["replica_test"], PAGE_CACHE_ENABLED=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        # Written after the copy, so only the primary has it
+        Auction.objects.filter(pk=self.auction.pk).update(name="renamed")
+
+    def tearDown(self):
+        connections["replica_test"].close()
+        replicas._down.clear()
+
+    def test_reads_stick_to_the_primary_after_a_write(self):
+        url = reverse("auction", args=[self.auction.id])
+        self.assertContains(self.client.get(url), "lamp")
+
+        self.client.login(username="bidder", password="NotSafe1234")
+        self.assertContains(self.client.get(url), "lamp")
+        response = self.client.post(reverse("bid", args=[self.auction.id]), {"price": 11.0})
+        self.assertIn(replicas.STICKY_COOKIE, response.cookies)
+        # The bidder reads their own bid, the others still the replica's copy
+        self.assertContains(self.client.get(url), "renamed")
+        self.assertContains(self.client_class().get(url), "lamp")
+
+        replicas.sync_sqlite("replica_test")
+        self.assertContains(self.client_class().get(url), "renamed")
+        # Pure reads don't pin anyone to the primary
+        self.assertNotIn(replicas.STICKY_COOKIE, self.client_class().get(url).cookies)
+
+    def test_unavailable_replica_fails_over_to_the_primary(self):
+        os.remove(self.path)
+        with self.assertLogs("auctions.replicas", "WARNING"):
+            self.assertContains(self.client.get(reverse("auction", args=[self.auction.id])), "renamed")
+        self.assertIn("replica_test", replicas._down)
+        # Left out until it's retried, without trying to connect again
+        with mock.patch.object(connections["replica_test"], "ensure_connection") as ensure_connection:
+            self.assertContains(self.client.get(reverse("index")), "renamed")
+        ensure_connection.assert_not_called()
+
+    def test_replica_pages_are_cached_for_the_sticky_window(self):
+        with override_settings(PAGE_CACHE_ENABLED=True, REPLICA_STICKY_SECONDS=7):
+            with mock.patch.object(caching.cache, "set", wraps=caching.cache.set) as cache_set:
+                self.client.get(reverse("auction", args=[self.auction.id]))
+        pages = [call.args for call in cache_set.call_args_list if call.args[0].startswith("auctions:page:")]
+        self.assertEqual([7], [args[2] for args in pages])
+
+    def test_querysets_read_the_replica_inside_reading(self):
+        with replicas.reading():
+            self.assertEqual("lamp", Auction.objects.get(pk=self.auction.pk).name)
+        self.assertEqual("renamed", Auction.objects.get(pk=self.auction.pk).name)
+
+
+class ArchiveTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        self.bidder = User.objects.create_user(username="bidder", password="NotSafe1234", first_name="bidder")
+        long_ago = timezone.now() - timedelta(days=40)
+        self.old = Auction.objects.create(
+            name="lamp", price=10.0, owner=self.owner, picture="auction_images/lamp.png", ends_at=long_ago
+        )
+        self.bid = Bid.objects.create(auction=self.old, bidder=self.bidder, price=12.0)
+        self.comment = Comment.objects.create(auction=self.old, commenter=self.bidder, text="still works?")
+        self.bidder.userprofile.watch_list.add(self.old)
+        notifications.fan_out(self.old.id, NotificationKind.BID, 12.0)
+        Auction.objects.filter(pk=self.old.pk).update(
+            status=AuctionStatus.CLOSED, top_bid=self.bid, winner=self.bidder, price=12.0
+        )
+        stats.rebuild()
+        # Closed too recently, and still active
+        self.recent = Auction.objects.create(
+            name="chair", price=5.0, owner=self.owner, status=AuctionStatus.CLOSED, ends_at=timezone.now()
+        )
+        self.active = Auction.objects.create(name="desk", price=5.0, owner=self.owner, ends_at=long_ago)
+
+    def test_old_closed_auctions_are_archived(self):
+        self.assertEqual(1, notifications.unread_count(self.bidder.pk))
+        closed = stats.counts(status=AuctionStatus.CLOSED)
+
+        self.assertEqual(1, archive.archive(batch_size=1))
+        self.assertEqual({self.recent.id, self.active.id}, set(Auction.objects.values_list("id", flat=True)))
+        archived = ArchivedAuction.objects.get()
+        self.assertEqual(
+            (self.old.id, "lamp", 12.0, self.bidder.pk, archive.period(self.old.ends_at)),
+            (archived.id, archived.name, archived.price, archived.winner_id, archived.period),
+        )
+        self.assertEqual([self.bid.id], [bid.id for bid in archived.bids.all()])
+        self.assertEqual(["still works?"], [comment.text for comment in archived.comments.all()])
+        for model in (Bid, Comment, Notification, BidAttempt):
+            self.assertFalse(model.objects.filter(auction_id=self.old.id).exists())
+        self.assertFalse(self.bidder.userprofile.watch_list.exists())
+
+        # Counters, search and unread counts follow
+        self.assertEqual(closed - 1, stats.counts(status=AuctionStatus.CLOSED))
+        self.assertEqual([], list(search("lamp")))
+        self.assertEqual(0, notifications.unread_count(self.bidder.pk))
+        # The archived picture keeps its reference
+        self.assertEqual(1, MediaBlob.objects.get(name="auction_images/lamp.png").references)
+        self.assertEqual(0, archive.archive())
+
+    def test_auctions_closed_by_hand_age_from_closing(self):
+        # Created long ago, closed by its owner and by an admin now
+        vase, clock = (Auction.objects.create(name=name, price=5.0, owner=self.owner) for name in ("vase", "clock"))
+        clock.top_bid = Bid.objects.create(auction=clock, bidder=self.bidder, price=6.0)
+        clock.save()
+        Auction.objects.filter(pk__in=[vase.pk, clock.pk]).update(date=timezone.now() - timedelta(days=40))
+        self.assertTrue(closing.close(vase.id))
+        admin = User.objects.create_superuser(username="admin", password="NotSafe1234")
+        self.client.force_login(admin)
+        data = {"name": "clock", "description": "", "price": "6.00", "category": clock.category, "owner": self.owner.pk}
+        self.client.post(reverse("admin:auctions_auction_change", args=[clock.id]), {**data, "status": AuctionStatus.CLOSED})
+
+        vase.refresh_from_db()
+        clock.refresh_from_db()
+        self.assertEqual((AuctionStatus.CLOSED, self.bidder), (clock.status, clock.winner))
+        self.assertGreater(vase.ends_at, timezone.now() - timedelta(minutes=1))
+        self.assertGreater(clock.ends_at, timezone.now() - timedelta(minutes=1))
+        archive.archive()
+        self.assertEqual(2, Auction.objects.filter(pk__in=[vase.pk, clock.pk]).count())
+        archive.archive(timezone.now() + timedelta(seconds=1))
+        self.assertEqual(0, Auction.objects.filter(pk__in=[vase.pk, clock.pk]).count())
+
+    def test_archived_auction_page(self):
+        archive.archive()
+        url = reverse("auction", args=[self.old.id])
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertContains(response, "Archived")
+        self.assertContains(response, "still works?")
+
+        # Read only, without the ledger's history or live updates
+        self.client.force_login(self.bidder)
+        response = self.client.get(url)
+        self.assertContains(response, "You've Won This Auction!")
+        self.assertNotContains(response, reverse("bid_history", args=[self.old.id]))
+        self.assertNotContains(response, reverse("comment", args=[self.old.id]))
+        self.assertNotContains(response, reverse("live", args=[self.old.id]))
+        self.assertEqual(404, self.client.get(reverse("auction", args=[self.active.id + 1000])).status_code)
+
+    def test_purge_drops_whole_periods(self):
+        archive.archive()
+        output = StringIO()
+        month = archive.period(self.old.ends_at).strftime("%Y-%m")
+        call_command("archive_auctions", "--purge-before", month, stdout=output)
+        self.assertEqual(1, ArchivedAuction.objects.count())
+        self.assertIn("Purged 0 archived auctions", output.getvalue())
+
+        next_month = archive.period(self.old.ends_at) + timedelta(days=31)
+        self.assertEqual(1, archive.purge(next_month))
+        self.assertFalse(ArchivedAuction.objects.exists())
+        self.assertEqual(0, MediaBlob.objects.get(name="auction_images/lamp.png").references)
+        with self.assertRaises(CommandError):
+            call_command("archive_auctions", "--purge-before", "June", stdout=output)
+
+
+class MoneyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="NotSafe1234")
+        self.bidder = User.objects.create_user(username="bidder", password="NotSafe1234")
+        self.auction = Auction.objects.create(name="lamp", price="0.30", owner=self.owner)
+
+    def test_amounts(self):
+        self.assertEqual(Decimal("10.01"), money.amount("10.005"))
+        self.assertEqual(Decimal("0.10"), money.amount(0.1))
+        self.assertEqual((1999, Decimal("19.99")), (money.to_cents("19.99"), money.from_cents(1999)))
+        for value in ("nan", "inf", "cheap", "", None, "1e999999999", "92233720368547758.08"):
+            with self.assertRaises(ValueError):
+                money.amount(value)
+        self.assertEqual(Decimal("92233720368547758.07"), money.amount(money.MAX_PRICE))
+
+    def test_prices_beyond_the_column_are_rejected(self):
+        huge = "99999999999999999.99"
+        self.client.force_login(self.bidder)
+        response = self.client.post(reverse("bid", args=[self.auction.id]), {"price": huge}, follow=True)
+        self.assertContains(response, "Price is required and must be number!")
+        self.assertFalse(Bid.objects.exists())
+
+        response = self.client.post(reverse("add_auction"), {"name": "vase", "description": "blue", "price": huge})
+        self.assertFalse(Auction.objects.filter(name="vase").exists())
+        self.assertIn("price", response.context["form"].errors)
+        self.assertEqual(400, self.client.get(reverse("api_listing"), {"start_price": huge}).status_code)
+
+    def test_prices_are_integer_cents(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT price_cents FROM {Auction._meta.db_table} WHERE id = %s", [self.auction.id])
+            self.assertEqual((30,), cursor.fetchone())
+        self.auction.refresh_from_db()
+        self.assertEqual(Decimal("0.30"), self.auction.price)
+        self.assertEqual(Decimal("0.30"), AuctionStatistics.objects.get(category=self.auction.category, status=self.auction.status).min_price)
+
+    def test_bids_compare_exactly(self):
+        # 0.1 + 0.2 is 0.30000000000000004 as a float, above the price
+        self.assertFalse(place_bid(self.auction.id, self.bidder, 0.1 + 0.2))
+        self.client.force_login(self.bidder)
+        self.client.post(reverse("bid", args=[self.auction.id]), {"price": "0.304"})
+        self.assertFalse(Bid.objects.exists())
+        self.client.post(reverse("bid", args=[self.auction.id]), {"price": "0.305"})
+        self.auction.refresh_from_db()
+        self.assertEqual((Decimal("0.31"), Decimal("0.31")), (self.auction.price, self.auction.top_bid.price))
+        self.assertEqual(
+            [Decimal("0.30"), Decimal("0.30"), Decimal("0.31")],
+            list(BidAttempt.objects.order_by("id").values_list("price", flat=True)),
+        )
+        response = self.client.post(reverse("bid", args=[self.auction.id]), {"price": "nan"}, follow=True)
+        self.assertContains(response, "Price is required and must be number!")
+
+    def test_price_ranges_are_exact(self):
+        Auction.objects.filter(pk=self.auction.pk).update(price="10.50")
+        self.assertTrue(Auction.objects.filter(price__gte=10.5, price__lte="10.50").exists())
+        self.assertFalse(Auction.objects.filter(price__gt=10.5).exists())
+        self.assertFalse(Auction.objects.filter(price__lt=Decimal("10.50")).exists())
+        response = self.client.get(reverse("api_listing"), {"start_price": "10.50", "end_price": "10.50"})
+        self.assertEqual([10.5], [auction["price"] for auction in response.json()["results"]])
+        form = AuctionsListingFiltersForm({"start_price": "10.5", "end_price": "20"})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(Decimal("10.5"), form.cleaned_data["start_price"])
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from auctions import views
+from auctions import api, views
 
 urlpatterns = [
     path("auction/<int:auction_id>", views.auction, name="auction"),
@@ -8,7 +8,21 @@ urlpatterns = [
     path("add_auction/", views.auction_management, name="add_auction"),
     path("categories/", views.categories, name="categories"),
     path("listing/", views.listing, name="listing"),
+    path("search/", views.search, name="search"),
     path("bid/<int:auction_id>", views.bid, name="bid"),
     path("comment/<int:auction_id>", views.comment, name="comment"),
+    path("bid_history/<int:auction_id>", views.bid_history, name="bid_history"),
+    path("my_bids/", views.my_bids, name="my_bids"),
+    path("inbox/", views.inbox, name="inbox"),
+    path("inbox/unread", views.unread_notifications, name="unread_notifications"),
+    path("live/<int:auction_id>", views.live, name="live"),
     path("watch_list/<int:auction_id>/<str:action>/", views.watch_list, name="watch_list"),
+    path("import/", views.import_auctions, name="import_auctions"),
+    path("export/<str:kind>", views.export, name="export"),
+    # JSON API
+    path("api/auctions/", api.listing, name="api_listing"),
+    path("api/auctions/<int:auction_id>", api.auction, name="api_auction"),
+    path("api/auctions/<int:auction_id>/bids", api.bids, name="api_bids"),
+    path("api/auctions/<int:auction_id>/comments", api.comments, name="api_comments"),
+    path("api/auctions/<int:auction_id>/rollups", api.rollups, name="api_rollups"),
 ]
@@ -1,11 +1,60 @@
+
+from django.utils import timezone
+
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import Http404
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
 from django.contrib import messages
 from django.core.paginator import Paginator
 
+# Pagination
+from auctions.pagination import CountedPaginator, KeysetPaginator
+
+# Statistics
+from auctions import stats
+
+# Caching
+from auctions.caching import cache_anonymous_page
+
+# Read Replicas
+from auctions.replicas import read_replica
+
+# Query Budgets
+from auctions.querybudget import query_budget
+
+# Full-Text Search
+from auctions.search import search as search_auctions
+
 
 # Models
-from auctions.models import Auction, AuctionCategories, AuctionStatus, Bid, Comment
+from auctions.models import (
+    ArchivedAuction,
+    Auction,
+    AuctionCategories,
+    AuctionStatus,
+    BidAttempt,
+    BidRollup,
+    Comment,
+    Notification,
+)
+
+# Bidding
+from auctions.bidding import place_bid
+
+# Live Updates
+from auctions.live import hub
+
+# Bulk Import And Export
+from auctions import bulk
+
+# Watch List Notifications
+from auctions import notifications
+
+# Prices In Integer Cents
+from auctions import money
+
+# Closing By Hand
+from auctions import closing
 
 # Forms
 from auctions.forms import (
@@ -37,8 +86,8 @@ def register(request):
         if form.is_valid():
             user = form.save()
 
-            # Loging in the user
-            login(request, user)
+            # Loging in the user, through the backend loading their profile
+            login(request, user, backend="auctions.backends.ProfileBackend")
             return redirect("index")
 
     else:
@@ -52,6 +101,8 @@ def register(request):
 
 # User Profile View
 @login_required
+# Saving a new avatar also retains and releases stored files (auctions.blobs)
+@query_budget(7)
 def userprofile(request):
     """_summary_
     Handles Display and Edit The UserProfile
@@ -95,41 +146,74 @@ def userprofile(request):
     return render(request, "userprofile.html", data)
 
 
+# Page Cache Scopes Of Auction Lists, Bids Move Auctions Across Price Filters And Orders
+def listing_scopes(request):
+    if request.GET.get("order") == "price" or request.GET.get("start_price") or request.GET.get("end_price"):
+        return ("listings", "prices")
+    return ("listings",)
+
+
 # Index View
+@read_replica
+@cache_anonymous_page(listing_scopes, per_auction=True)
+@query_budget(4)
 def index(request):
     """_summary_
     Main Page
     Queries all active auctions Then Caps Them at 6 Results and then renders them.
+    The active auctions count comes from the statistics counters.
     """
     dflt_items_count = 6
 
     auctions = Auction.objects.filter(status=AuctionStatus.ACTIVE)
 
     data = {
-        "auctions_count": auctions.count(),
+        # Maintained counter instead of a COUNT query
+        "auctions_count": stats.counts(status=AuctionStatus.ACTIVE),
         "auctions": auctions[:dflt_items_count],
     }
     return render(request, "index.html", data)
 
 
 # Auction View
+@read_replica
+@cache_anonymous_page(lambda request, auction_id: (f"auction:{auction_id}",))
+@query_budget(4)
 def auction(request, auction_id):
     """_summary_
 
     Retrives the auction object based on it's ID and
     renders it to auction page.
+    The owner, top bid and its bidder are joined to the auction, and the
+    commenters to the comments, so the page runs two queries for any number
+    of comments.
+    Auctions moved to the archive (auctions.archive) are shown from it, read
+    only, with one more query.
     """
-    auction_obj = get_object_or_404(Auction, id=auction_id)
-    comments = Comment.objects.filter(auction=auction_obj)[:10]
+    try:
+        auction_obj = Auction.objects.select_related("owner", "top_bid__bidder").get(id=auction_id)
+        archived = False
+        comments = Comment.objects.filter(auction=auction_obj).select_related("commenter")[:10]
+    except Auction.DoesNotExist:
+        auction_obj = get_object_or_404(ArchivedAuction.objects.select_related("owner"), id=auction_id)
+        archived = True
+        comments = auction_obj.comments.select_related("commenter")[:10]
     data = {
         "comments": comments,
         "auction": auction_obj,
+        "archived": archived,
+        # Ended auctions refuse bids until they're closed (auctions.closing)
+        "ended": auction_obj.ends_at is not None and auction_obj.ends_at <= timezone.now(),
     }
 
     return render(request, "auction.html", data)
 
 
 # Auction Management
+# Fields an owner's edit writes; price, top_bid, winner are the bid engine's
+OWNER_EDITABLE_FIELDS = ("name", "description", "picture", "category", "status", "ends_at")
+
+
 @login_required
 def auction_management(request, auction_id=0):
     """_summary_
@@ -163,10 +247,25 @@ def auction_management(request, auction_id=0):
 
         if form.is_valid():
             auction_instance = form.save(commit=False)
-            # Fills owner field for new auctions
-            if not edit:
+            if edit:
+                # Bids Move price, top_bid And A Soft Closed ends_at Concurrently, So
+                # Only The Fields The Owner Changed Are Written
+                closing_by_hand = auction_instance.status == AuctionStatus.CLOSED
+                update_fields = [
+                    name for name in form.changed_data
+                    if name in OWNER_EDITABLE_FIELDS and not (closing_by_hand and name == "status")
+                ]
+                if closing_by_hand:
+                    # Closed Below, The Row Keeps Its Status Until Then
+                    auction_instance.status = form.initial["status"]
+                auction_instance.save(update_fields=update_fields)
+                # Closing By Hand Finalizes The Winner From The Current Top Bid, Like The Scheduler
+                if closing_by_hand:
+                    closing.close(auction_instance.id)
+            else:
+                # Fills owner field for new auctions
                 auction_instance.owner = request.user
-            auction_instance.save()
+                auction_instance.save()
             return redirect(auction, auction_id=auction_instance.id)
         else:
             messages.error(request, "Processing Your Form Submission Failed!")
@@ -179,12 +278,19 @@ def auction_management(request, auction_id=0):
 
 
 # Categories View
+@read_replica
+@cache_anonymous_page(lambda request: ("listings",))
+@query_budget(3)
 def categories(request):
     """_summary_
     Displays Categories
-    Retrives AuctionCategories choices and renders them
+    Retrives AuctionCategories choices with their auctions count and renders them
     """
-    auction_categories = AuctionCategories.choices
+    # Category choices with their auctions count from the statistics counters
+    auction_categories = [
+        (value, label, stats.counts(category=value))
+        for value, label in AuctionCategories.choices
+    ]
 
     data = {
         "auction_categories": auction_categories,
@@ -193,7 +299,52 @@ def categories(request):
     return render(request, "categories.html", data)
 
 
+# Listing Filters
+def filter_auctions(filter_form, auctions):
+    """
+    Applies a valid AuctionsListingFiltersForm to an auctions QuerySet.
+
+    Returns:
+        tuple: The filtered QuerySet, and the statistics bucket filters
+        ({"category", "status"}) matching it, or None if a price range makes
+        the statistics counters unable to count it.
+    """
+    # all the filters dictionary
+    filters = dict()
+
+    # filters
+    category = filter_form.cleaned_data.get("category", None)
+    if category:
+        filters["category__exact"] = category
+
+    status = filter_form.cleaned_data.get("status", None)
+    if status:
+        filters["status__exact"] = status
+
+    start_price = filter_form.cleaned_data.get("start_price", None)
+    end_price = filter_form.cleaned_data.get("end_price", None)
+
+    if start_price:
+        filters["price__gte"] = start_price
+    if end_price:
+        filters["price__lte"] = end_price
+
+    # Price ranges aren't counted by the statistics buckets
+    if start_price or end_price:
+        counted_filters = None
+    else:
+        counted_filters = {"category": category, "status": status}
+
+    # Querying Auctions With User Associated Filters
+    auctions = auctions.filter(**filters)
+
+    return auctions, counted_filters
+
+
 # Listing View
+@read_replica
+@cache_anonymous_page(listing_scopes, per_auction=True)
+@query_budget(5)
 def listing(request):
     """__summary__
     Retrieves all auctions and applies filters based on the GET request parameters.
@@ -201,85 +352,145 @@ def listing(request):
     Filters include category, status, and price range (start_price and end_price).
     Handles pagination dynamically based on user preferences for items per page and the current page.
 
+    With mode=cursor (or a cursor parameter) the listing is paginated by seeking on
+    (date, id) or (price, id), chosen with order=date|price, using opaque cursor tokens.
+    That mode doesn't count the auctions unless count=1 is requested.
+
     If no GET parameters are provided, renders the filter form and all auctions.
-    If the QuerySet is empty, skips the pagination process and assigns an empty list to the page.
+    If the QuerySet is empty, skips the pagination process and assigns None to the page.
     """
     filter_form = AuctionsListingFiltersForm()
     auctions = Auction.objects.all()
+    # Buckets the listing is narrowed to, None when the counters can't tell the total
+    counted_filters = {}
 
     # Handles The Filters
     if request.GET:
         filter_form = AuctionsListingFiltersForm(request.GET)
         if filter_form.is_valid():
-            # all the filters dictionary
-            filters = dict()
+            auctions, counted_filters = filter_auctions(filter_form, auctions)
 
-            # filters
-            category = filter_form.cleaned_data.get("category", None)
-            if category:
-                filters["category__exact"] = category
+    # Defaults and Query initialiation
+    dflt_per_page_number = 8
+    dflt_page_number = 1
 
-            status = filter_form.cleaned_data.get("status", None)
-            if status:
-                filters["status__exact"] = status
+    # Get user prefrence for items per page
+    per_page_number = request.GET.get("per_page_number", dflt_per_page_number)
 
-            start_price = filter_form.cleaned_data.get("start_price", None)
-            end_price = filter_form.cleaned_data.get("end_price", None)
+    try:
+        per_page_number = int(per_page_number)
+    except ValueError:
+        per_page_number = dflt_per_page_number
+
+    if per_page_number <= 0:
+        per_page_number = dflt_per_page_number
+
+    # Cursor Mode: seeks on (order, id) and skips COUNT unless asked for
+    count_label = None
+    keyset = request.GET.get("mode") == "cursor" or "cursor" in request.GET
+    if keyset:
+        order = request.GET.get("order", "date")
+        if order not in KeysetPaginator.KEYS:
+            order = "date"
+        paginator = KeysetPaginator(auctions, per_page_number, key=order)
+        page = paginator.get_page(request.GET.get("cursor"))
+        # Halts The Pagination Process If No Auction
+        if not page.object_list and not page.has_previous():
+            page = None
+        elif request.GET.get("count"):
+            # Evaluates the COUNT only when the page count is explicitly requested
+            count_label = f"{paginator.count} auctions"
+
+    # Page Numbers Mode
+    else:
+        # Set up paginator, counting with the statistics counters when filters allow,
+        # otherwise its COUNT is issued once and cached
+        if counted_filters is not None:
+            paginator = CountedPaginator(auctions, per_page_number, stats.counts(**counted_filters))
+        else:
+            paginator = Paginator(auctions, per_page_number)
 
-            if start_price:
-                filters["price__gte"] = start_price
-            if end_price:
-                filters["price__lte"] = end_price
+        # Halts The Pagination Process If No Auction
+        if not paginator.count:
+            page = None
+        else:
+            # Cap items per page at total count
+            if per_page_number > paginator.count:
+                paginator.per_page = paginator.count
 
-            # Querying Auctions With User Associated Filters
-            auctions = auctions.filter(**filters)
+            # Fetch user-selected page, default to 1, cap at total
+            page_number = request.GET.get("page", dflt_page_number)
 
-    # To handle dynamic per_page_number and page_number
-    # Halts The Pagination Process If No Auction
-    if auctions.exists():
-        # Defaults and Query initialiation
-        dflt_per_page_number = 8
-        dflt_page_number = 1
+            try:
+                page_number = int(page_number)
+            except ValueError:
+                page_number = dflt_page_number
 
-        # Get user prefrence for items per page, default to 12, cap at total count
-        per_page_number = request.GET.get("per_page_number", dflt_per_page_number)
+            if page_number < dflt_page_number:
+                page_number = dflt_page_number
+            elif page_number > paginator.num_pages:
+                page_number = paginator.num_pages
 
-        try:
-            per_page_number = int(per_page_number)
-        except ValueError:
-            per_page_number = dflt_per_page_number
+            page = paginator.get_page(page_number)
 
-        if per_page_number <= 0:
-            per_page_number = dflt_per_page_number
-        elif per_page_number > auctions.count():
-            per_page_number = auctions.count()
+    data = {
+        "page": page,
+        "keyset": keyset,
+        "count_label": count_label,
+        "form": filter_form,
+    }
 
-        # Set up paginator and fetch user-selected page, default to 1, cap at total
-        paginator = Paginator(auctions, per_page_number)
-        page_number = request.GET.get("page", dflt_page_number)
+    return render(request, "listing.html", data)
 
-        try:
-            page_number = int(page_number)
-        except ValueError:
-            page_number = dflt_page_number
 
-        if page_number < dflt_page_number:
-            page_number = dflt_page_number
-        elif page_number > paginator.num_pages:
-            page_number = paginator.num_pages
+# Search View
+# Newest matches ranked and paginated, older ones are left out of the pages
+SEARCH_MAX_RESULTS = 1000
 
-        page = paginator.get_page(page_number)
 
-    # If No Auctions
-    else:
-        page = None
+@cache_anonymous_page(listing_scopes, per_auction=True)
+@query_budget(6)
+def search(request):
+    """__summary__
+    Full-text search over auction names and descriptions.
+
+    Matches every word of the q parameter (the last one as a prefix), best
+    matches first, narrowed by the same filters as the listing view and
+    paginated with page and per_page_number. Only the newest
+    SEARCH_MAX_RESULTS matches are ranked, by the words found in as many
+    auctions at most, so broad words stay as cheap as narrow ones.
+    """
+    query = request.GET.get("q", "").strip()
+    filter_form = AuctionsListingFiltersForm(request.GET or None)
+    auctions = Auction.objects.all()
+    if filter_form.is_bound and filter_form.is_valid():
+        auctions, _ = filter_auctions(filter_form, auctions)
+
+    page = None
+    if query:
+        dflt_per_page_number = 8
+        try:
+            per_page_number = int(request.GET.get("per_page_number", dflt_per_page_number))
+        except ValueError:
+            per_page_number = dflt_per_page_number
+        if per_page_number <= 0:
+            per_page_number = dflt_per_page_number
+
+        results = search_auctions(query, auctions, limit=SEARCH_MAX_RESULTS)
+        # Ranks and counts SEARCH_MAX_RESULTS matches at most, so the page
+        # costs the same however many auctions match
+        count = results.order_by()[:SEARCH_MAX_RESULTS].count()
+        paginator = CountedPaginator(results, per_page_number, count)
+        if paginator.count:
+            page = paginator.get_page(request.GET.get("page"))
 
     data = {
+        "query": query,
         "page": page,
         "form": filter_form,
     }
 
-    return render(request, "listing.html", data)
+    return render(request, "search.html", data)
 
 
 @login_required
@@ -288,52 +499,135 @@ def bid(request, auction_id=None):
     Handles the bidding process for an auction.
 
     Raises Http404 if no auction ID is provided or the auction is not found.
-    Retrieves price from POST request and converts it to float.
-    Checks auction status to be active before processing the bid.
-    Creates a new bid instance or updates the user's existing bid.
-    Executes the auction's top_bid_handler method to validate and update the top bid and auction price.
+    Retrieves price from POST request and converts it to a two-place Decimal
+    (auctions.money), so it's compared with the current price exactly.
+    Places the bid through the atomic bid engine, which creates or updates the
+    user's bid and raises the auction's price and top_bid in one transaction.
+    The auction is only read when the bid is rejected, to explain why.
     """
 
     # No Auction Provided Handler
     if not auction_id:
         raise Http404("Auction ID is required!")
 
-    # Retrives Auction Object
-    auction_obj = get_object_or_404(Auction, id=auction_id)
-
-    # Checking Auction To be Active
-    if auction_obj.status != AuctionStatus.ACTIVE:
-        messages.error(request, f"Auction is {auction_obj.status.value()}")
-        return redirect(auction, auction_id)
-
     # Retrieves and Checks Price
     try:
-        price = float(request.POST.get("price"))
-    except (TypeError, ValueError):
+        price = money.amount(request.POST.get("price"))
+    except ValueError:
         messages.error(request, "Price is required and must be number!")
         return redirect(auction, auction_id)
 
-    # Fetches User's Latest Bid On The Auction
-    new_bid = Bid.objects.filter(bidder=request.user, auction=auction_obj).first()
-    if new_bid:
-        new_bid.price = price
-    else:
-        # Creates New Bid Object
-        new_bid = Bid(
-            price=price,
-            bidder=request.user,
-            auction=auction_obj,
-        )
-
     # Saves New Bid and Updates Top_Bid
-    if auction_obj.top_bid_handler(new_bid):
+    if place_bid(auction_id, request.user, price):
         messages.success(request, "Your bid recorded successfully!")
+        return redirect(auction, auction_id)
+
+    # Explains The Rejection
+    auction_obj = get_object_or_404(Auction, id=auction_id)
+    if auction_obj.status != AuctionStatus.ACTIVE:
+        messages.error(request, f"Auction is {auction_obj.get_status_display()}")
+    elif auction_obj.ends_at and auction_obj.ends_at <= timezone.now():
+        messages.error(request, "Auction has ended!")
     else:
         messages.error(request, "Something Went Wrong With Your Submission!")
     # returns to auction
     return redirect(auction, auction_id)
 
 
+# Bid Histories
+HISTORY_PER_PAGE = 20
+HISTORY_MAX_PER_PAGE = 100
+# Latest minutes of bid rollups shown with an auction's history
+HISTORY_ROLLUP_MINUTES = 60
+
+
+def history_page(request, attempts):
+    """
+    A cursor page of bid attempts (or notifications), newest first.
+
+    Args:
+        request (HttpRequest): Takes its cursor and per_page_number (up to HISTORY_MAX_PER_PAGE) parameters.
+        attempts (QuerySet): BidAttempt (or Notification) rows to paginate.
+    """
+    try:
+        per_page_number = min(max(int(request.GET.get("per_page_number", HISTORY_PER_PAGE)), 1), HISTORY_MAX_PER_PAGE)
+    except ValueError:
+        per_page_number = HISTORY_PER_PAGE
+    paginator = KeysetPaginator(attempts, per_page_number, key="date", descending=True)
+    return paginator.get_page(request.GET.get("cursor"))
+
+
+@login_required
+@query_budget(5)
+def bid_history(request, auction_id):
+    """_summary_
+    Every bid attempt on an auction, accepted or rejected, newest first.
+
+    Reads the append-only bid ledger (auctions.ledger) through its
+    (auction, date) index with cursor pagination, plus the latest minutes of
+    the precomputed bid rollups (bids per minute and price curve).
+    """
+    auction_obj = get_object_or_404(Auction.objects.only("id", "name"), id=auction_id)
+    attempts = (
+        BidAttempt.objects.filter(auction=auction_obj)
+        .select_related("bidder")
+        .only("id", "date", "price", "outcome", "bidder__username")
+    )
+    rollups = BidRollup.objects.filter(auction=auction_obj).order_by("-minute")[:HISTORY_ROLLUP_MINUTES]
+
+    data = {
+        "auction": auction_obj,
+        "page": history_page(request, attempts),
+        "rollups": rollups,
+    }
+    return render(request, "bid_history.html", data)
+
+
+@login_required
+@query_budget(3)
+def my_bids(request):
+    """_summary_
+    Every bid attempt of the user, newest first, from the bid ledger.
+    """
+    attempts = (
+        BidAttempt.objects.filter(bidder=request.user)
+        .select_related("auction")
+        .only("id", "date", "price", "outcome", "auction__id", "auction__name")
+    )
+    return render(request, "my_bids.html", {"page": history_page(request, attempts)})
+
+
+# Notifications
+@login_required
+@query_budget(5)
+def inbox(request):
+    """_summary_
+    The user's notifications about watched auctions, newest first.
+
+    Reads the (user, date) index with cursor pagination; the unread
+    notifications shown are marked as read.
+    """
+    user_notifications = (
+        Notification.objects.filter(user=request.user)
+        .select_related("auction")
+        .only("id", "date", "kind", "price", "read", "auction__id", "auction__name")
+    )
+    page = history_page(request, user_notifications)
+    unread = [notification.id for notification in page if not notification.read]
+    if unread:
+        notifications.mark_read(request.user.pk, unread)
+    return render(request, "inbox.html", {"page": page})
+
+
+@login_required
+@query_budget(3)
+def unread_notifications(request):
+    """_summary_
+    The user's unread notifications count as JSON, served from the cache.
+    """
+    return JsonResponse({"unread": notifications.unread_count(request.user.pk)})
+
+
 # Comment
 @login_required
 def comment(request, auction_id=None):
@@ -353,6 +647,15 @@ def comment(request, auction_id=None):
             auction=auction_obj,
         )
         new_comment.save()
+        hub.publish(
+            auction_id,
+            "comment",
+            {
+                "commenter": request.user.first_name,
+                "text": new_comment.text,
+                "date": new_comment.date.isoformat(),
+            },
+        )
         messages.success(request, "You're Comment Submitted Successfully")
     else:
         messages.warning(request, "Comment Did Not Create Duo Lack Of Text!")
@@ -408,3 +711,99 @@ def watch_list(request, auction_id=None, action=None):
 
     # Raises Http404 For Unknown Action
     raise Http404("Action Not Supported!")
+
+
+# Bulk Import
+@login_required
+@require_POST
+def import_auctions(request):
+    """_summary_
+    Imports auctions of the user from CSV or JSON Lines.
+
+    The rows come from an uploaded "file" (its format guessed from its name)
+    or from the request body (its format from the content type), and are
+    parsed as they're read. Every row is validated like AuctionForm; valid
+    rows are inserted in batches, invalid ones are reported and skipped.
+
+    Responds with a JSON report: {"created", "rejected", "errors": [{"line", "errors"}]}.
+    """
+    upload = request.FILES.get("file")
+    if upload is not None:
+        source, format = upload.file, bulk.format_of(upload.name, upload.content_type or "")
+    elif request.content_type in ("text/csv", "application/x-ndjson", "application/jsonl"):
+        source, format = request, bulk.format_of("", request.content_type)
+    else:
+        return JsonResponse({"error": "A CSV or JSON Lines file is required!"}, status=400)
+
+    try:
+        batch_size = int(request.GET.get("batch_size") or 0) or None
+    except ValueError:
+        return JsonResponse({"error": "batch_size must be a number!"}, status=400)
+
+    try:
+        report = bulk.import_auctions(bulk.read_rows(bulk.text_lines(source), format), request.user, batch_size)
+    except UnicodeDecodeError:
+        return JsonResponse({"error": "The file must be UTF-8 encoded!"}, status=400)
+    return JsonResponse(report.as_dict())
+
+
+# Streaming Export
+@login_required
+def export(request, kind):
+    """_summary_
+    Streams auctions, bids or comments as CSV or JSON Lines (?format=jsonl).
+
+    Rows are read in chunks and written as they're read, so memory stays
+    constant whatever the size of the export. Staff export everything, other
+    users their auctions and the bids and comments on them.
+
+    Raises:
+        Http404: For unknown kinds or formats.
+    """
+    format = request.GET.get("format", "csv")
+    if kind not in bulk.EXPORTS or format not in bulk.FORMATS:
+        raise Http404("Export Not Supported!")
+
+    owner = None if request.user.is_staff else request.user
+    response = StreamingHttpResponse(bulk.export_rows(kind, format, owner), content_type=bulk.FORMATS[format])
+    response["Content-Disposition"] = f'attachment; filename="{kind}.{format}"'
+    return response
+
+
+
+# Seconds between keep-alive comments on idle live streams
+LIVE_HEARTBEAT = 15
+
+
+async def live_events(auction_id):
+    """Yields Server-Sent Events of an auction until the client disconnects."""
+    subscription = hub.subscribe(auction_id)
+    try:
+        # Tells EventSource how long to wait before reconnecting
+        yield b"retry: 3000\n\n"
+        while True:
+            event = await subscription.get(LIVE_HEARTBEAT)
+            yield event if event is not None else b": keep-alive\n\n"
+    finally:
+        hub.unsubscribe(auction_id, subscription)
+
+
+async def live(request, auction_id):
+    """__summary__
+    Streams live updates of an auction as Server-Sent Events.
+
+    Sends a "price" event for every accepted bid and a "comment" event for every
+    new comment, so auction pages update without reloading.
+    Needs to be served through ASGI (Commerce.asgi).
+
+    Raises:
+        Http404: If the auction doesn't exist.
+    """
+    if not await Auction.objects.filter(id=auction_id).aexists():
+        raise Http404("Auction Not Found!")
+
+    response = StreamingHttpResponse(live_events(auction_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Prevents proxies from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response